@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+"""Latency benchmark for every `vw` subcommand.
+
+Launches a local ganache, then runs each subcommand of `do_main`:
+  cold -- a fresh `vw` process per run (pays import + project load)
+  warm -- repeated `do_main()` calls in one process, already connected
+
+Each run is broken down into the phases of util/phases.py (import, project
+load, connect, rpc, confirm) plus 'other' (wall time not in any phase).
+With --latency, --jitter, --rate-limit, --error-rate or --drop-rate, the
+chain sits behind util/rpcproxy.py, to see how commands fare against a
+remote endpoint rather than localhost.
+
+The JSON report can be diffed against an older one to catch regressions:
+
+  python bench/bench_cli.py --out new.json
+  python bench/bench_cli.py --compare old.json new.json
+"""
+import argparse
+import contextlib
+import importlib.machinery
+import importlib.util
+import io
+import json
+import os
+from pathlib import Path
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from util.rpcproxy import RpcProxy  # pylint: disable=wrong-import-position
+from util.stats import summarize  # pylint: disable=wrong-import-position
+
+NETWORK = "development"
+GANACHE_PORT = 8545
+BENCH_KEY = "0x" + "b3" * 32  # funded by the ganache that we launch
+BENEFICIARY = "0x000000000000000000000000000000000000dead"
+PHASES = ["import", "project load", "connect", "rpc", "confirm"]
+
+
+def commandArgs(token_addr: str, wallet_addr: str) -> dict:
+    """Map subcommand name -> argv (without 'vw') that exercises it"""
+    return {
+        "help": ["help"],
+        "newacct": ["newacct"],
+        "newtoken": ["newtoken", NETWORK],
+        "new_cliff": ["new_cliff", NETWORK, BENEFICIARY, "10"],
+        "new_lin": ["new_lin", NETWORK, BENEFICIARY, "10"],
+        "new_exp": ["new_exp", NETWORK, BENEFICIARY, "100"],
+        "transfer": ["transfer", NETWORK, wallet_addr, token_addr, "1"],
+        "release": ["release", "exp", NETWORK, token_addr, wallet_addr],
+        "mine": ["mine", "1", "10"],
+        "acctinfo": ["acctinfo", NETWORK, "0", token_addr],
+        "walletinfo": ["walletinfo", "exp", NETWORK, wallet_addr, token_addr],
+        "chaininfo": ["chaininfo", NETWORK],
+    }
+
+
+# ========================================================================
+# chain
+def launchGanache(port: int) -> subprocess.Popen:
+    balance = str(10**24)
+    proc = subprocess.Popen(
+        ["ganache-cli", "--port", str(port), f"--account={BENCH_KEY},{balance}"],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    for line in proc.stdout:
+        if b"Listening on" in line:
+            return proc
+    raise RuntimeError("ganache-cli exited before listening")
+
+
+# ========================================================================
+# runs
+def coldRun(argv: list, env: dict) -> dict:
+    """Run `vw argv` in a fresh process. Returns wall, phases, stdout"""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        phases_file = f.name
+    env = dict(env, VW_PHASES_FILE=phases_file)
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, str(REPO / "vw")] + argv,
+                          cwd=REPO, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    try:
+        with open(phases_file) as f:
+            run_phases = json.load(f)
+    except (OSError, ValueError):
+        run_phases = {}
+    os.remove(phases_file)
+    if proc.returncode != 0:
+        raise RuntimeError(f"vw {' '.join(argv)} failed:\n{proc.stderr}")
+    return {"wall": wall, "phases": run_phases, "stdout": proc.stdout}
+
+
+def loadVw():
+    """Import the `vw` script as a module, for warm runs"""
+    os.chdir(REPO)
+    loader = importlib.machinery.SourceFileLoader("vw_cli", str(REPO / "vw"))
+    spec = importlib.util.spec_from_loader("vw_cli", loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+def warmRun(vw, argv: list) -> dict:
+    """Run `do_main()` in this process. Returns wall & phases"""
+    vw.phases.reset()
+    sys.argv = ["vw"] + argv
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            vw.do_main()
+        except SystemExit:
+            pass
+    wall = time.perf_counter() - t0
+    return {"wall": wall, "phases": vw.phases.totals()}
+
+
+def summarizeRuns(runs: list) -> dict:
+    walls = [run["wall"] for run in runs]
+    phase_samples = {name: [] for name in PHASES + ["other"]}
+    for run in runs:
+        for name in PHASES:
+            phase_samples[name].append(run["phases"].get(name, 0.0))
+        in_phases = sum(run["phases"].get(name, 0.0) for name in PHASES)
+        phase_samples["other"].append(max(0.0, run["wall"] - in_phases))
+    return {
+        "wall": summarize(walls),
+        "phases": {name: summarize(xs) for name, xs in phase_samples.items()},
+    }
+
+
+def _exported(stdout: str, name: str) -> str:
+    match = re.search(rf"export {name}=(0x[0-9a-fA-F]+)", stdout)
+    if match is None:
+        raise RuntimeError(f"no {name} in output:\n{stdout}")
+    return match.group(1)
+
+
+def runBenchmark(commands: list, runs: int, warm_runs: int) -> dict:
+    env = dict(os.environ, VW_PRIVATE_KEY=BENCH_KEY)
+
+    # fixtures shared by all commands
+    token_addr = _exported(coldRun(["newtoken", NETWORK], env)["stdout"],
+                           "TOKEN_ADDR")
+    wallet_addr = _exported(
+        coldRun(["new_exp", NETWORK, BENEFICIARY, "100"], env)["stdout"],
+        "WALLET_ADDR")
+    coldRun(["transfer", NETWORK, wallet_addr, token_addr, "100"], env)
+    all_args = commandArgs(token_addr, wallet_addr)
+
+    results = {}
+    for name in commands:
+        argv = all_args[name]
+        print(f"cold: vw {' '.join(argv)}", file=sys.stderr)
+        cold = [coldRun(argv, env) for _ in range(runs)]
+        results[name] = {"args": argv, "cold": summarizeRuns(cold)}
+
+    os.environ["VW_PRIVATE_KEY"] = BENCH_KEY
+    vw = loadVw()
+    for name in commands:
+        argv = all_args[name]
+        print(f"warm: vw {' '.join(argv)}", file=sys.stderr)
+        warmRun(vw, argv)  # warm-up: connect, compile caches, ..
+        warm = [warmRun(vw, argv) for _ in range(warm_runs)]
+        results[name]["warm"] = summarizeRuns(warm)
+    return results
+
+
+# ========================================================================
+# reports
+def gitCommit() -> str:
+    proc = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO,
+                          capture_output=True, text=True)
+    return proc.stdout.strip()
+
+
+def compareReports(old: dict, new: dict, threshold: float) -> list:
+    """Return list of (command, mode, metric, old_p50, new_p50) that got
+    slower by more than `threshold` (a fraction, eg 0.2 = 20%)"""
+    regressions = []
+    for name, new_res in new["commands"].items():
+        old_res = old["commands"].get(name)
+        if old_res is None:
+            continue
+        for mode in ["cold", "warm"]:
+            if mode not in old_res or mode not in new_res:
+                continue
+            metrics = {"wall": (old_res[mode]["wall"], new_res[mode]["wall"])}
+            for phase in new_res[mode]["phases"]:
+                metrics[phase] = (old_res[mode]["phases"].get(phase),
+                                  new_res[mode]["phases"][phase])
+            for metric, (old_s, new_s) in metrics.items():
+                if not old_s or old_s["p50"] <= 0.0:
+                    continue
+                if new_s["p50"] > old_s["p50"] * (1.0 + threshold):
+                    regressions.append(
+                        (name, mode, metric, old_s["p50"], new_s["p50"]))
+    return regressions
+
+
+def printReport(report: dict):
+    print(f"{'command':<12} {'mode':<5} {'p50 s':>8} {'p95 s':>8}  "
+          + "  ".join(f"{p:>12}" for p in PHASES + ["other"]))
+    for name, res in report["commands"].items():
+        for mode in ["cold", "warm"]:
+            s = res[mode]
+            print(f"{name:<12} {mode:<5} {s['wall']['p50']:8.3f} "
+                  f"{s['wall']['p95']:8.3f}  "
+                  + "  ".join(f"{s['phases'][p]['p50']:12.3f}"
+                              for p in PHASES + ["other"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=10,
+                        help="cold runs per subcommand")
+    parser.add_argument("--warm-runs", type=int, default=30,
+                        help="warm runs per subcommand")
+    parser.add_argument("--only", default="",
+                        help="comma-separated subcommands, eg walletinfo,release")
+    parser.add_argument("--out", default="bench_cli.json",
+                        help="where to write the JSON report")
+    parser.add_argument("--no-ganache", action="store_true",
+                        help=f"use a chain already on port {GANACHE_PORT}")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="ms added per RPC request, via util/rpcproxy.py")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="plus up to this many ms, at random")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="requests/s over which the proxy answers 429")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of requests the proxy answers 429")
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="fraction of connections the proxy drops")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="compare two reports instead of benchmarking")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown fraction counted as regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        regressions = compareReports(old, new, args.threshold)
+        for name, mode, metric, old_p50, new_p50 in regressions:
+            print(f"REGRESSION {name} {mode} {metric}: "
+                  f"p50 {old_p50:.3f}s -> {new_p50:.3f}s")
+        if not regressions:
+            print("No regressions.")
+        sys.exit(1 if regressions else 0)
+
+    commands = list(commandArgs("", "").keys())
+    if args.only:
+        commands = args.only.split(",")
+
+    faults = {"latency_ms": args.latency, "jitter_ms": args.jitter,
+              "rate_limit": args.rate_limit, "error_rate": args.error_rate,
+              "drop_rate": args.drop_rate}
+    proxy = None
+    if any(faults.values()):  # ganache moves over; the proxy takes its port
+        if args.no_ganache:
+            sys.exit("Proxy options need the ganache that we launch")
+        ganache = launchGanache(GANACHE_PORT + 1)
+        proxy = RpcProxy(f"http://127.0.0.1:{GANACHE_PORT + 1}", GANACHE_PORT,
+                         seed=0, **faults).start()
+    else:
+        ganache = None if args.no_ganache else launchGanache(GANACHE_PORT)
+    try:
+        results = runBenchmark(commands, args.runs, args.warm_runs)
+    finally:
+        if proxy is not None:
+            proxy.stop()
+        if ganache is not None:
+            ganache.terminate()
+
+    report = {
+        "meta": {
+            "commit": gitCommit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "runs": args.runs,
+            "warm_runs": args.warm_runs,
+            "proxy": faults if proxy is not None else None,
+            "proxy_stats": proxy.stats if proxy is not None else None,
+        },
+        "commands": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    printReport(report)
+    print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""Construction time & memory of wallet handles vs brownie Contracts.
+
+For each size N (10k and 100k wallets by default), builds N objects for N
+distinct addresses, and reports:
+  build_s    -- wall time to construct them all
+  encode_s   -- wall time to encode a released(token) call on each
+  python_mb  -- Python memory held by the N objects (tracemalloc)
+  rss_mb     -- growth of resident memory while building them (Linux)
+
+'handle' is util/handles.Handle. 'contract' is a brownie ProjectContract,
+built as `Container.at()` builds it but without its eth_getCode round trip,
+so only object costs are compared. Contracts are slow to build, so sizes
+above --contract-max are skipped for them.
+
+  python bench/bench_handles.py --out handles.json
+"""
+import argparse
+import gc
+import json
+import os
+from pathlib import Path
+import platform
+import sys
+import time
+import tracemalloc
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from eth_utils import to_checksum_address  # pylint: disable=wrong-import-position
+
+from util import handles  # pylint: disable=wrong-import-position
+
+CONTRACT = "VestingWalletLinear"
+TOKEN = "0x000000000000000000000000000000000000dEaD"
+
+
+def addresses(n: int) -> list:
+    return [to_checksum_address(f"0x{i + 1:040x}") for i in range(n)]
+
+
+def rssBytes():
+    """Current resident memory, or None where /proc isn't there"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+# ========================================================================
+# builders: (build addresses -> objects, encode object -> calldata)
+def handleBuilder(project):
+    ctype = handles.contractType(project, CONTRACT)
+    return (lambda addrs: handles.handles(ctype, addrs),
+            lambda h: h.request("released(address)", TOKEN))
+
+
+def contractBuilder(project):
+    from brownie.network.contract import ProjectContract
+    container = getattr(project, CONTRACT)
+    build = container._build  # pylint: disable=protected-access
+    return (lambda addrs: [ProjectContract(project, build, a) for a in addrs],
+            lambda c: c.released["address"].encode_input(TOKEN))
+
+
+def measure(builder, n: int) -> dict:
+    build, encode = builder
+    addrs = addresses(n)
+
+    gc.collect()
+    t0 = time.perf_counter()
+    objs = build(addrs)
+    build_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for obj in objs:
+        encode(obj)
+    encode_s = time.perf_counter() - t0
+    del objs
+
+    # memory in a separate pass: tracing slows construction down
+    gc.collect()
+    rss0 = rssBytes()
+    tracemalloc.start()
+    objs = build(addrs)
+    python_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    rss1 = rssBytes()
+    del objs
+    gc.collect()
+
+    return {"n": n, "build_s": build_s, "encode_s": encode_s,
+            "python_mb": python_bytes / 2**20,
+            "rss_mb": None if rss0 is None else (rss1 - rss0) / 2**20}
+
+
+def runBenchmark(sizes: list, contract_max: int) -> dict:
+    import brownie  # pylint: disable=import-outside-toplevel
+    project = brownie.project.load(str(REPO), name="BenchHandlesProject")
+    builders = {"handle": handleBuilder(project),
+                "contract": contractBuilder(project)}
+    results = {name: [] for name in builders}
+    for n in sizes:
+        for name, builder in builders.items():
+            if name == "contract" and n > contract_max:
+                continue
+            print(f"{name}: n={n}", file=sys.stderr)
+            results[name].append(measure(builder, n))
+    return results
+
+
+def printTable(results: dict):
+    print(f"{'kind':<9}{'n':>8}{'build_s':>10}{'encode_s':>10}"
+          f"{'python_mb':>11}{'rss_mb':>9}{'B/obj':>8}")
+    for name, rows in results.items():
+        for r in rows:
+            rss = "-" if r["rss_mb"] is None else f"{r['rss_mb']:.1f}"
+            per_obj = r["python_mb"] * 2**20 / r["n"]
+            print(f"{name:<9}{r['n']:>8}{r['build_s']:>10.3f}"
+                  f"{r['encode_s']:>10.3f}{r['python_mb']:>11.1f}{rss:>9}"
+                  f"{per_obj:>8.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", default="10000,100000",
+                        help="comma-separated numbers of wallets")
+    parser.add_argument("--contract-max", type=int, default=10000,
+                        help="largest N to build brownie Contracts for")
+    parser.add_argument("--out", help="write JSON report here")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.sizes.split(",")]
+    results = runBenchmark(sizes, args.contract_max)
+    printTable(results)
+    if args.out:
+        report = {"python": platform.python_version(), "results": results}
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""Throughput of bulk plan apply vs the number of keys in a signer pool.
+
+On a local chain (brownie's 'development' network: ganache), deploys and
+funds --wallets wallets with util/plan.applyActions, once per pool size.
+Each pool is made of fresh keys, topped up with gas from accounts[0],
+which also holds the tokens. Reports wallets per second and the speedup
+over a pool of one key.
+
+  python bench/bench_signers.py --keys 1,2,4,8 --wallets 200
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+import sys
+import time
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from util import plan, signers  # pylint: disable=wrong-import-position
+from util.base18 import toBase18  # pylint: disable=wrong-import-position
+
+
+def applyOnce(project, web3, funder, token, n_keys: int, n_wallets: int,
+              start: int) -> dict:
+    import brownie  # pylint: disable=import-outside-toplevel
+    keys = [brownie.network.accounts.add() for _ in range(n_keys)]
+    pool = signers.SignerPool(web3, keys, treasury=funder)
+    pool.topUp(target_balance=toBase18(10.0))
+    the_plan = {"network": "development", "token": token.address,
+                "wallets": [{"name": f"bench-{n_keys}-{i}", "type": "lin",
+                             "beneficiary": funder.address, "start": start,
+                             "duration": 1000, "allocation_wei": 1}
+                            for i in range(n_wallets)]}
+    actions = plan.diffPlan(the_plan, {}, pool.addresses, start)
+    t0 = time.perf_counter()
+    results = plan.applyActions(project, funder, the_plan, actions, pool=pool)
+    wall = time.perf_counter() - t0
+    failed = sum(r["status"] != 1 for r in results)
+    return {"keys": n_keys, "wallets": n_wallets, "txs": len(results),
+            "failed": failed, "wall_s": wall, "wallets_per_s": n_wallets / wall}
+
+
+def runBenchmark(key_counts: list, n_wallets: int) -> list:
+    import brownie  # pylint: disable=import-outside-toplevel
+    os.chdir(REPO)
+    project = brownie.project.load(str(REPO), name="BenchSignersProject")
+    brownie.network.connect("development")
+    web3 = brownie.network.web3
+    funder = brownie.network.accounts[0]
+    token = project.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(1e6), {"from": funder})
+    start = brownie.network.chain.time() + 1000
+    rows = []
+    for n_keys in key_counts:
+        print(f"keys={n_keys}", file=sys.stderr)
+        rows.append(applyOnce(project, web3, funder, token, n_keys,
+                              n_wallets, start))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--keys", default="1,2,4,8",
+                        help="comma-separated pool sizes")
+    parser.add_argument("--wallets", type=int, default=200)
+    parser.add_argument("--out", help="write JSON report here")
+    args = parser.parse_args()
+
+    rows = runBenchmark([int(k) for k in args.keys.split(",")], args.wallets)
+    base = rows[0]["wallets_per_s"]
+    print(f"{'keys':>5}{'txs':>7}{'failed':>8}{'wall_s':>9}{'wallets/s':>11}"
+          f"{'speedup':>9}")
+    for r in rows:
+        print(f"{r['keys']:>5}{r['txs']:>7}{r['failed']:>8}{r['wall_s']:>9.2f}"
+              f"{r['wallets_per_s']:>11.1f}{r['wallets_per_s'] / base:>9.2f}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(rows, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
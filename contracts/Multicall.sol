@@ -0,0 +1,34 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+/**
+ * @title Multicall
+ * @dev Aggregates many view calls into one. Each call is a staticcall, and a
+ * call that reverts doesn't revert the batch: its `success` is false instead.
+ * Lets off-chain tools evaluate thousands of reads in one eth_call.
+ */
+contract Multicall {
+    struct Call {
+        address target;
+        bytes callData;
+    }
+
+    struct Result {
+        bool success;
+        bytes returnData;
+    }
+
+    function tryAggregate(Call[] calldata calls)
+        external
+        view
+        returns (Result[] memory results)
+    {
+        results = new Result[](calls.length);
+        for (uint256 i = 0; i < calls.length; i++) {
+            (bool success, bytes memory returnData) = calls[i].target.staticcall(
+                calls[i].callData
+            );
+            results[i] = Result(success, returnData);
+        }
+    }
+}
@@ -0,0 +1,98 @@
+// SPDX-License-Identifier: (Apache-2.0 AND MIT)
+pragma solidity ^0.8.0;
+
+import { IERC20 } from "OpenZeppelin/openzeppelin-contracts@4.7.0/contracts/token/ERC20/IERC20.sol";
+
+interface IReleasableWallet {
+    function release(address token) external;
+
+    function released(address token) external view returns (uint256);
+}
+
+interface ISplitter {
+    function release(IERC20 token) external;
+
+    function getPayees() external view returns (address[] memory);
+
+    // Splitter stores payouts as [payee][token], and its getter reads
+    // [2nd arg][1st arg]: so it's called as released(token, payee)
+    function released(address token, address payee) external view returns (uint256);
+}
+
+/**
+ * @title ReleaseRouter
+ * @dev Releases `token` from many vesting wallets, then distributes a
+ * Splitter's balance of it to its payees, in one transaction. Wallet and
+ * Splitter releases are permissionless, so anyone can call this; funds only
+ * ever move to the beneficiaries and payees the wallets and Splitter name.
+ *
+ * A wallet whose release reverts is skipped, with a WalletReleaseFailed
+ * event, so one bad wallet doesn't block the rest of the payout.
+ */
+contract ReleaseRouter {
+    event WalletReleaseFailed(address indexed wallet, address indexed token);
+    event Payout(
+        address indexed token,
+        address indexed splitter,
+        uint256 releasedTotal,
+        uint256 paidTotal
+    );
+
+    /**
+     * @dev Release `token` from each of `wallets`, then, unless `splitter` is
+     * the zero address, release the Splitter's balance of `token`.
+     * @return walletAmounts Amount released by each wallet
+     * @return payees The Splitter's payees
+     * @return payeeAmounts Amount paid to each payee
+     */
+    function releaseAndSplit(
+        address[] calldata wallets,
+        address token,
+        address splitter
+    )
+        external
+        returns (
+            uint256[] memory walletAmounts,
+            address[] memory payees,
+            uint256[] memory payeeAmounts
+        )
+    {
+        walletAmounts = new uint256[](wallets.length);
+        uint256 releasedTotal = 0;
+        for (uint256 i = 0; i < wallets.length; i++) {
+            walletAmounts[i] = _releaseWallet(wallets[i], token);
+            releasedTotal += walletAmounts[i];
+        }
+
+        uint256 paidTotal = 0;
+        if (splitter != address(0)) {
+            ISplitter s = ISplitter(splitter);
+            payees = s.getPayees();
+            payeeAmounts = new uint256[](payees.length);
+            for (uint256 i = 0; i < payees.length; i++) {
+                payeeAmounts[i] = s.released(token, payees[i]);
+            }
+            s.release(IERC20(token));
+            for (uint256 i = 0; i < payees.length; i++) {
+                payeeAmounts[i] = s.released(token, payees[i]) - payeeAmounts[i];
+                paidTotal += payeeAmounts[i];
+            }
+        }
+        emit Payout(token, splitter, releasedTotal, paidTotal);
+    }
+
+    /**
+     * @dev Release `token` from `wallet`. Returns the amount released, or 0
+     * if a call to the wallet reverted.
+     */
+    function _releaseWallet(address wallet, address token) private returns (uint256) {
+        IReleasableWallet w = IReleasableWallet(wallet);
+        try w.released(token) returns (uint256 before) {
+            try w.release(token) {
+                return w.released(token) - before;
+            } catch {}
+        } catch {}
+        emit WalletReleaseFailed(wallet, token);
+        return 0;
+    }
+}
@@ -0,0 +1,138 @@
+// SPDX-License-Identifier: (Apache-2.0 AND MIT)
+pragma solidity ^0.8.0;
+
+import { SafeERC20, IERC20 } from "OpenZeppelin/openzeppelin-contracts@4.7.0/contracts/token/ERC20/utils/SafeERC20.sol";
+import { Ownable } from "OpenZeppelin/openzeppelin-contracts@4.7.0/contracts/access/Ownable.sol";
+import { MerkleProof } from "OpenZeppelin/openzeppelin-contracts@4.7.0/contracts/utils/cryptography/MerkleProof.sol";
+
+/**
+ * @title VestingVault
+ * @dev One pool of `token` that vests to many beneficiaries. Grants aren't
+ * stored on-chain: the vault only holds the Merkle root of all grants. A
+ * beneficiary's grant is proven when claiming. So onboarding any number of
+ * grantees costs one deploy plus one funding transfer.
+ *
+ * Schedules follow the same math as VestingWalletCliff (type 0),
+ * VestingWalletLinear (type 1) and VestingWalletHalving (type 2), applied
+ * to the grant's allocation.
+ *
+ * Leaves are keccak256(keccak256(abi.encode(grant))), with pairs hashed in
+ * sorted order, as OpenZeppelin's MerkleProof expects. See util/merkle.py.
+ *
+ * Amounts released are kept per grant index, not per leaf. A grant must
+ * keep its index across roots: then changing its allocation, schedule or
+ * beneficiary doesn't let what was already claimed be claimed again.
+ */
+contract VestingVault is Ownable {
+    using SafeERC20 for IERC20;
+
+    struct Grant {
+        uint256 index;
+        address beneficiary;
+        uint8 scheduleType;
+        uint64 start;
+        uint256 duration;
+        uint256 halfLife;
+        uint256 allocation;
+    }
+
+    event MerkleRootSet(bytes32 root);
+    event Claimed(uint256 indexed index, address indexed beneficiary, uint256 amount);
+
+    IERC20 public immutable token;
+    bytes32 public merkleRoot;
+    uint256 public totalReleased;
+
+    // grant index => amount released for that grant
+    mapping(uint256 => uint256) public released;
+
+    constructor(IERC20 token_, bytes32 root) {
+        token = token_;
+        merkleRoot = root;
+        emit MerkleRootSet(root);
+    }
+
+    /**
+     * @dev Publish a new set of grants. Amounts released so far stay with
+     * their grant indices, so grants carry over, changed or not.
+     */
+    function setMerkleRoot(bytes32 root) external onlyOwner {
+        merkleRoot = root;
+        emit MerkleRootSet(root);
+    }
+
+    function leafHash(Grant calldata grant) public pure returns (bytes32) {
+        return keccak256(bytes.concat(keccak256(abi.encode(grant))));
+    }
+
+    /**
+     * @dev Amount of a grant vested at `timestamp`
+     */
+    function vestedAmount(Grant calldata grant, uint64 timestamp)
+        public
+        pure
+        returns (uint256)
+    {
+        uint256 allocation = grant.allocation;
+        uint256 start = grant.start;
+        if (grant.scheduleType == 0) {
+            return timestamp > start + grant.duration ? allocation : 0;
+        }
+        if (timestamp < start) {
+            return 0;
+        } else if (timestamp > start + grant.duration) {
+            return allocation;
+        } else if (grant.scheduleType == 1) {
+            return (allocation * (timestamp - start)) / grant.duration;
+        } else if (grant.scheduleType == 2) {
+            return getAmount(allocation, timestamp - start, grant.halfLife);
+        }
+        revert("VestingVault: unknown schedule type");
+    }
+
+    /**
+     * @dev Amount of a grant that can be claimed now. Reverts on a bad proof.
+     */
+    function releasable(Grant calldata grant, bytes32[] calldata proof)
+        public
+        view
+        returns (uint256)
+    {
+        require(
+            MerkleProof.verifyCalldata(proof, merkleRoot, leafHash(grant)),
+            "VestingVault: invalid proof"
+        );
+        uint256 vested = vestedAmount(grant, uint64(block.timestamp));
+        uint256 done = released[grant.index];
+        return vested > done ? vested - done : 0;
+    }
+
+    /**
+     * @dev Send a grant's releasable amount to its beneficiary. Anyone can
+     * call this: funds only go to the beneficiary.
+     */
+    function claim(Grant calldata grant, bytes32[] calldata proof)
+        external
+        returns (uint256 amount)
+    {
+        amount = releasable(grant, proof);
+        released[grant.index] += amount;
+        totalReleased += amount;
+        emit Claimed(grant.index, grant.beneficiary, amount);
+        token.safeTransfer(grant.beneficiary, amount);
+    }
+
+    /**
+     * @dev Approximation of half life formula (1-(0.5^(t/h)))*value.
+     * Same as VestingWalletHalving.getAmount.
+     */
+    function getAmount(
+        uint256 value,
+        uint256 t,
+        uint256 h
+    ) public pure returns (uint256) {
+        uint256 p = value >> (t / h);
+        t %= h;
+        return value - p + (p * t) / h / 2;
+    }
+}
@@ -0,0 +1,85 @@
+// SPDX-License-Identifier: (Apache-2.0 AND MIT)
+pragma solidity ^0.8.0;
+
+import { SafeERC20, IERC20 } from "OpenZeppelin/openzeppelin-contracts@4.7.0/contracts/token/ERC20/utils/SafeERC20.sol";
+import { Ownable } from "OpenZeppelin/openzeppelin-contracts@4.7.0/contracts/access/Ownable.sol";
+
+interface IAdministeredWallet {
+    function changeBeneficiary(address beneficiary) external;
+
+    function renounceVesting(address token) external;
+
+    function transferOwnership(address newOwner) external;
+}
+
+/**
+ * @title WalletAdmin
+ * @dev Owns a cohort of vesting wallets, so that their owner-only functions
+ * can be called on many wallets in one transaction. Only this contract's
+ * owner can use it.
+ *
+ * A wallet whose call reverts (eg it isn't owned by this contract) is
+ * skipped, with an AdminCallFailed event, and the rest go through.
+ */
+contract WalletAdmin is Ownable {
+    using SafeERC20 for IERC20;
+
+    event AdminCallFailed(address indexed wallet, bytes4 indexed selector);
+
+    /**
+     * @dev Set the beneficiary of each of `wallets` to the matching entry of
+     * `beneficiaries`.
+     */
+    function changeBeneficiaries(
+        address[] calldata wallets,
+        address[] calldata beneficiaries
+    ) external onlyOwner {
+        require(
+            wallets.length == beneficiaries.length,
+            "WalletAdmin: wallets and beneficiaries length mismatch"
+        );
+        for (uint256 i = 0; i < wallets.length; i++) {
+            try IAdministeredWallet(wallets[i]).changeBeneficiary(beneficiaries[i]) {
+            } catch {
+                emit AdminCallFailed(wallets[i], IAdministeredWallet.changeBeneficiary.selector);
+            }
+        }
+    }
+
+    /**
+     * @dev Renounce vesting of `token` in each of `wallets`. The wallets send
+     * their balances here; they're all forwarded to `recipient`.
+     * @return total Amount forwarded
+     */
+    function renounceVesting(
+        address[] calldata wallets,
+        address token,
+        address recipient
+    ) external onlyOwner returns (uint256 total) {
+        require(recipient != address(0), "WalletAdmin: recipient is zero address");
+        uint256 before = IERC20(token).balanceOf(address(this));
+        for (uint256 i = 0; i < wallets.length; i++) {
+            try IAdministeredWallet(wallets[i]).renounceVesting(token) {
+            } catch {
+                emit AdminCallFailed(wallets[i], IAdministeredWallet.renounceVesting.selector);
+            }
+        }
+        total = IERC20(token).balanceOf(address(this)) - before;
+        IERC20(token).safeTransfer(recipient, total);
+    }
+
+    /**
+     * @dev Hand `wallets` over to `newOwner`, eg to leave the cohort.
+     */
+    function transferWalletOwnership(address[] calldata wallets, address newOwner)
+        external
+        onlyOwner
+    {
+        for (uint256 i = 0; i < wallets.length; i++) {
+            try IAdministeredWallet(wallets[i]).transferOwnership(newOwner) {
+            } catch {
+                emit AdminCallFailed(wallets[i], IAdministeredWallet.transferOwnership.selector);
+            }
+        }
+    }
+}
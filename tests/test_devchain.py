@@ -0,0 +1,36 @@
+import brownie
+import pytest
+
+from util import devchain
+
+web3 = brownie.network.web3
+
+
+def test_mine_blocks():
+    before = devchain.head(web3)["number"]
+    devchain.mineBlocks(web3, 5)
+    assert devchain.head(web3)["number"] == before + 5
+
+
+def test_jump_to_block():
+    target = devchain.head(web3)["number"] + 12
+    assert devchain.jumpToBlock(web3, target)["number"] == target
+
+    with pytest.raises(devchain.DevChainError):
+        devchain.jumpToBlock(web3, target - 1)
+
+
+def test_jump_to_timestamp():
+    target = devchain.head(web3)["timestamp"] + 1000
+    assert devchain.jumpToTimestamp(web3, target)["timestamp"] == target
+
+    with pytest.raises(devchain.DevChainError):
+        devchain.jumpToTimestamp(web3, target - 1)
+
+
+def test_schedule():
+    before = devchain.head(web3)["number"]
+    timing = devchain.runSchedule(web3, step_seconds=0, n_steps=3,
+                                  blocks_per_step=2)
+    assert timing["steps"] == 3
+    assert devchain.head(web3)["number"] == before + 6
@@ -0,0 +1,68 @@
+import brownie
+import numpy as np
+
+from util import devchain, export
+from util.base18 import toBase18
+from util.constants import BROWNIE_PROJECT
+
+accounts = brownie.network.accounts
+account0, account1 = accounts[0], accounts[1]
+chain = brownie.network.chain
+web3 = brownie.network.web3
+
+
+def test_limbs_roundtrip():
+    values = [0, 1, 2**64, 2**256 - 1, 12345 * 10**18]
+    limbs = export.toLimbs(values)
+    assert limbs.shape == (5, 4)
+    assert export.fromLimbs(limbs) == values
+
+
+def test_table_writer_chunks(tmp_path):
+    schema = {"wallet": export.ADDRESS, "start": "<u8",
+              "amount": export.AMOUNT}
+    writer = export.TableWriter(str(tmp_path), "t", schema)
+    rows = [{"wallet": account0.address, "start": i, "amount": 2**200 + i}
+            for i in range(7)]
+    writer.append(rows[:3])
+    writer.append(rows[3:])
+    export.writeManifest(str(tmp_path), {"t": writer.close()}, {})
+
+    table = export.loadTable(str(tmp_path), "t")
+    assert isinstance(table["start"], np.memmap)
+    assert list(table["start"]) == list(range(7))
+    assert table["wallet"][0].decode() == account0.address
+    assert export.fromLimbs(table["amount_wei"]) == [r["amount"] for r in rows]
+    assert table["amount"][0] == 2**200 / 1e18
+
+
+def test_wallet_and_event_rows():
+    token = BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(100.0), {"from": account0}
+    )
+    wallet = BROWNIE_PROJECT.VestingWalletLinear.deploy(
+        account1.address, chain.time(), 1000, {"from": account0}
+    )
+    token.transfer(wallet.address, toBase18(100.0), {"from": account0})
+    chain.sleep(500)
+    chain.mine()
+    tx = wallet.release(token.address, {"from": account1})
+    block = devchain.head(web3)
+
+    chunks = list(export.walletRows(
+        web3, [(wallet.address, "lin")], [token.address], block, 5))
+    wallet_rows, schedule_rows = chunks[0]
+    row = wallet_rows[0]
+    assert row["beneficiary"] == account1.address
+    assert row["released"] == wallet.released(token.address)
+    assert row["balance"] + row["released"] == toBase18(100.0)
+    assert [r["vested"] for r in schedule_rows][0] == 0
+    assert [r["vested"] for r in schedule_rows][-1] == toBase18(100.0)
+
+    logs = [log for chunk in export.eventRows(
+        web3, export.RELEASED_EVENT, [wallet.address], 0, block["number"])
+        for log in chunk]
+    assert len(logs) == 1
+    assert logs[0]["amount"] == tx.events["ERC20Released"]["amount"]
+    assert logs[0]["topic2"] == token.address
+
@@ -0,0 +1,64 @@
+import os
+import random
+
+import brownie
+
+from util import fuzz, vesting
+from util.constants import BROWNIE_PROJECT
+
+accounts = brownie.network.accounts
+account0, account1 = accounts[0], accounts[1]
+chain = brownie.network.chain
+
+# raise these for a longer run, eg FUZZ_CASES=100000
+SEED = int(os.getenv("FUZZ_SEED", random.randrange(2**32)))
+N_CASES = int(os.getenv("FUZZ_CASES", "2000"))
+N_WALLETS = int(os.getenv("FUZZ_WALLETS", "6"))  # per wallet type
+N_TIMESTAMPS = 64  # per wallet
+
+
+def test_get_amount_matches_model():
+    rng = random.Random(SEED)
+    multicall = BROWNIE_PROJECT.Multicall.deploy({"from": account0})
+    halving = BROWNIE_PROJECT.VestingWalletHalving.deploy(
+        account1.address, chain.time() + 60, 1, 1, {"from": account0}
+    )
+    cases = fuzz.getAmountCases(rng, N_CASES)
+    expected = [fuzz.model(vesting.getAmount, *case) for case in cases]
+    actual = fuzz.evaluate(multicall, [
+        (halving.address, "getAmount(uint256,uint256,uint256)", list(case))
+        for case in cases])
+    bad = fuzz.mismatches(cases, expected, actual)
+    assert not bad, f"FUZZ_SEED={SEED}: {len(bad)} mismatches, eg {bad[:3]}"
+
+
+def test_vested_amount_matches_model():
+    rng = random.Random(SEED)
+    multicall = BROWNIE_PROJECT.Multicall.deploy({"from": account0})
+    token = BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, vesting.UINT256_MAX, {"from": account0}
+    )
+    now = chain.time()
+    cases, calls = [], []
+    for wallet_type, contract_name in vesting.WALLET_CONTRACTS.items():
+        container = getattr(BROWNIE_PROJECT, contract_name)
+        for _ in range(N_WALLETS):
+            p = fuzz.walletParams(rng, wallet_type, now)
+            if wallet_type == "exp":
+                args = [p["start"], p["half_life"], p["duration"]]
+            else:
+                args = [p["start"], p["duration"]]
+            wallet = container.deploy(account1.address, *args,
+                                      {"from": account0})
+            allocation = fuzz.edgeInt(rng, 250)
+            token.transfer(wallet.address, allocation, {"from": account0})
+            for t in fuzz.timestamps(rng, p, N_TIMESTAMPS):
+                cases.append((wallet_type, allocation, t, p["start"],
+                              p["duration"], p["half_life"]))
+                calls.append((wallet.address, "vestedAmount(address,uint64)",
+                              [token.address, t]))
+
+    expected = [fuzz.model(vesting.vestedAmount, *case) for case in cases]
+    actual = fuzz.evaluate(multicall, calls)
+    bad = fuzz.mismatches(cases, expected, actual)
+    assert not bad, f"FUZZ_SEED={SEED}: {len(bad)} mismatches, eg {bad[:3]}"
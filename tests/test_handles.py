@@ -0,0 +1,71 @@
+import brownie
+import pytest
+
+from util import handles, rpcbatch
+from util.base18 import toBase18
+from util.constants import BROWNIE_PROJECT
+
+accounts = brownie.network.accounts
+account0, account1 = accounts[0], accounts[1]
+chain = brownie.network.chain
+web3 = brownie.network.web3
+
+
+def test_reads_match_contract():
+    token = BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(100.0), {"from": account0}
+    )
+    wallet = BROWNIE_PROJECT.VestingWalletLinear.deploy(
+        account1, chain.time(), 100, {"from": account0}
+    )
+    token.transfer(wallet, toBase18(10.0), {"from": account0})
+    chain.sleep(50)
+    chain.mine()
+    wallet.release(token, {"from": account1})
+
+    ctype = handles.contractType(BROWNIE_PROJECT, "VestingWalletLinear")
+    handle = handles.Handle(wallet.address, ctype)
+    assert handle.call(web3, "beneficiary") == wallet.beneficiary()
+    assert handle.call(web3, "duration") == 100
+    assert handle.call(web3, "released(address)", token) == \
+        wallet.released(token)
+    block = chain[-2].number  # before the release
+    assert handle.call(web3, "released(address)", token, block=block) == 0
+
+    # the same call, batched
+    calls = [h.request("released(address)", token.address)
+             for h in handles.handles(ctype, [wallet.address] * 3)]
+    results = rpcbatch.results(rpcbatch.batchRequest(web3, calls))
+    released = ctype.function("released(address)")
+    assert [released.decode(r) for r in results] == [wallet.released(token)] * 3
+
+
+def test_shared_type_and_overloads():
+    ctype = handles.contractType(BROWNIE_PROJECT, "VestingWalletLinear")
+    assert handles.contractType(BROWNIE_PROJECT, "VestingWalletLinear") is ctype
+    a, b = handles.handles(ctype, [account0.address, account1.address])
+    assert a.ctype is b.ctype
+    assert not hasattr(a, "__dict__")
+
+    # released() and released(address) are overloads: need the signature
+    with pytest.raises(AttributeError):
+        a.request("released")
+    assert ctype.function("released()").selector == "0x96132521"
+
+
+def test_types_are_per_project():
+    def project(output):
+        entry = {"type": "function", "name": "f", "inputs": [],
+                 "outputs": [{"type": output}]}
+        return type("Project", (), {"C": type("C", (), {"abi": [entry]})})()
+    a, b = project("uint256"), project("address")
+    assert handles.contractType(a, "C").function("f").output_types == \
+        ["uint256"]
+    assert handles.contractType(b, "C").function("f").output_types == \
+        ["address"]
+
+
+def test_encode_takes_objects_with_address():
+    ctype = handles.contractType(BROWNIE_PROJECT, "VestingWalletLinear")
+    released = ctype.function("released(address)")
+    assert released.encode([account0]) == released.encode([account0.address])
@@ -0,0 +1,140 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import threading
+import types
+
+import brownie
+import pytest
+
+from util import history, rpcbatch, rpccache
+from util.base18 import toBase18
+from util.constants import BROWNIE_PROJECT
+
+accounts = brownie.network.accounts
+account0, account1 = accounts[0], accounts[1]
+chain = brownie.network.chain
+web3 = brownie.network.web3
+
+
+def test_point_blocks():
+    assert history.pointBlocks(10, 20, 5) == [10, 15, 20]
+    assert history.pointBlocks(10, 21, 5) == [10, 15, 20, 21]
+
+
+def test_uint():
+    assert history._uint("0x" + "00" * 31 + "2a") == 42
+    assert history._uint("0x") == 0  # call before the wallet was deployed
+    assert history._uint(b"") == 0
+
+
+def test_is_missing_state():
+    assert history.isMissingState(
+        {"code": -32000, "message": "missing trie node 3d1f.. (path )"})
+    assert history.isMissingState({"message": "header not found"})
+    assert not history.isMissingState({"code": 429, "message": "Too Many "
+                                       "Requests"})
+    assert not history.isMissingState({"message": "request timed out"})
+
+
+def test_wallet_history(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        rpccache, "_cache", rpccache.RpcCache(str(tmp_path / "c.sqlite")))
+    token = BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(100.0), {"from": account0}
+    )
+    wallet = BROWNIE_PROJECT.VestingWalletLinear.deploy(
+        account1.address, chain.time(), 1000, {"from": account0}
+    )
+    token.transfer(wallet.address, toBase18(100.0), {"from": account0})
+    from_block = len(chain) - 1
+    for i in range(5):
+        chain.sleep(100)
+        chain.mine()
+        if i == 2:
+            wallet.release(token.address, {"from": account1})
+    to_block = len(chain) - 1
+
+    points = list(history.walletHistory(
+        web3, wallet.address, token.address, from_block, to_block, 2))
+    assert [p["block"] for p in points] == \
+        history.pointBlocks(from_block, to_block, 2)
+    for p in points:
+        assert p["source"] == "archive"
+        assert p["timestamp"] == web3.eth.get_block(p["block"])["timestamp"]
+        assert p["vested"] == wallet.vestedAmount(
+            token.address, p["timestamp"], block_identifier=p["block"])
+        assert p["released"] == wallet.released(
+            token.address, block_identifier=p["block"])
+    assert points[0]["released"] == 0
+    assert points[-1]["released"] > 0
+
+    # the events fallback sees the same release, scanning from the deploy
+    logs = history._releasedLogs(web3, wallet.address, token.address,
+                                 wallet.tx.block_number, to_block)
+    assert [amount for _, amount in logs] == [wallet.released(token.address)]
+
+    # second run is the same, and served from the cache where final
+    assert list(history.walletHistory(
+        web3, wallet.address, token.address, from_block, to_block, 2)) == points
+
+
+class _NoBatchHandler(BaseHTTPRequestHandler):
+    def do_POST(self):  # like nodes that don't take batches
+        self.send_response(405)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_batch_refused_falls_back_to_single_calls():
+    server = HTTPServer(("127.0.0.1", 0), _NoBatchHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    singles = []
+
+    def make_request(method, params):
+        singles.append(method)
+        return {"jsonrpc": "2.0", "id": 0, "result": "0x1"}
+    fake_web3 = types.SimpleNamespace(provider=types.SimpleNamespace(
+        endpoint_uri=f"http://127.0.0.1:{server.server_address[1]}",
+        make_request=make_request))
+    try:
+        responses = rpcbatch.batchRequest(
+            fake_web3, [("eth_blockNumber", []), ("eth_chainId", [])])
+    finally:
+        server.shutdown()
+    assert rpcbatch.results(responses) == ["0x1", "0x1"]
+    assert singles == ["eth_blockNumber", "eth_chainId"]
+
+
+class _CappedProvider:
+    """Refuses eth_getLogs over more than `cap` blocks; one log per block"""
+
+    def __init__(self, cap):
+        self.cap = cap
+
+    def make_request(self, method, params):
+        assert method == "eth_getLogs"
+        start = int(params[0]["fromBlock"], 16)
+        end = int(params[0]["toBlock"], 16)
+        if end - start + 1 > self.cap:
+            return {"error": {"code": -32005, "message": "range too large"}}
+        return {"result": [hex(b) for b in range(start, end + 1)]}
+
+
+def test_get_logs_splits_refused_ranges():
+    fake_web3 = types.SimpleNamespace(provider=_CappedProvider(3))
+    logs = rpcbatch.getLogs(fake_web3, {"address": []}, 0, 9)
+    assert logs == [hex(b) for b in range(10)]
+
+    fake_web3.provider.cap = 0
+    with pytest.raises(rpcbatch.RpcError):
+        rpcbatch.getLogs(fake_web3, {"address": []}, 0, 9)
+
+
+def test_unreadable_block_raises():
+    def make_request(method, params):
+        return {"jsonrpc": "2.0", "id": 0, "error": {"message": "timeout"}}
+    fake_web3 = types.SimpleNamespace(
+        provider=types.SimpleNamespace(make_request=make_request))
+    with pytest.raises(history.HistoryError, match="block 5"):
+        history._blockTimestamps(fake_web3, [5])
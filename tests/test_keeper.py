@@ -0,0 +1,172 @@
+import asyncio
+import types
+
+import brownie
+from pytest import approx
+
+from util.base18 import fromBase18, toBase18
+from util.constants import BROWNIE_PROJECT
+from util.keeper import DEFAULTS, Keeper
+
+accounts = brownie.network.accounts
+account0, account1 = accounts[0], accounts[1]
+chain = brownie.network.chain
+web3 = brownie.network.web3
+HALF_LIFE = 4 * 365 * 24 * 60 * 60
+
+
+def test_releases_when_worth_gas(tmp_path):
+    token, wallet = _deployFundedWallet()
+    keeper = _keeper(tmp_path, token, wallet, price=1.0)
+
+    # nothing vested yet
+    assert keeper.tick(web3.eth.get_block("latest")) == []
+
+    chain.sleep(HALF_LIFE)
+    chain.mine()
+    releases = keeper.tick(web3.eth.get_block("latest"))
+    assert len(releases) == 1
+    assert wallet.released(token) == releases[0]["amount"]
+    assert fromBase18(releases[0]["amount"]) == approx(500.0, 1e-3)
+
+    # a few seconds later, the releasable amount isn't worth the gas
+    chain.sleep(10)
+    chain.mine()
+    assert keeper.tick(web3.eth.get_block("latest")) == []
+
+
+def test_skips_when_not_worth_gas(tmp_path):
+    token, wallet = _deployFundedWallet()
+    keeper = _keeper(tmp_path, token, wallet, price=1e-12)
+
+    chain.sleep(HALF_LIFE)
+    chain.mine()
+    assert keeper.tick(web3.eth.get_block("latest")) == []
+    assert wallet.released(token) == 0
+
+
+def test_resumes_from_state(tmp_path):
+    token, wallet = _deployFundedWallet()
+    keeper = _keeper(tmp_path, token, wallet, price=1.0)
+    chain.sleep(HALF_LIFE)
+    chain.mine()
+    block = web3.eth.get_block("latest")
+    keeper.tick(block)
+
+    keeper2 = _keeper(tmp_path, token, wallet, price=1.0)
+    assert keeper2.state["last_block"] == block["number"]
+    assert keeper2.state["params"][wallet.address]["half_life"] == HALF_LIFE
+    key = f"{wallet.address}|{token.address}"
+    assert keeper2.state["positions"][key]["released"] == wallet.released(token)
+
+
+def test_sees_releases_by_others(tmp_path):
+    token, wallet = _deployFundedWallet()
+    keeper = _keeper(tmp_path, token, wallet, price=1.0)
+    assert keeper.tick(web3.eth.get_block("latest")) == []  # caches position
+
+    chain.sleep(HALF_LIFE)
+    chain.mine()
+    wallet.release(token, {"from": account1})  # not through the keeper
+    chain.sleep(10)
+    chain.mine()
+    releases = keeper.tick(web3.eth.get_block("latest"))  # stale: sends
+    assert fromBase18(releases[0]["amount"]) < 1.0
+    key = f"{wallet.address}|{token.address}"
+    assert keeper.state["positions"][key]["released"] == wallet.released(token)
+
+    chain.sleep(10)
+    chain.mine()
+    assert keeper.tick(web3.eth.get_block("latest")) == []
+
+
+def _deployFundedWallet():
+    token = BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(1000.0), {"from": account0}
+    )
+    wallet = BROWNIE_PROJECT.VestingWalletHalving.deploy(
+        account1.address, chain.time(), HALF_LIFE, HALF_LIFE * 5,
+        {"from": account0}
+    )
+    token.transfer(wallet.address, toBase18(1000.0), {"from": account0})
+    return token, wallet
+
+
+def _keeper(tmp_path, token, wallet, price):
+    config = dict(
+        DEFAULTS,
+        wallets=[{"address": wallet.address, "type": "exp",
+                  "tokens": [token.address]}],
+        token_prices={token.address.lower(): price},
+    )
+    state_path = str(tmp_path / "keeper.state")
+    return Keeper(BROWNIE_PROJECT, web3, account0, config, state_path)
+
+
+def test_splitter_gas_estimated_with_balance(tmp_path):
+    token, wallet = _deployFundedWallet()
+    payees = [f"0x{i + 1:040x}" for i in range(10)]
+    splitter = BROWNIE_PROJECT.Splitter.deploy(payees, [1] * 10,
+                                               {"from": account0})
+    keeper = _keeper(tmp_path, token, wallet, price=1.0)
+    keeper.config["splitters"] = [{"address": splitter.address,
+                                   "tokens": [token.address]}]
+    key = f"{splitter.address}|{token.address}"
+    gas_price = web3.eth.gas_price
+
+    assert keeper._releaseSplitters(gas_price) == []  # empty: no estimate
+    assert key not in keeper.state["gas"]
+    token.transfer(splitter, toBase18(10.0), {"from": account0})
+    releases = keeper._releaseSplitters(gas_price)
+    assert releases[0]["gas_used"] <= keeper.state["gas"][key]
+
+
+class _FlakyEth:
+    """web3.eth whose head block reads fail the first `n` times"""
+
+    def __init__(self, n: int):
+        self.n = n
+
+    def __getattr__(self, name):
+        return getattr(web3.eth, name)
+
+    @property
+    def block_number(self):
+        if self.n:
+            self.n -= 1
+            raise ConnectionError("flaky")
+        return web3.eth.block_number
+
+
+def test_run_survives_errors(tmp_path, capsys):
+    token, wallet = _deployFundedWallet()
+    keeper = _keeper(tmp_path, token, wallet, price=1.0)
+    keeper.config["poll_interval"] = 0.01
+    keeper.web3 = types.SimpleNamespace(eth=_FlakyEth(2))
+    tick, n_tick_failures = keeper.tick, [1]
+
+    def flakyTick(block):
+        if n_tick_failures[0]:
+            n_tick_failures[0] -= 1
+            raise ConnectionError("flaky")
+        return tick(block)
+    keeper.tick = flakyTick
+
+    chain.mine()
+    asyncio.run(asyncio.wait_for(keeper.run(max_blocks=1), timeout=30))
+    assert keeper.state["last_block"] == web3.eth.block_number
+    assert capsys.readouterr().err.count("will retry") == 3
+
+
+def test_refresh_with_coalesced_blocks(tmp_path):
+    token, wallet = _deployFundedWallet()
+    keeper = _keeper(tmp_path, token, wallet, price=1.0)
+    keeper.config["refresh_blocks"] = 10
+    keeper.state["gas"]["x"] = 1
+    block = dict(web3.eth.get_block("latest"))
+    for number in [11, 23, 29]:  # no multiple of 10: refresh at 11 & 23
+        block["number"] = number
+        keeper.state["gas"]["x"] = 1
+        keeper.tick(block)
+        assert ("x" in keeper.state["gas"]) == (number == 29)
+    assert keeper.state["last_refresh"] == 23
@@ -0,0 +1,57 @@
+import csv
+import json
+import os
+import stat
+
+from eth_account import Account
+import pytest
+
+from util import keygen
+
+
+def test_generate_keys_in_parallel():
+    keys = list(keygen.generateKeys(keygen.CHUNK_SIZE * 2 + 1, processes=2))
+    assert len(keys) == keygen.CHUNK_SIZE * 2 + 1
+    assert len({address for address, _, _ in keys}) == len(keys)
+    for address, private_key, keystore in keys[:10]:
+        assert Account.from_key(private_key).address == address
+        assert keystore is None
+
+
+def test_write_csv(tmp_path):
+    path = str(tmp_path / "keys.csv")
+    n = keygen.writeCsv(path, keygen.generateKeys(5))
+    assert n == 5
+    with open(path) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 5
+    assert Account.from_key(rows[0]["private_key"]).address == rows[0]["address"]
+
+
+def test_write_csv_over_readable_file(tmp_path):
+    path = tmp_path / "keys.csv"
+    path.write_text("old")
+    os.chmod(path, 0o644)
+    keygen.writeCsv(str(path), keygen.generateKeys(1))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_write_keystores(tmp_path):
+    keys = list(keygen.generateKeys(2, password="secret", processes=2))
+    n = keygen.writeKeystores(str(tmp_path), iter(keys))
+    assert n == 2
+    address, private_key, _ = keys[0]
+    with open(tmp_path / f"{address}.json") as f:
+        keystore = json.load(f)
+    assert "0x" + Account.decrypt(keystore, "secret").hex()[-64:] == private_key
+
+
+def test_empty_password_still_encrypts(tmp_path):
+    keys = list(keygen.generateKeys(1, password=""))
+    address, private_key, keystore = keys[0]
+    assert keystore is not None
+    assert "0x" + Account.decrypt(keystore, "").hex()[-64:] == private_key
+
+    with pytest.raises(ValueError):  # no keystore: would lose the key
+        keygen.writeKeystores(str(tmp_path), keygen.generateKeys(1))
+    assert os.listdir(tmp_path) == []
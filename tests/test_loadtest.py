@@ -0,0 +1,62 @@
+import brownie
+import pytest
+
+from util import loadtest, signers
+from util.constants import BROWNIE_PROJECT
+
+accounts = brownie.network.accounts
+web3 = brownie.network.web3
+
+
+def test_arrivals():
+    mix = {"transfer": 3, "release": 1, "new_lin": 0}
+    plan = loadtest.arrivals(10, 30, mix, seed=1)
+    assert plan == loadtest.arrivals(10, 30, mix, seed=1)
+    assert 200 < len(plan) < 400  # ~10/s for 30 s
+    assert all(0 < t < 30 for t, _ in plan)
+    assert [t for t, _ in plan] == sorted(t for t, _ in plan)
+    assert {kind for _, kind in plan} == {"transfer", "release"}
+
+
+def test_report():
+    def rec(kind, t, status, latency, error=None):
+        return {"kind": kind, "scheduled": t, "lag": 0.0, "status": status,
+                "latency": latency, "gas_used": 50_000 if status else None,
+                "error": error}
+    records = [rec("transfer", 1, 1, 0.5), rec("transfer", 2, 0, 0.5),
+               rec("release", 12, 1, 1.5),
+               rec("release", 13, None, None, "ValueError: boom")]
+    rep = loadtest.report(records, duration=20, interval=10)
+    assert (rep["started"], rep["ok"], rep["failed"]) == (4, 2, 2)
+    assert rep["ok_per_min"] == 6.0
+    assert rep["kinds"]["transfer"]["reverted"] == 1
+    assert rep["kinds"]["release"]["errors"] == 1
+    assert rep["kinds"]["release"]["gas"]["mean"] == 50_000
+    assert [(r["t"], r["ok"], r["failed"]) for r in rep["series"]] == \
+        [(0, 1, 1), (10, 1, 1)]
+    assert rep["errors"] == ["ValueError: boom"]
+
+
+def test_run():
+    scenario = dict(loadtest.DEFAULTS, splitter_payees=[2], initial_wallets=2)
+    pool = signers.SignerPool(web3, [accounts[1], accounts[2]])
+    test = loadtest.LoadTest.setUp(BROWNIE_PROJECT, web3, pool, accounts[0],
+                                   scenario)
+    plan = [(0.1 * i, kind) for i, kind in
+            enumerate(["new_lin", "transfer", "release", "splitter_release"])]
+    records = test.run(plan, workers=4)
+    assert [r["status"] for r in records] == [1] * 4, records
+    assert records[-1]["kind"] == "splitter_release[2 payees]"
+    assert len(test.wallets) == 3
+
+
+def test_failed_send_leaves_no_nonce_gap():
+    scenario = dict(loadtest.DEFAULTS, splitter_payees=[2], initial_wallets=1,
+                    tx_timeout=10)
+    pool = signers.SignerPool(web3, [accounts[3]])
+    test = loadtest.LoadTest.setUp(BROWNIE_PROJECT, web3, pool, accounts[0],
+                                   scenario)
+    with pytest.raises(KeyError):  # fails after its nonce was reserved
+        test.send("no_such_op")
+    records = test.run([(0.0, "transfer"), (0.1, "release")], workers=2)
+    assert [(r["status"], r["error"]) for r in records] == [(1, None)] * 2
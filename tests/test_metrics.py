@@ -0,0 +1,55 @@
+import urllib.request
+
+import brownie
+from eth_account import Account
+
+from util import metrics
+from util.base18 import toBase18
+from util.constants import BROWNIE_PROJECT
+
+accounts = brownie.network.accounts
+account0, account1 = accounts[0], accounts[1]
+web3 = brownie.network.web3
+
+
+def test_raw_tx_function():
+    metrics.setSelectorNames({"0xa9059cbb": "transfer"})
+    tx = {"to": account1.address, "value": 0, "gas": 100000, "nonce": 0,
+          "chainId": 1337, "data": "0xa9059cbb" + "00" * 64}
+    legacy = Account.sign_transaction(dict(tx, gasPrice=10**9), "0x" + "b3" * 32)
+    typed = Account.sign_transaction(
+        dict(tx, maxFeePerGas=10**9, maxPriorityFeePerGas=10**9),
+        "0x" + "b3" * 32)
+    for signed in [legacy, typed]:
+        raw = "0x" + bytes(signed.rawTransaction).hex()
+        assert metrics._txFunction("eth_sendRawTransaction", [raw]) == \
+            "transfer"
+
+
+def test_txs_and_exposition(monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", True)
+    web3.middleware_onion.inject(metrics.rpcMiddleware, "vw_metrics", layer=0)
+    try:
+        token = BROWNIE_PROJECT.Simpletoken.deploy(
+            "TOK", "Test Token", 18, toBase18(100.0), {"from": account0}
+        )
+        metrics.setSelectorNames(token.selectors)
+        token.transfer(account1, toBase18(1.0), {"from": account0})
+    finally:
+        web3.middleware_onion.remove("vw_metrics")
+
+    text = metrics.exposition()
+    assert 'vw_txs_total{function="deploy",status="confirmed"}' in text
+    assert 'vw_txs_total{function="transfer",status="sent"}' in text
+    assert 'vw_txs_total{function="transfer",status="confirmed"}' in text
+    assert 'vw_tx_gas_used_count{function="transfer"}' in text
+    assert 'vw_rpc_requests_total{method="eth_getTransactionReceipt",' \
+        'status="ok"}' in text
+
+    server = metrics.serve(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        body = urllib.request.urlopen(url).read().decode()
+    finally:
+        server.shutdown()
+    assert "# TYPE vw_tx_gas_used histogram" in body
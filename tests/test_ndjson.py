@@ -0,0 +1,76 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import brownie
+
+from util import ndjson
+from util.base18 import toBase18
+from util.constants import BROWNIE_PROJECT
+
+accounts = brownie.network.accounts
+account0, account1, account2 = accounts[0], accounts[1], accounts[2]
+chain = brownie.network.chain
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_emit_one_object_per_line():
+    stream = io.StringIO()
+    ndjson.emit({"a": 1, "b": "x y"}, stream)
+    ndjson.emit({"c": [1, 2], "amount": ndjson.amount(2**256 - 1)}, stream)
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == '{"a":1,"b":"x y"}'
+    assert json.loads(lines[1]) == {"c": [1, 2], "amount": str(2**256 - 1)}
+
+
+def test_read_lines_is_lazy():
+    consumed = []
+
+    def stream():
+        for line in ["0xa\n", "\n", "# comment\n", " 0xb \n", "0xc\n"]:
+            consumed.append(line)
+            yield line
+    lines = ndjson.readLines(stream())
+    assert consumed == []
+    assert next(lines) == "0xa" and len(consumed) == 1
+    assert next(lines) == "0xb" and len(consumed) == 4
+    assert list(lines) == ["0xc"]
+
+
+def _vwJson(*argv, stdin: str = None) -> list:
+    """Run `vw --json argv` against this chain. Returns its stdout records,
+    checking it holds nothing but one JSON object per line"""
+    proc = subprocess.run([sys.executable, "vw", "--json"] + list(argv),
+                          input=stdin, capture_output=True, text=True,
+                          cwd=REPO, check=True)
+    records = [json.loads(line) for line in proc.stdout.splitlines()]
+    assert all(isinstance(r, dict) for r in records)
+    return records
+
+
+def test_read_commands_print_ndjson():
+    token = BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(100.0), {"from": account0}
+    )
+    wallets = [BROWNIE_PROJECT.VestingWalletLinear.deploy(
+        account1.address, chain.time(), 1000, {"from": account0})
+        for _ in range(2)]
+    token.transfer(wallets[0], toBase18(10.0), {"from": account0})
+    stdin = "".join(w.address + "\n" for w in wallets)
+
+    records = _vwJson("walletinfo", "lin", "development", "-", token.address,
+                      stdin=stdin)
+    assert [r["address"] for r in records] == [w.address for w in wallets]
+    assert records[0]["beneficiary"] == account1.address
+    assert records[0]["tokens"][0]["symbol"] == "TOK"
+
+    records = _vwJson("acctinfo", "development", "-", token.address,
+                      stdin=f"{account0.address}\n{account2.address}\n")
+    assert [r["balance_wei"] for r in records] == \
+        [str(token.balanceOf(account0)), "0"]
+
+    records = _vwJson("chaininfo", "development")
+    assert len(records) == 1
+    assert records[0]["blocks"] >= len(chain) - 1
@@ -0,0 +1,58 @@
+from util import phases
+
+
+class _Node:
+    """make_request whose calls take `latency` seconds of a fake clock. The
+    receipt shows up on the `mined_at`th poll"""
+
+    def __init__(self, latency: float, mined_at: int):
+        self.now = 0.0
+        self.latency = latency
+        self.mined_at = mined_at
+        self.polls = 0
+
+    def clock(self) -> float:
+        return self.now
+
+    def __call__(self, method, params):
+        self.now += self.latency
+        if method == "eth_sendRawTransaction":
+            return {"result": "0xAB"}
+        if method == phases.RECEIPT_METHOD:
+            self.polls += 1
+            mined = self.polls >= self.mined_at
+            return {"result": {"status": "0x1"} if mined else None}
+        return {"result": "0x1"}
+
+
+def test_timing_middleware(monkeypatch):
+    node = _Node(latency=0.5, mined_at=3)
+    monkeypatch.setattr(phases.time, "perf_counter", node.clock)
+    phases.reset()
+    middleware = phases.timingMiddleware(node, None)
+
+    middleware("eth_call", [])
+    middleware("eth_sendRawTransaction", ["0x.."])
+    for _ in range(3):
+        node.now += 1.0  # sleep between polls
+        middleware(phases.RECEIPT_METHOD, ["0xab"])
+    middleware(phases.RECEIPT_METHOD, ["0xab"])  # after it's mined: rpc
+
+    # rpc: the call, the send and the last receipt; confirm: send -> receipt
+    assert phases.totals() == {"rpc": 1.5, "confirm": 5.0}
+    phases.reset()
+
+
+def test_nested_phases(monkeypatch):
+    monkeypatch.setattr(phases, "_listeners", [])
+    phases.reset()
+    ended = []
+    phases.addListener(lambda name, start, seconds: ended.append(name))
+    with phases.phase("outer"):
+        with phases.phase("inner"):
+            assert phases.current() == "inner"
+        assert phases.current() == "outer"
+    assert phases.current() == ""
+    assert ended == ["inner", "outer"]
+    assert set(phases.totals()) == {"inner", "outer"}
+    phases.reset()
@@ -0,0 +1,126 @@
+import brownie
+import pytest
+
+from util import plan
+from util.base18 import toBase18
+from util.constants import BROWNIE_PROJECT
+
+accounts = brownie.network.accounts
+account0, account1, account2 = accounts[0], accounts[1], accounts[2]
+chain = brownie.network.chain
+web3 = brownie.network.web3
+
+
+def _writePlan(tmp_path, token, wallets) -> str:
+    lines = ["network: development", f'token: "{token}"', "wallets:"]
+    for w in wallets:
+        lines.append(f"  - name: {w['name']}")
+        for key, value in w.items():
+            if key != "name":
+                lines.append(f'    {key}: "{value}"' if isinstance(value, str)
+                             else f"    {key}: {value}")
+    path = tmp_path / "plan.yaml"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_load_plan_rejects_bad_wallets(tmp_path):
+    path = _writePlan(tmp_path, account0.address, [
+        {"name": "a", "type": "exp", "beneficiary": account1.address,
+         "start": 1, "duration": 10, "allocation": 1}])
+    with pytest.raises(plan.PlanError):
+        plan.loadPlan(path)  # exp without half_life
+
+
+def test_plan_converges(tmp_path):
+    token = BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(1000.0), {"from": account0}
+    )
+    start = chain.time() + 100
+    wallets = [
+        {"name": "lin-1", "type": "lin", "beneficiary": account1.address,
+         "start": start, "duration": 1000, "allocation": 10},
+        {"name": "exp-1", "type": "exp", "beneficiary": account1.address,
+         "start": start, "duration": 5000, "half_life": 1000,
+         "allocation": 20},
+    ]
+    the_plan = plan.loadPlan(_writePlan(tmp_path, token.address, wallets))
+    registry = {}
+
+    def on_deploy(name, address, wallet_type, block):
+        registry[name] = {"address": address, "type": wallet_type,
+                          "block": block}
+
+    def diff():
+        state = plan.readState(web3, the_plan, registry)
+        return plan.diffPlan(the_plan, state, account0.address, chain.time())
+
+    actions = diff()
+    assert sorted(a["kind"] for a in actions) == \
+        ["deploy", "deploy", "fund", "fund"]
+    results = plan.applyActions(BROWNIE_PROJECT, account0, the_plan, actions,
+                                on_deploy)
+    assert all(r["status"] == 1 for r in results)
+    assert sorted(registry) == ["exp-1", "lin-1"]
+    assert token.balanceOf(registry["exp-1"]["address"]) == toBase18(20.0)
+    assert diff() == []
+
+    # drift: raise an allocation, and change a beneficiary
+    wallet = BROWNIE_PROJECT.VestingWalletLinear.at(registry["lin-1"]["address"])
+    wallet.changeBeneficiary(account2.address, {"from": account0})
+    the_plan["wallets"][1]["allocation_wei"] = toBase18(25.0)
+    actions = diff()
+    assert sorted(a["kind"] for a in actions) == ["fund", "set_beneficiary"]
+    assert [a["amount"] for a in actions if a["kind"] == "fund"] == \
+        [toBase18(5.0)]
+    plan.applyActions(BROWNIE_PROJECT, account0, the_plan, actions)
+    assert wallet.beneficiary() == account1.address
+    assert diff() == []
+
+
+def test_diff_reports_non_wallets():
+    w = {"name": "a", "type": "lin", "beneficiary": account1.address,
+         "start": 1, "duration": 10, "allocation_wei": 1}
+    state = {"a": {"address": account2.address, "code": True,
+                   "beneficiary": None, "owner": None, "start": None,
+                   "duration": None, "allocation": 0}}
+    actions = plan.diffPlan({"wallets": [w]}, state, account0.address, 0)
+    assert [a["kind"] for a in actions] == ["error"]
+
+
+def test_fund_is_skipped_when_its_deploy_fails():
+    token = BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(1000.0), {"from": account0}
+    )
+    w = {"name": "bad", "type": "lin", "beneficiary": brownie.ZERO_ADDRESS,
+         "start": chain.time(), "duration": 10, "allocation_wei": 1}
+    actions = [{"kind": "deploy", "name": "bad", "wallet": w},
+               {"kind": "fund", "name": "bad", "amount": 1}]
+    results = plan.applyActions(BROWNIE_PROJECT, account0,
+                                {"token": token.address}, actions)
+    assert [(r["kind"], r["status"]) for r in results] == \
+        [("deploy", None), ("fund", None)]
+    assert results[1]["error"] == "skipped: its deploy failed"
+
+
+def test_plan_address_adopts_wallet(tmp_path):
+    token = BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(1000.0), {"from": account0}
+    )
+    start = chain.time() + 100
+    wallet = BROWNIE_PROJECT.VestingWalletLinear.deploy(
+        account1.address, start, 1000, {"from": account0})
+    token.transfer(wallet, toBase18(10.0), {"from": account0})
+    wallets = [{"name": "by-hand", "type": "lin",
+                "beneficiary": account1.address, "start": start,
+                "duration": 1000, "allocation": 10,
+                "address": wallet.address}]
+    the_plan = plan.loadPlan(_writePlan(tmp_path, token.address, wallets))
+    state = plan.readState(web3, the_plan, {})  # no registry
+    assert plan.diffPlan(the_plan, state, account0.address, chain.time()) \
+        == []
+
+    the_plan["wallets"][0]["address"] = account2.address  # no code there
+    state = plan.readState(web3, the_plan, {})
+    actions = plan.diffPlan(the_plan, state, account0.address, chain.time())
+    assert [a["kind"] for a in actions] == ["error"]
@@ -0,0 +1,72 @@
+import brownie
+
+from util import payout
+from util.base18 import toBase18
+from util.constants import BROWNIE_PROJECT
+
+accounts = brownie.network.accounts
+account0, payee1, payee2 = accounts[0], accounts[1], accounts[2]
+chain = brownie.network.chain
+web3 = brownie.network.web3
+ZERO_ADDRESS = "0x" + "0" * 40
+
+
+def _setup(n_wallets: int):
+    token = BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(1000.0), {"from": account0}
+    )
+    splitter = BROWNIE_PROJECT.Splitter.deploy(
+        [payee1, payee2], [100, 300], {"from": account0}
+    )
+    wallets = []
+    for i in range(n_wallets):
+        wallet = BROWNIE_PROJECT.VestingWalletHalving.deploy(
+            splitter.address, chain.time() + 10, 1000, 10000, {"from": account0}
+        )
+        token.transfer(wallet, toBase18(10.0 * (i + 1)), {"from": account0})
+        wallets.append(wallet)
+    chain.sleep(2000)
+    chain.mine()
+    return token, splitter, wallets
+
+
+def test_release_and_split():
+    token, splitter, wallets = _setup(3)
+    router = BROWNIE_PROJECT.ReleaseRouter.deploy({"from": account0})
+    addrs = [w.address for w in wallets]
+
+    wallet_amts, payees, payee_amts = router.releaseAndSplit.call(
+        addrs, token.address, splitter.address)
+    assert all(amt > 0 for amt in wallet_amts)
+    assert list(payees) == [payee1.address, payee2.address]
+
+    tx = router.releaseAndSplit(addrs, token.address, splitter.address,
+                                {"from": account0})
+    amounts = payout.payoutAmounts(
+        web3.eth.get_transaction_receipt(tx.txid)["logs"], token.address,
+        splitter.address)
+    for wallet in wallets:
+        assert amounts["wallets"][wallet.address] == \
+            wallet.released(token.address)
+    paid1 = amounts["payees"][payee1.address]
+    paid2 = amounts["payees"][payee2.address]
+    assert token.balanceOf(payee1) == paid1
+    assert token.balanceOf(payee2) == paid2
+    assert abs(paid2 - 3 * paid1) <= 3  # 100:300 shares, rounded down
+    assert token.balanceOf(splitter) == 1  # splitter keeps 1 wei
+    assert amounts["failed"] == []
+
+
+def test_failed_wallet_is_skipped():
+    token, splitter, wallets = _setup(1)
+    router = BROWNIE_PROJECT.ReleaseRouter.deploy({"from": account0})
+    not_a_wallet = token.address  # has no release(address): reverts
+    tx = router.releaseAndSplit([not_a_wallet, wallets[0].address],
+                                token.address, ZERO_ADDRESS,
+                                {"from": account0})
+    amounts = payout.payoutAmounts(
+        web3.eth.get_transaction_receipt(tx.txid)["logs"], token.address)
+    assert amounts["failed"] == [not_a_wallet]
+    assert amounts["wallets"][wallets[0].address] > 0
+    assert amounts["payees"] == {}
+    assert token.balanceOf(splitter) == wallets[0].released(token.address)
@@ -0,0 +1,102 @@
+from util import rpccache
+from util.rpccache import RpcCache
+
+
+def test_get_put(tmp_path):
+    cache = RpcCache(str(tmp_path / "cache.sqlite"))
+    assert cache.get("k", "latest") is None
+    cache.put("k", "1337-0xab", 5, False, "0x01")
+    assert cache.get("k", "latest") == "0x01"
+
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["kinds"]["latest"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_block_scoped_purge(tmp_path):
+    cache = RpcCache(str(tmp_path / "cache.sqlite"))
+    cache.put("old", "c", 5, False, "0x01")
+    cache.put("imm", "c", 5, True, "0x02")
+    cache.put("other_chain", "d", 5, False, "0x03")
+
+    cache.purgeBlockScoped("c", 6)
+    assert cache.get("old", "latest") is None
+    assert cache.get("imm", "immutable") == "0x02"
+    assert cache.get("other_chain", "latest") == "0x03"
+
+    cache.purgeAfter("c", 4)
+    assert cache.get("imm", "immutable") is None
+
+
+def test_lru_eviction(tmp_path):
+    cache = RpcCache(str(tmp_path / "cache.sqlite"), max_bytes=1000)
+    for i in range(50):
+        cache.put(f"k{i}", "c", i, True, "v" * 50)
+        cache.get("k0", "immutable")  # keep k0 hot
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 1000
+    assert stats["entries"] < 50
+    assert cache.get("k0", "immutable") is not None
+    assert cache.get("k1", "immutable") is None
+
+
+def test_purge_after_is_committed(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = RpcCache(path)
+    cache.put("old", "c", 5, True, "0x01")
+    cache.put("new", "c", 15, True, "0x02")
+    cache.flush()
+    cache.purgeAfter("c", 10)  # no flush after: as a plain `vw revert`
+
+    reopened = RpcCache(path)
+    assert reopened.get("new", "immutable") is None
+    assert reopened.get("old", "immutable") == "0x01"
+
+
+def test_shared_between_processes(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache, other = RpcCache(path), RpcCache(path)
+    cache.put("k", "c", 5, True, "0x01")
+    assert cache.get("k", "immutable") == "0x01"  # a hit doesn't write
+    other.put("k2", "c", 5, True, "0x02")  # so no "database is locked"
+    assert other.get("k", "immutable") == "0x01"
+    assert cache.get("k2", "immutable") == "0x02"
+
+
+class _Node:
+    """make_request of a chain at block 100, counting eth_calls"""
+
+    def __init__(self):
+        self.results = {}  # block tag : eth_call result
+        self.calls = 0
+
+    def __call__(self, method, params):
+        if method == "eth_blockNumber":
+            return {"result": hex(100)}
+        if method == "eth_chainId":
+            return {"result": "0x539"}
+        if method == "eth_getBlockByNumber":
+            return {"result": {"hash": "0x" + "ab" * 32}}
+        self.calls += 1
+        return {"result": self.results.get(params[1], "0x")}
+
+
+def test_middleware_skips_empty_and_historical_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(rpccache, "_cache",
+                        RpcCache(str(tmp_path / "cache.sqlite")))
+    node = _Node()
+    middleware = rpccache.cachingMiddleware(node, None)
+    start = "0x" + "00" * 28 + "0001"
+    call = {"to": "0x" + "11" * 20, "data": "0xbe9a6555"}  # start()
+
+    # not deployed yet: '0x' isn't cached
+    assert middleware("eth_call", [call, "latest"])["result"] == "0x"
+    node.results["latest"] = start
+    assert middleware("eth_call", [call, "latest"])["result"] == start
+    assert middleware("eth_call", [call, "latest"])["result"] == start
+    assert node.calls == 2
+
+    # an immutable getter at an old block isn't served from 'latest'
+    assert middleware("eth_call", [call, "0x5"])["result"] == "0x"
+    assert node.calls == 3
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import brownie
+
+from util import rpcbatch, rpchedge
+from util.rpchedge import HedgedReader
+from util.rpcproxy import RpcProxy
+
+accounts = brownie.network.accounts
+web3 = brownie.network.web3
+
+
+def _upstream() -> str:
+    return str(web3.provider.endpoint_uri)
+
+
+def _balance(reader: HedgedReader, address: str) -> int:
+    return int(reader.request("eth_getBalance", [address, "latest"])["result"],
+               16)
+
+
+def test_hedge_beats_slow_endpoint():
+    with RpcProxy(_upstream()) as a, RpcProxy(_upstream()) as b:
+        proxies = {a.url: a, b.url: b}
+        reader = HedgedReader([a.url, b.url])
+        for _ in range(30):  # learn both endpoints' latencies
+            _balance(reader, accounts[0].address)
+        first = reader.ranked()[0]
+        proxies[first.url].faults["latency_ms"] = 1000
+
+        t0 = time.perf_counter()
+        assert _balance(reader, accounts[0].address) == \
+            web3.eth.get_balance(accounts[0].address, reader.pinned)
+        assert time.perf_counter() - t0 < 0.5
+        assert first.counts["hedged"] == 1
+        # the losing request is still running, but won't hold up exit
+        losers = [t for t in threading.enumerate() if t.name == "vw-hedge"]
+        assert losers and all(t.daemon for t in losers)
+
+
+def test_reads_pinned_to_one_block():
+    with RpcProxy(_upstream(), latency_ms=5) as a, \
+            RpcProxy(_upstream(), latency_ms=20) as b:
+        reader = HedgedReader([a.url, b.url])
+        before = _balance(reader, accounts[1].address)
+        pinned = reader.pinned
+        accounts[0].transfer(accounts[1], "1 ether")  # not through reader
+
+        assert _balance(reader, accounts[1].address) == before
+        assert reader.request("eth_blockNumber", [])["result"] == hex(pinned)
+        reader.afterWrite()  # as the middleware does, once a tx is mined
+        assert _balance(reader, accounts[1].address) == before + 10**18
+        assert reader.pinned == web3.eth.block_number
+
+
+def test_lagging_endpoint_not_read():
+    with RpcProxy(_upstream()) as a, RpcProxy(_upstream()) as b:
+        reader = HedgedReader([a.url, b.url], max_lag=2)
+        reader.checkHeads()
+        lagging, fresh = reader.endpoints
+        lagging.head -= 3
+        assert reader.fresh() == [fresh]
+        reader.pinned = fresh.head
+        for _ in range(5):
+            reader.request("eth_chainId", [])
+        assert lagging.counts["requests"] == 0
+        assert fresh.counts["wins"] == 5
+
+
+def test_fallback_to_primary_stays_pinned():
+    reader = HedgedReader([_upstream()])
+    rpchedge.install(reader)
+    try:
+        before = _balance(reader, accounts[1].address)
+        accounts[0].transfer(accounts[1], "1 ether")
+        reader.endpoints[0].head = None  # no endpoint looks fresh
+        call = ("eth_getBalance", [accounts[1].address, "latest"])
+        responses = rpcbatch.batchRequest(web3, [call])
+        assert int(responses[0]["result"], 16) == before
+    finally:
+        rpchedge.install(None)
@@ -0,0 +1,43 @@
+import time
+
+import brownie
+import pytest
+import requests
+
+from util.rpcproxy import RpcProxy
+
+web3 = brownie.network.web3
+CALL = {"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []}
+
+
+def _upstream() -> str:
+    return str(web3.provider.endpoint_uri)
+
+
+def test_forwards_with_latency():
+    with RpcProxy(_upstream(), latency_ms=100) as proxy:
+        t0 = time.perf_counter()
+        reply = requests.post(proxy.url, json=[CALL, dict(CALL, id=2)])
+        elapsed = time.perf_counter() - t0
+    assert reply.status_code == 200
+    assert [r["result"] for r in reply.json()] == [hex(web3.eth.block_number)] * 2
+    assert elapsed >= 0.1
+    assert proxy.stats["requests"] == 1 and proxy.stats["calls"] == 2
+
+
+def test_rate_limit_and_drops():
+    with RpcProxy(_upstream(), rate_limit=3) as proxy:
+        codes = [requests.post(proxy.url, json=CALL).status_code
+                 for _ in range(6)]
+    assert codes[:3] == [200] * 3
+    assert 429 in codes[3:]
+
+    with RpcProxy(_upstream(), rate_limit=0.5) as proxy:  # under 1/s
+        codes = [requests.post(proxy.url, json=CALL).status_code
+                 for _ in range(2)]
+    assert codes == [200, 429]
+
+    with RpcProxy(_upstream(), drop_rate=1.0) as proxy:
+        with pytest.raises(requests.ConnectionError):
+            requests.post(proxy.url, json=CALL)
+    assert proxy.stats["dropped"] == 1
@@ -0,0 +1,50 @@
+from util import phases, rpctrace
+
+
+def _fresh(monkeypatch):
+    monkeypatch.setattr(rpctrace, "_enabled", False)
+    monkeypatch.setattr(rpctrace, "_calls", [])
+    monkeypatch.setattr(rpctrace, "_spans", [])
+    monkeypatch.setattr(phases, "_listeners", [])
+    rpctrace.enable()
+
+
+def _node(method, params):
+    return {"jsonrpc": "2.0", "id": 0, "result": "0x1"}
+
+
+def test_summary_counts_and_duplicates(monkeypatch):
+    _fresh(monkeypatch)
+    middleware = rpctrace.tracingMiddleware(_node, None)
+    with phases.phase("do_walletinfo"):
+        for _ in range(3):
+            middleware("eth_call", [{"to": "0xa", "data": "0x01"}, "latest"])
+        middleware("eth_call", [{"to": "0xb", "data": "0x01"}, "latest"])
+        middleware("eth_blockNumber", [])
+
+    assert [c["phase"] for c in rpctrace._calls] == ["do_walletinfo"] * 5
+    lines = rpctrace.summary().splitlines()
+    counts = {line.split()[0]: int(line.split()[1]) for line in lines
+              if line.strip().startswith("eth_") and "[" not in line}
+    assert counts == {"eth_call": 4, "eth_blockNumber": 1}
+    assert "  total: 5 calls" in rpctrace.summary()
+    assert "  duplicate calls (2 avoidable):" in lines
+    fp = rpctrace.fingerprint(
+        "eth_call", [{"to": "0xa", "data": "0x01"}, "latest"])
+    assert f"    eth_call [{fp}] x3" in lines
+    assert any(line.split()[0] == "do_walletinfo"
+               for line in lines[lines.index("Phases:") + 1:])
+
+
+def test_fingerprint_ignores_key_order():
+    assert rpctrace.fingerprint("eth_call", [{"to": "0xa", "data": "0x"}]) == \
+        rpctrace.fingerprint("eth_call", [{"data": "0x", "to": "0xa"}])
+    assert rpctrace.fingerprint("eth_call", [1]) != \
+        rpctrace.fingerprint("eth_getBalance", [1])
+
+
+def test_disabled_records_nothing(monkeypatch):
+    monkeypatch.setattr(rpctrace, "_enabled", False)
+    monkeypatch.setattr(rpctrace, "_calls", [])
+    rpctrace.record("eth_call", [], 0.1, {"result": "0x"})
+    assert rpctrace._calls == []
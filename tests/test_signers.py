@@ -0,0 +1,86 @@
+import brownie
+
+from util import plan, signers
+from util.base18 import toBase18
+from util.constants import BROWNIE_PROJECT
+
+accounts = brownie.network.accounts
+account0, account1, account2 = accounts[0], accounts[1], accounts[2]
+chain = brownie.network.chain
+web3 = brownie.network.web3
+
+
+def test_top_up():
+    fresh = [accounts.add() for _ in range(2)]
+    pool = signers.SignerPool(web3, fresh, treasury=account0)
+    topped = pool.topUp()
+    assert sorted(a for a, _ in topped) == sorted(pool.addresses)
+    assert all(a.balance() == signers.TOP_UP_BALANCE for a in fresh)
+    assert pool.topUp() == []  # already above the minimum
+
+
+def test_plan_apply_with_pool():
+    token = BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(1000.0), {"from": account0}
+    )
+    pool = signers.SignerPool(web3, [accounts.add() for _ in range(3)],
+                              treasury=account0)
+    pool.topUp()
+    start = chain.time() + 100
+    wallets = [{"name": f"lin-{i}", "type": "lin",
+                "beneficiary": account1.address, "start": start,
+                "duration": 1000, "allocation_wei": toBase18(i + 1.0)}
+               for i in range(8)]
+    the_plan = {"network": "development", "token": token.address,
+                "wallets": wallets}
+    registry = {}
+
+    def on_deploy(name, address, wallet_type, block):
+        registry[name] = {"address": address, "type": wallet_type}
+
+    def diff():
+        state = plan.readState(web3, the_plan, registry)
+        return plan.diffPlan(the_plan, state, pool.addresses, chain.time())
+
+    results = plan.applyActions(BROWNIE_PROJECT, account0, the_plan, diff(),
+                                on_deploy, pool)
+    assert all(r["status"] == 1 for r in results)
+    assert diff() == []
+
+    # each wallet was deployed by the signer of its name, which owns it
+    owners = set()
+    for w in wallets:
+        wallet = BROWNIE_PROJECT.VestingWalletLinear.at(
+            registry[w["name"]]["address"])
+        assert wallet.owner() == pool.signerFor(w["name"]).address
+        assert token.balanceOf(wallet) == w["allocation_wei"]
+        owners.add(wallet.owner())
+    assert len(owners) > 1
+
+    # beneficiaries are changed by each wallet's owner
+    for w in wallets:
+        w["beneficiary"] = account2.address
+    actions = diff()
+    assert [a["kind"] for a in actions] == ["set_beneficiary"] * 8
+    results = plan.applyActions(BROWNIE_PROJECT, account0, the_plan, actions,
+                                pool=pool)
+    assert all(r["status"] == 1 for r in results)
+    assert diff() == []
+
+
+def test_send_reports_errors_per_item():
+    pool = signers.SignerPool(web3, [account1, account2])
+
+    def send(i, tx_params):
+        if i == 2:
+            raise ValueError("boom")
+        return tx_params["from"].transfer(account0, 1, **{
+            k: v for k, v in tx_params.items() if k != "from"})
+
+    sent = pool.send(list(range(6)), lambda i: pool.accounts[i % 2], send)
+    assert [item for item, _, _ in sent] == list(range(6))
+    assert [error for _, _, error in sent] == \
+        [None, None, "ValueError: boom", None, None, None]
+    # the failed send left no nonce gap: every other tx gets mined
+    assert all(pool.wait(tx) and tx.status == 1
+               for _, tx, error in sent if error is None)
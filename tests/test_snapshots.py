@@ -0,0 +1,56 @@
+import json
+
+import brownie
+
+from util import snapshots
+from util.base18 import toBase18
+from util.constants import BROWNIE_PROJECT
+from util.keeper import rollBackState
+from util.registry import Registry
+
+accounts = brownie.network.accounts
+account0 = accounts[0]
+web3 = brownie.network.web3
+CHAIN = "test-chain"
+
+
+def _deployToken():
+    return BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(100.0), {"from": account0}
+    )
+
+
+def test_revert_repeatedly(tmp_path):
+    snaps = snapshots.Snapshots(str(tmp_path / "snapshots.json"))
+    entry = snapshots.take(web3, snaps, CHAIN, "start")
+    assert entry["block"] == web3.eth.block_number
+
+    for _ in range(2):  # a name can be reverted to again and again
+        token = _deployToken()
+        snapshots.take(web3, snaps, CHAIN, "later")
+        reverted = snapshots.revert(web3, snaps, CHAIN, "start")
+        assert web3.eth.get_code(token.address) == b""
+        assert web3.eth.block_number == entry["block"]
+        assert reverted["dropped"] == ["later"]
+        assert list(snaps.entries(CHAIN)) == ["start"]
+
+    snaps.save()
+    assert "start" in snapshots.Snapshots(snaps.path).entries(CHAIN)
+
+
+def test_local_state_rolls_back(tmp_path):
+    registry = Registry(str(tmp_path / "registry.json"))
+    registry.put(CHAIN, "old", account0.address, "lin", 5)
+    registry.put(CHAIN, "new", account0.address, "lin", 15)
+    assert registry.dropAfter(CHAIN, 10) == ["new"]
+
+    state_path = tmp_path / "keeper.state"
+    state_path.write_text(json.dumps({
+        "last_block": 20, "params": {"0x1": {}}, "gas": {"0x1|0x2": 1},
+        "positions": {"a": {"block": 5}, "b": {"block": 15}}}))
+    assert rollBackState(str(state_path), 10)
+    state = json.loads(state_path.read_text())
+    assert state["last_block"] == 10
+    assert list(state["positions"]) == ["a"]
+    assert state["params"] == {} and state["gas"] == {}
+    assert not rollBackState(str(tmp_path / "missing"), 10)
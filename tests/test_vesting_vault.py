@@ -0,0 +1,111 @@
+import brownie
+import pytest
+
+from util import merkle, vesting
+from util.base18 import toBase18
+from util.constants import BROWNIE_PROJECT
+
+accounts = brownie.network.accounts
+account0, account1, account2, account3 = accounts[:4]
+chain = brownie.network.chain
+
+
+def _writeGrants(path, grants):
+    lines = ["beneficiary,type,start,duration,half_life,allocation"]
+    lines += [",".join(str(v) for v in g) for g in grants]
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_tree_proofs(tmp_path):
+    grants = [(f"0x{i + 1:040x}", ["cliff", "lin", "exp"][i % 3], 1000 + i,
+               5000, 100 if i % 3 == 2 else "", i + 1) for i in range(37)]
+    info = merkle.buildTree(_writeGrants(tmp_path / "g.csv", grants),
+                            str(tmp_path / "tree"))
+    assert info["n_grants"] == 37
+    assert int(info["total_allocation_wei"]) == toBase18(sum(range(1, 38)))
+    for i in [0, 17, 36]:  # 36 is promoted, unpaired, at level 0
+        grant = next(merkle.findGrants(str(tmp_path / "tree"), grants[i][0]))
+        merkle.grantWithProof(str(tmp_path / "tree"), grant)  # verifies
+
+
+def test_vault_claims(tmp_path):
+    token = BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(1000.0), {"from": account0}
+    )
+    now = chain.time()
+    grants = [(account1.address, "lin", now, 1000, "", 100),
+              (account2.address, "exp", now, 10000, 500, 200),
+              (account3.address, "cliff", now, 1000, "", 50),
+              (account1.address, "cliff", now, 10, "", 1)]
+    tree_dir = str(tmp_path / "tree")
+    info = merkle.buildTree(_writeGrants(tmp_path / "g.csv", grants), tree_dir)
+    vault = BROWNIE_PROJECT.VestingVault.deploy(
+        token.address, info["root"], {"from": account0})
+    token.transfer(vault, int(info["total_allocation_wei"]),
+                   {"from": account0})
+
+    chain.sleep(600)
+    chain.mine()
+    for grant in merkle.findGrants(tree_dir, account2.address):
+        g = merkle.grantWithProof(tree_dir, grant)
+        struct = merkle.grantTuple(grant)
+        tx = vault.claim(struct, g["proof"], {"from": account0})
+        t = chain[tx.block_number].timestamp
+        expected = vesting.vestedAmount(
+            "exp", toBase18(200.0), t, now, 10000, 500)
+        assert tx.events["Claimed"]["amount"] == expected
+        assert token.balanceOf(account2) == expected
+        assert vault.vestedAmount(struct, t) == expected
+
+    # a claim for someone else's grant, or with a tampered grant, fails
+    grant = next(merkle.findGrants(tree_dir, account3.address))
+    g = merkle.grantWithProof(tree_dir, grant)
+    tampered = list(merkle.grantTuple(grant))
+    tampered[6] *= 2
+    with pytest.raises(brownie.exceptions.VirtualMachineError):
+        vault.claim(tampered, g["proof"], {"from": account3})
+
+    # beneficiary with two grants gets both; claimed twice pays once
+    chain.sleep(1000)
+    chain.mine()
+    for grant in merkle.findGrants(tree_dir, account1.address):
+        g = merkle.grantWithProof(tree_dir, grant)
+        vault.claim(merkle.grantTuple(grant), g["proof"], {"from": account1})
+        vault.claim(merkle.grantTuple(grant), g["proof"], {"from": account1})
+    assert token.balanceOf(account1) == toBase18(101.0)
+
+
+def test_republished_grant_keeps_released(tmp_path):
+    token = BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(1000.0), {"from": account0}
+    )
+    now = chain.time()
+    tree_dir = str(tmp_path / "tree")
+    info = merkle.buildTree(_writeGrants(
+        tmp_path / "g.csv", [(account1.address, "lin", now, 1000, "", 100)]),
+        tree_dir)
+    vault = BROWNIE_PROJECT.VestingVault.deploy(
+        token.address, info["root"], {"from": account0})
+    token.transfer(vault, toBase18(300.0), {"from": account0})
+
+    chain.sleep(500)
+    chain.mine()
+    grant = next(merkle.findGrants(tree_dir, account1.address))
+    g = merkle.grantWithProof(tree_dir, grant)
+    vault.claim(merkle.grantTuple(grant), g["proof"], {"from": account1})
+    claimed = token.balanceOf(account1)
+    assert claimed > 0 and vault.released(0) == claimed
+
+    # same row, bigger allocation: a new leaf, but the index carries over
+    info = merkle.buildTree(_writeGrants(
+        tmp_path / "g2.csv", [(account1.address, "lin", now, 1000, "", 300)]),
+        tree_dir)
+    vault.setMerkleRoot(info["root"], {"from": account0})
+    grant = next(merkle.findGrants(tree_dir, account1.address))
+    g = merkle.grantWithProof(tree_dir, grant)
+    struct = merkle.grantTuple(grant)
+    tx = vault.claim(struct, g["proof"], {"from": account1})
+    vested = vault.vestedAmount(struct, chain[tx.block_number].timestamp)
+    assert tx.events["Claimed"]["amount"] == vested - claimed
+    assert token.balanceOf(account1) == vested
@@ -0,0 +1,71 @@
+import brownie
+
+from util import admin
+from util.base18 import toBase18
+from util.constants import BROWNIE_PROJECT
+
+accounts = brownie.network.accounts
+account0, account1, account2, account3 = accounts[:4]
+chain = brownie.network.chain
+web3 = brownie.network.web3
+
+
+def _cohort(n: int, owner):
+    token = BROWNIE_PROJECT.Simpletoken.deploy(
+        "TOK", "Test Token", 18, toBase18(1000.0), {"from": account0}
+    )
+    wallets = []
+    for _ in range(n):
+        wallet = BROWNIE_PROJECT.VestingWalletLinear.deploy(
+            account1.address, chain.time(), 1000, {"from": account0}
+        )
+        token.transfer(wallet, toBase18(10.0), {"from": account0})
+        wallet.transferOwnership(owner, {"from": account0})
+        wallets.append(wallet.address)
+    return token, wallets
+
+
+def test_chunk_size():
+    def estimate(k):
+        return 30000 + 10000 * k
+    assert admin.chunkSize(estimate, 1000, 1_000_000) == 47
+    assert admin.chunkSize(estimate, 5, 1_000_000) == 5
+    assert admin.chunks(list(range(5)), 2) == [[0, 1], [2, 3], [4]]
+
+
+def test_cohort_admin():
+    admin_contract = BROWNIE_PROJECT.WalletAdmin.deploy({"from": account0})
+    token, wallets = _cohort(5, admin_contract.address)
+    not_adopted = BROWNIE_PROJECT.VestingWalletLinear.deploy(
+        account1.address, chain.time(), 1000, {"from": account0}
+    ).address
+
+    with brownie.reverts("Ownable: caller is not the owner"):
+        admin_contract.changeBeneficiaries(
+            wallets, [account2] * 5, {"from": account1})
+
+    # rotate beneficiaries, in chunks; the wallet that isn't ours is skipped
+    cohort = wallets + [not_adopted]
+    txs = admin.sendChunks(lambda chunk: admin_contract.changeBeneficiaries(
+        chunk, [account2] * len(chunk),
+        {"from": account0, "required_confs": 0}), cohort, 4)
+    assert len(txs) == 2
+    assert "AdminCallFailed" in txs[1].events
+    actual = admin.readAddresses(web3, cohort, "beneficiary()")
+    assert admin.mismatches(actual, {w: account2.address for w in cohort}) \
+        == [not_adopted]
+
+    # renounce: tokens go to the recipient
+    tx = admin_contract.renounceVesting(wallets, token, account3,
+                                        {"from": account0})
+    assert tx.return_value == toBase18(50.0)
+    assert token.balanceOf(account3) == toBase18(50.0)
+    balances = admin.readBalances(web3, token.address, wallets)
+    assert admin.mismatches(balances, {w: 0 for w in wallets}) == []
+
+    # hand back
+    admin_contract.transferWalletOwnership(wallets, account0,
+                                           {"from": account0})
+    owners = admin.readAddresses(web3, wallets, "owner()")
+    assert admin.mismatches(owners, {w: account0.address for w in wallets}) \
+        == []
@@ -0,0 +1,50 @@
+"""Minimal ABI helpers: selectors, calldata encoding & output decoding.
+
+For raw eth_calls (eg in JSON-RPC batches) that don't go through a brownie
+Contract object.
+"""
+from typing import Any, List, Sequence
+
+from eth_utils import function_signature_to_4byte_selector, keccak
+
+try:  # eth-abi >= 4
+    from eth_abi import decode as _decode, encode as _encode
+except ImportError:  # eth-abi 2.x, as pinned by older brownies
+    from eth_abi import decode_abi as _decode, encode_abi as _encode
+
+
+def selector(signature: str) -> bytes:
+    """4-byte selector of eg 'released(address)'"""
+    return function_signature_to_4byte_selector(signature)
+
+
+def eventTopic(signature: str) -> str:
+    """topic0 of eg 'ERC20Released(address,address,uint256)'"""
+    return "0x" + bytes(keccak(text=signature)).hex()
+
+
+def argTypes(signature: str) -> List[str]:
+    """['address', 'uint64'] for 'vestedAmount(address,uint64)'"""
+    inner = signature[signature.index("(") + 1:signature.rindex(")")]
+    return [t for t in inner.split(",") if t]
+
+
+def encodeArgs(types: List[str], args: Sequence[Any]) -> bytes:
+    """abi.encode(args...)"""
+    return _encode(types, list(args))
+
+
+def encodeCall(signature: str, args: Sequence[Any]) -> str:
+    """Calldata hex string for calling `signature` with `args`"""
+    data = selector(signature) + encodeArgs(argTypes(signature), args)
+    return "0x" + data.hex()
+
+
+def decodeOutput(types: List[str], data: str) -> tuple:
+    """Decode hex `data` returned by eth_call into a tuple of `types`"""
+    return tuple(_decode(types, bytes.fromhex(data.replace("0x", ""))))
+
+
+def topicAddress(address: str) -> str:
+    """An address, left-padded to 32 bytes, for log topic filters"""
+    return "0x" + address.lower().replace("0x", "").rjust(64, "0")
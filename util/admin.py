@@ -0,0 +1,68 @@
+"""Cohort administration via contracts/WalletAdmin.sol (`vw admin`).
+
+Work on many wallets is cut into chunks that fit comfortably in a block:
+the gas of one call is estimated on a probe chunk, and the chunk size is
+scaled to GAS_FRACTION of the block gas limit. All chunks are sent
+without waiting, then awaited together. Afterwards, the result is checked
+with batched reads, so a cohort of any size verifies in a few round trips.
+"""
+from typing import Callable, Dict, List
+
+from util import abi, rpcbatch
+
+GAS_FRACTION = 0.5  # of the block gas limit, per tx
+PROBE_SIZE = 8  # wallets in the chunk used to estimate gas per wallet
+MAX_CHUNK = 500
+
+
+def chunkSize(estimate: Callable[[int], int], n: int, block_gas_limit: int) -> int:
+    """Wallets per tx. `estimate(k)` is the gas of a call on k wallets"""
+    k = min(PROBE_SIZE, n)
+    if k == 0:
+        return 1
+    base = estimate(1)
+    per_wallet = max(1, (estimate(k) - base) // max(1, k - 1)) if k > 1 \
+        else base
+    budget = int(block_gas_limit * GAS_FRACTION) - base
+    return max(1, min(MAX_CHUNK, n, budget // per_wallet + 1))
+
+
+def chunks(items: list, size: int) -> List[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def sendChunks(send: Callable[[list], object], items: list, size: int) -> list:
+    """send(chunk) for each chunk without waiting, then wait for all.
+    `send` must pass required_confs=0. Returns the tx receipts."""
+    txs = [send(chunk) for chunk in chunks(items, size)]
+    for tx in txs:
+        tx.wait(1)
+    return txs
+
+
+# ========================================================================
+# verification
+def readAddresses(web3, wallets: List[str], signature: str) -> Dict[str, str]:
+    """wallet : address returned by eg 'owner()', in one batch"""
+    calls = [("eth_call", [{"to": w, "data": abi.encodeCall(signature, [])},
+                           "latest"]) for w in wallets]
+    results = rpcbatch.results(rpcbatch.batchRequest(web3, calls))
+    return {w: abi.decodeOutput(["address"], r)[0] if r else None
+            for w, r in zip(wallets, results)}
+
+
+def readBalances(web3, token: str, holders: List[str]) -> Dict[str, int]:
+    calls = [("eth_call", [{"to": token, "data": abi.encodeCall(
+        "balanceOf(address)", [h])}, "latest"]) for h in holders]
+    results = rpcbatch.results(rpcbatch.batchRequest(web3, calls))
+    return {h: abi.decodeOutput(["uint256"], r)[0] if r else None
+            for h, r in zip(holders, results)}
+
+
+def mismatches(actual: Dict[str, object], expected: Dict[str, object]
+               ) -> List[str]:
+    """Wallets whose actual value isn't the expected one. Addresses are
+    compared case-insensitively."""
+    def norm(v):
+        return v.lower() if isinstance(v, str) else v
+    return [w for w, e in expected.items() if norm(actual.get(w)) != norm(e)]
@@ -1,6 +1,14 @@
+from decimal import Decimal
+
+
 def toBase18(amt: float) -> int:
     return int(amt * 1e18)
 
 
 def fromBase18(amt_base: int) -> float:
     return amt_base / 1e18
+
+
+def toBase18Exact(amt) -> int:
+    """Like toBase18, but exact for any decimal amount, eg '50336999.5'"""
+    return int(Decimal(str(amt)) * 10**18)
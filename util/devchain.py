@@ -0,0 +1,93 @@
+"""Dev-chain (ganache) controls via raw RPC, for `vw mine` & friends.
+
+Brownie's chain.mine() issues one evm_mine per block. Here, ganache v7's
+bulk `evm_mine {"blocks": n}` mines any number of blocks in one request,
+falling back to one request per block on nodes that lack it.
+These bypass brownie's chain.time() bookkeeping: meant for one-shot use.
+"""
+import time
+
+
+class DevChainError(Exception):
+    pass
+
+
+def rpc(web3, method: str, params: list):
+    """Make a raw JSON-RPC request. Raises DevChainError on error"""
+    response = web3.provider.make_request(method, params)
+    if "error" in response:
+        raise DevChainError(f"{method}: {response['error']}")
+    return response.get("result")
+
+
+def head(web3) -> dict:
+    """Latest block's number & timestamp"""
+    block = rpc(web3, "eth_getBlockByNumber", ["latest", False])
+    return {"number": int(block["number"], 16),
+            "timestamp": int(block["timestamp"], 16)}
+
+
+def mineBlocks(web3, n: int):
+    """Mine `n` blocks, in one request if the node supports it"""
+    if n <= 0:
+        return
+    if n > 1:
+        before = head(web3)["number"]
+        try:
+            rpc(web3, "evm_mine", [{"blocks": n}])
+        except DevChainError:
+            pass
+        else:
+            mined = head(web3)["number"] - before
+            if mined >= n:
+                return
+            n -= mined  # node ignored the option, and mined just one
+    for _ in range(n):
+        rpc(web3, "evm_mine", [])
+
+
+def increaseTime(web3, seconds: int):
+    rpc(web3, "evm_increaseTime", [seconds])
+
+
+def jumpToTimestamp(web3, timestamp: int) -> dict:
+    """Mine a block at `timestamp`, or as close after it as the node allows.
+    Returns new head"""
+    if timestamp < head(web3)["timestamp"]:
+        raise DevChainError(f"timestamp {timestamp} is in the past")
+    try:
+        rpc(web3, "evm_mine", [timestamp])  # ganache v7, hardhat, anvil
+    except DevChainError:
+        mineBlocks(web3, 1)
+    new_head = head(web3)
+    if new_head["timestamp"] < timestamp:
+        # the node's clock has run on since the old head: step it from the
+        # block just mined, not from the old head, so it doesn't overshoot
+        increaseTime(web3, timestamp - new_head["timestamp"])
+        mineBlocks(web3, 1)
+        new_head = head(web3)
+    return new_head
+
+
+def jumpToBlock(web3, number: int) -> dict:
+    """Bulk-mine up to block `number`. Returns new head"""
+    n = number - head(web3)["number"]
+    if n < 0:
+        raise DevChainError(f"block {number} is in the past")
+    mineBlocks(web3, n)
+    return head(web3)
+
+
+def runSchedule(web3, step_seconds: int, n_steps: int,
+                blocks_per_step: int = 1, on_step=None) -> dict:
+    """Repeat n_steps times: pass `step_seconds`, mine `blocks_per_step`.
+    Calls on_step(i, head) after each step if given. Returns timing info"""
+    t0 = time.perf_counter()
+    for i in range(n_steps):
+        increaseTime(web3, step_seconds)
+        mineBlocks(web3, blocks_per_step)
+        if on_step is not None:
+            on_step(i, head(web3))
+    elapsed = time.perf_counter() - t0
+    return {"steps": n_steps, "seconds": elapsed,
+            "steps_per_second": n_steps / elapsed if elapsed else 0.0}
@@ -0,0 +1,288 @@
+"""Columnar export of wallet & event data, for analytics (`vw export`).
+
+Each table is a directory of column files in numpy's .npy format, plus a
+manifest (export.json) listing tables, columns, dtypes and row counts.
+Analysts memory-map them with zero copy: `np.load(path, mmap_mode="r")`,
+or `loadTable()` below.
+
+Amounts are uint256, which no numpy dtype holds. So each amount column is
+exact, as shape (n, 4) uint64 little-endian limbs (`fromLimbs()` gives back
+python ints), with a float64 companion column in tokens for quick maths.
+
+Rows are written in chunks as they're read from the chain, so memory use
+stays flat however many wallets there are. Chain reads go in JSON-RPC
+batches, pinned to one block.
+"""
+import json
+import os
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from eth_utils import to_checksum_address
+
+from util import abi, rpcbatch, vesting
+from util.base18 import fromBase18
+
+CHUNK_SIZE = 500  # wallets per batch of reads
+LOGS_CHUNK = 10000  # blocks per eth_getLogs
+MANIFEST = "export.json"
+HEADER_LEN = 128  # fixed .npy header size, so it can be rewritten at close
+
+ADDRESS = "S42"
+TX_HASH = "S66"
+AMOUNT = "amount"  # pseudo-dtype: (n, 4) uint64 limbs + float64 companion
+
+RELEASED_EVENT = "ERC20Released(address,address,uint256)"
+PAYEE_PAID_EVENT = "PayeePaid(address,address,uint256)"
+
+
+TABLES = {
+    "wallets": {"wallet": ADDRESS, "type": "S5", "token": ADDRESS,
+                "beneficiary": ADDRESS, "owner": ADDRESS, "start": "<u8",
+                "duration": "<u8", "half_life": "<u8", "balance": AMOUNT,
+                "released": AMOUNT, "vested": AMOUNT},
+    "schedules": {"wallet": ADDRESS, "token": ADDRESS, "timestamp": "<u8",
+                  "vested": AMOUNT},
+    "releases": {"block": "<u8", "timestamp": "<u8", "tx_hash": TX_HASH,
+                 "log_index": "<u4", "wallet": ADDRESS,
+                 "beneficiary": ADDRESS, "token": ADDRESS, "amount": AMOUNT},
+    "payouts": {"block": "<u8", "timestamp": "<u8", "tx_hash": TX_HASH,
+                "log_index": "<u4", "splitter": ADDRESS, "token": ADDRESS,
+                "payee": ADDRESS, "amount": AMOUNT},
+}
+
+
+# ========================================================================
+# amounts
+def toLimbs(values: List[int]) -> np.ndarray:
+    """uint256 ints -> (n, 4) uint64 array, least significant limb first"""
+    limbs = np.zeros((len(values), 4), dtype="<u8")
+    for i, value in enumerate(values):
+        for j in range(4):
+            limbs[i, j] = (value >> (64 * j)) & 0xFFFFFFFFFFFFFFFF
+    return limbs
+
+
+def fromLimbs(limbs: np.ndarray) -> List[int]:
+    """Inverse of toLimbs"""
+    return [sum(int(row[j]) << (64 * j) for j in range(4)) for row in limbs]
+
+
+# ========================================================================
+# writing
+class _NpyColumn:
+    """A .npy file that grows by appending rows. The header has a fixed
+    size, and is rewritten with the final row count at close."""
+
+    def __init__(self, path: str, dtype: str, width: Optional[int] = None):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.width = width  # None for 1-d columns
+        self.rows = 0
+        self._f = open(path, "wb")
+        self._f.write(self._header())
+
+    def _header(self) -> bytes:
+        shape = (self.rows,) if self.width is None else (self.rows, self.width)
+        header = repr({"descr": np.lib.format.dtype_to_descr(self.dtype),
+                       "fortran_order": False, "shape": shape})
+        pad = HEADER_LEN - 10 - len(header) - 1
+        return np.lib.format.magic(1, 0) + struct.pack("<H", HEADER_LEN - 10) \
+            + (header + " " * pad + "\n").encode("latin1")
+
+    def append(self, values: np.ndarray):
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        self._f.write(values.tobytes())
+        self.rows += len(values)
+
+    def close(self):
+        self._f.seek(0)
+        self._f.write(self._header())
+        self._f.close()
+
+
+class TableWriter:
+    """Writes one table's columns under `directory`/`name`/"""
+
+    def __init__(self, directory: str, name: str, schema: Dict[str, str]):
+        self.name = name
+        self.schema = schema
+        self.directory = os.path.join(directory, name)
+        os.makedirs(self.directory, exist_ok=True)
+        self._columns = {}
+        for column, dtype in schema.items():
+            if dtype == AMOUNT:
+                self._columns[column + "_wei"] = self._open(
+                    column + "_wei", "<u8", 4)
+                self._columns[column] = self._open(column, "<f8")
+            else:
+                self._columns[column] = self._open(column, dtype)
+        self.rows = 0
+
+    def _open(self, column: str, dtype: str, width: int = None) -> _NpyColumn:
+        return _NpyColumn(os.path.join(self.directory, column + ".npy"),
+                          dtype, width)
+
+    def append(self, rows: List[dict]):
+        """Append a chunk of rows. Amounts are python ints, in wei"""
+        if not rows:
+            return
+        for column, dtype in self.schema.items():
+            values = [row[column] for row in rows]
+            if dtype == AMOUNT:
+                self._columns[column + "_wei"].append(toLimbs(values))
+                self._columns[column].append(
+                    np.array([fromBase18(v) for v in values]))
+            elif dtype.startswith("S"):
+                self._columns[column].append(
+                    np.array([v.encode() for v in values], dtype=dtype))
+            else:
+                self._columns[column].append(np.array(values, dtype=dtype))
+        self.rows += len(rows)
+
+    def close(self) -> dict:
+        """Finish the files. Returns this table's manifest entry"""
+        columns = {}
+        for column, npy in self._columns.items():
+            npy.close()
+            columns[column] = {
+                "file": os.path.join(self.name, column + ".npy"),
+                "dtype": np.lib.format.dtype_to_descr(npy.dtype),
+                "shape": [npy.rows] + ([npy.width] if npy.width else [])}
+        return {"rows": self.rows, "columns": columns}
+
+
+def writeManifest(directory: str, tables: dict, meta: dict):
+    manifest = dict(meta, tables=tables,
+                    amounts="<col>_wei: (n, 4) uint64 limbs, little-endian; "
+                            "<col>: float64, in tokens (approx)")
+    with open(os.path.join(directory, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1)
+
+
+def loadTable(directory: str, name: str, mmap: bool = True) -> dict:
+    """column : array, for table `name` of an export. Memory-mapped,
+    with zero copy, unless `mmap` is False"""
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    return {column: np.load(os.path.join(directory, info["file"]),
+                            mmap_mode="r" if mmap else None)
+            for column, info in manifest["tables"][name]["columns"].items()}
+
+
+# ========================================================================
+# reading chain
+def _call(to: str, signature: str, args: list, block: int) -> tuple:
+    return ("eth_call", [{"to": to, "data": abi.encodeCall(signature, args)},
+                         hex(block)])
+
+
+def _decode(out_type: str, result) -> Optional[object]:
+    if result is None or result == "0x":
+        return None
+    return abi.decodeOutput([out_type], result)[0]
+
+
+def walletRows(web3, wallets: List[Tuple[str, str]], tokens: List[str],
+               block: dict, schedule_points: int = 0
+               ) -> Iterator[Tuple[List[dict], List[dict]]]:
+    """For each chunk of (address, type) wallets, yield (wallet rows,
+    schedule rows). One wallet row per wallet & token, read at `block`.
+    Schedule rows sample the vested curve at `schedule_points` timestamps
+    from start to end, computed locally from the schedule."""
+    number, now = block["number"], block["timestamp"]
+    for i in range(0, len(wallets), CHUNK_SIZE):
+        chunk = wallets[i:i + CHUNK_SIZE]
+        calls = []
+        for address, wallet_type in chunk:
+            calls += [_call(address, "beneficiary()", [], number),
+                      _call(address, "owner()", [], number),
+                      _call(address, "start()", [], number),
+                      _call(address, "duration()", [], number)]
+            if wallet_type == "exp":
+                calls.append(_call(address, "halfLife()", [], number))
+            for token in tokens:
+                calls += [_call(token, "balanceOf(address)", [address], number),
+                          _call(address, "released(address)", [token], number),
+                          _call(address, "vestedAmount(address,uint64)",
+                                [token, now], number)]
+        results = iter(rpcbatch.results(rpcbatch.batchRequest(web3, calls)))
+
+        wallet_rows, schedule_rows = [], []
+        for address, wallet_type in chunk:
+            beneficiary = _decode("address", next(results))
+            owner = _decode("address", next(results))
+            start = _decode("uint256", next(results)) or 0
+            duration = _decode("uint256", next(results)) or 0
+            half_life = _decode("uint256", next(results)) \
+                if wallet_type == "exp" else 0
+            for token in tokens:
+                balance = _decode("uint256", next(results)) or 0
+                released = _decode("uint256", next(results)) or 0
+                vested = _decode("uint256", next(results)) or 0
+                wallet_rows.append({
+                    "wallet": address, "type": wallet_type, "token": token,
+                    "beneficiary": beneficiary or "", "owner": owner or "",
+                    "start": start, "duration": duration,
+                    "half_life": half_life or 0, "balance": balance,
+                    "released": released, "vested": vested})
+                for t in _sampleTimes(start, duration, schedule_points):
+                    schedule_rows.append({
+                        "wallet": address, "token": token, "timestamp": t,
+                        "vested": _modelVested(wallet_type, balance + released,
+                                               t, start, duration, half_life)})
+        yield wallet_rows, schedule_rows
+
+
+def _sampleTimes(start: int, duration: int, n: int) -> List[int]:
+    if n <= 0:
+        return []
+    if n == 1:
+        return [start + duration]
+    return [start + duration * k // (n - 1) for k in range(n)]
+
+
+def _modelVested(wallet_type: str, allocation: int, t: int, start: int,
+                 duration: int, half_life: int) -> int:
+    try:
+        return vesting.vestedAmount(wallet_type, allocation, t, start,
+                                    duration, half_life)
+    except (OverflowError, ZeroDivisionError):  # contract would revert too
+        return 0
+
+
+def eventRows(web3, event: str, addresses: List[str], from_block: int,
+              to_block: int) -> Iterator[List[dict]]:
+    """Yield chunks of `event` logs emitted by `addresses`, decoded: block,
+    timestamp, tx_hash, log_index, emitter, topic1, topic2, amount.
+    Logs are fetched for many addresses at once, LOGS_CHUNK blocks at a time.
+    A range the node refuses (eg over its block-range or result-size cap) is
+    split in halves and retried.
+    """
+    topic0 = abi.eventTopic(event)
+    for i in range(0, len(addresses), CHUNK_SIZE):
+        chunk = addresses[i:i + CHUNK_SIZE]
+        for start in range(from_block, to_block + 1, LOGS_CHUNK):
+            end = min(start + LOGS_CHUNK - 1, to_block)
+            logs = rpcbatch.getLogs(
+                web3, {"address": chunk, "topics": [topic0]}, start, end)
+            if not logs:
+                continue
+            blocks = sorted({log["blockNumber"] for log in logs})
+            calls = [("eth_getBlockByNumber", [b, False]) for b in blocks]
+            timestamps = {b: int(r["timestamp"], 16) for b, r in zip(
+                blocks, rpcbatch.results(rpcbatch.batchRequest(web3, calls)))}
+            yield [{"block": int(log["blockNumber"], 16),
+                    "timestamp": timestamps[log["blockNumber"]],
+                    "tx_hash": log["transactionHash"],
+                    "log_index": int(log["logIndex"], 16),
+                    "emitter": to_checksum_address(log["address"]),
+                    "topic1": _topicAddress(log["topics"][1]),
+                    "topic2": _topicAddress(log["topics"][2]),
+                    "amount": _decode("uint256", log["data"])}
+                   for log in logs]
+
+
+def _topicAddress(topic: str) -> str:
+    return to_checksum_address("0x" + topic[-40:])
@@ -0,0 +1,100 @@
+"""Differential fuzzing of the vesting contracts against util/vesting.py.
+
+Cases are random, but biased towards edges: powers of two and their
+neighbours, `t % h` boundaries, and timestamps right around `start` and
+`start + duration`. Each case is an eth_call to a wallet (or to the pure
+`getAmount`). The calls go many per eth_call through the Multicall
+contract, so thousands of cases take a few round trips, not one tx each.
+A case matches if the contract and the model give the same amount, or if
+both revert.
+"""
+import random
+from typing import List, Optional
+
+from util import abi, vesting
+
+BATCH_SIZE = 500  # cases per Multicall.tryAggregate
+UINT64_MAX = 2**64 - 1
+HALVING_MAX_START_AHEAD = 3000 * 24 * 60 * 60
+
+
+def edgeInt(rng: random.Random, max_bits: int) -> int:
+    """Random int in [0, 2**max_bits), often near a power of two"""
+    bits = rng.randint(0, max_bits)
+    choice = rng.random()
+    if choice < 0.3:
+        return min(2**bits, 2**max_bits - 1)
+    if choice < 0.6:
+        return max(0, min(2**bits + rng.choice([-1, 1]), 2**max_bits - 1))
+    return rng.randrange(2**bits) if bits else 0
+
+
+def getAmountCases(rng: random.Random, n: int) -> List[tuple]:
+    """(value, t, h) for VestingWalletHalving.getAmount"""
+    cases = []
+    for _ in range(n):
+        value = edgeInt(rng, 256)
+        h = edgeInt(rng, rng.choice([8, 32, 64, 256]))
+        if h and rng.random() < 0.5:  # land on, or next to, a halving
+            t = h * edgeInt(rng, 9) + rng.choice([-1, 0, 1, h - 1])
+        else:
+            t = edgeInt(rng, rng.choice([8, 32, 64, 256]))
+        cases.append((value, max(0, min(t, vesting.UINT256_MAX)), h))
+    return cases
+
+
+def walletParams(rng: random.Random, wallet_type: str, now: int) -> dict:
+    """Constructor params for a wallet that its constructor accepts"""
+    if wallet_type == "exp":
+        # constructor wants start in [block time, block time + 3000 days]
+        return {"start": now + rng.choice(
+                    [60, 61, rng.randrange(60, HALVING_MAX_START_AHEAD - 60)]),
+                "half_life": max(1, edgeInt(rng, rng.choice([8, 32, 64]))),
+                "duration": max(1, edgeInt(rng, rng.choice([16, 40, 256])))}
+    return {"start": rng.choice([0, 1, now, edgeInt(rng, 63)]),
+            "duration": edgeInt(rng, rng.choice([8, 32, 63])),
+            "half_life": 0}
+
+
+def timestamps(rng: random.Random, params: dict, n: int) -> List[int]:
+    """uint64 timestamps to evaluate a wallet at: its edges, and random"""
+    start, duration = params["start"], params["duration"]
+    end = start + duration
+    ts = [start - 1, start, start + 1, end - 1, end, end + 1, 0, UINT64_MAX]
+    h = params["half_life"]
+    if h:
+        ts += [start + h * k + d for k in range(1, 4) for d in (-1, 0, 1)]
+    while len(ts) < n:
+        ts.append(rng.choice([start + rng.randrange(duration + 2),
+                              start + edgeInt(rng, 64), edgeInt(rng, 64)]))
+    return [t for t in ts if 0 <= t <= UINT64_MAX][:n]
+
+
+def model(func, *args) -> Optional[int]:
+    """func(*args), or None where the contract would revert"""
+    try:
+        return func(*args)
+    except (OverflowError, ZeroDivisionError):
+        return None
+
+
+def evaluate(multicall, calls: List[tuple]) -> List[Optional[int]]:
+    """Run (target, signature, args) view calls through `multicall`, in
+    batches. Returns the uint256 result of each, or None if it reverted."""
+    results = []
+    for i in range(0, len(calls), BATCH_SIZE):
+        batch = [(target, abi.encodeCall(signature, args))
+                 for target, signature, args in calls[i:i + BATCH_SIZE]]
+        for success, data in multicall.tryAggregate(batch):
+            if not success:
+                results.append(None)
+            else:
+                data = data if isinstance(data, str) else bytes(data).hex()
+                results.append(abi.decodeOutput(["uint256"], data)[0])
+    return results
+
+
+def mismatches(cases: List, expected: List, actual: List) -> List[tuple]:
+    """(case, model, contract) wherever they differ"""
+    return [(case, e, a) for case, e, a in zip(cases, expected, actual)
+            if e != a]
@@ -0,0 +1,128 @@
+"""Lightweight contract handles, for reading very many contracts.
+
+A brownie Contract per address parses its ABI and builds method objects
+every time: slow, and heavy in memory for tens of thousands of wallets.
+Here each contract type is parsed once into a ContractType, with function
+selectors and argument types precomputed. A Handle is just an address
+plus a pointer to that shared ContractType, in two slots.
+
+  ctype = handles.contractType(B, "VestingWalletLinear")
+  wallet = handles.Handle(address, ctype)
+  wallet.call(web3, "released(address)", token, block=12345)
+  calls = [h.request("beneficiary") for h in wallets]  # for rpcbatch
+
+Functions are named by name, or by signature where a name is overloaded.
+Handles are for reads; send txs through a brownie Contract as usual.
+"""
+from typing import Any, Dict, List
+
+from eth_utils import to_checksum_address
+
+from util import abi
+
+_types = {}  # (id(project), contract name) : ContractType
+
+
+class Function:
+    __slots__ = ("name", "signature", "selector", "input_types",
+                 "output_types")
+
+    def __init__(self, abi_entry: dict):
+        self.name = abi_entry["name"]
+        self.input_types = [_canonicalType(i) for i in abi_entry["inputs"]]
+        self.output_types = [_canonicalType(o)
+                             for o in abi_entry.get("outputs", [])]
+        self.signature = f"{self.name}({','.join(self.input_types)})"
+        self.selector = "0x" + abi.selector(self.signature).hex()
+
+    def encode(self, args) -> str:
+        """Calldata, as a hex string. Contracts and accounts (anything with
+        an .address) may be given for address args, as to a brownie
+        Contract."""
+        args = [getattr(a, "address", a) for a in args]
+        return self.selector + abi.encodeArgs(self.input_types, args).hex()
+
+    def decode(self, data) -> Any:
+        """Decode return data: one value, or a tuple if there are several.
+        Addresses come back checksummed, as from a brownie Contract."""
+        if not isinstance(data, str):  # HexBytes, from web3
+            data = "0x" + bytes(data).hex()
+        values = tuple(to_checksum_address(v) if t == "address" else v
+                       for t, v in zip(self.output_types,
+                                       abi.decodeOutput(self.output_types, data)))
+        return values[0] if len(values) == 1 else values
+
+
+class ContractType:
+    """Functions of one contract ABI, parsed once, shared by all handles"""
+    __slots__ = ("name", "functions")
+
+    def __init__(self, name: str, contract_abi: List[dict]):
+        self.name = name
+        self.functions = {}  # name or signature : Function
+        overloaded = set()
+        for entry in contract_abi:
+            if entry.get("type") != "function":
+                continue
+            function = Function(entry)
+            self.functions[function.signature] = function
+            if function.name in self.functions:
+                overloaded.add(function.name)
+            self.functions[function.name] = function
+        for name in overloaded:  # ambiguous: must use the signature
+            del self.functions[name]
+
+    def function(self, name: str) -> Function:
+        try:
+            return self.functions[name]
+        except KeyError:
+            raise AttributeError(
+                f"{self.name} has no function {name} (if it's overloaded, "
+                f"give the signature, eg 'released(address)')") from None
+
+
+def contractType(project, name: str) -> ContractType:
+    """The shared ContractType of `project`'s contract `name`"""
+    key = (id(project), name)
+    if key not in _types:
+        _types[key] = ContractType(name, getattr(project, name).abi)
+    return _types[key]
+
+
+class Handle:
+    """An address plus its shared ContractType. Made by the thousand, so
+    it holds nothing else."""
+    __slots__ = ("address", "ctype")
+
+    def __init__(self, address: str, ctype: ContractType):
+        self.address = address
+        self.ctype = ctype
+
+    def __repr__(self) -> str:
+        return f"<{self.ctype.name} handle {self.address}>"
+
+    def request(self, fn: str, *args, block="latest") -> tuple:
+        """(method, params) of an eth_call, eg for rpcbatch.batchRequest"""
+        tag = hex(block) if isinstance(block, int) else block
+        data = self.ctype.function(fn).encode(args)
+        return ("eth_call", [{"to": self.address, "data": data}, tag])
+
+    def call(self, web3, fn: str, *args, block="latest") -> Any:
+        """Call view function `fn` via web3, so middlewares apply"""
+        function = self.ctype.function(fn)
+        raw = web3.eth.call({"to": self.address,
+                             "data": function.encode(args)}, block)
+        return function.decode(raw)
+
+
+def handles(ctype: ContractType, addresses) -> List[Handle]:
+    return [Handle(address, ctype) for address in addresses]
+
+
+def _canonicalType(param: Dict) -> str:
+    """ABI type string of a param, with tuples spelled out: '(uint256,address)[]'"""
+    t = param["type"]
+    if t.startswith("tuple"):
+        inner = ",".join(_canonicalType(c) for c in param["components"])
+        return f"({inner}){t[len('tuple'):]}"
+    return t
@@ -0,0 +1,157 @@
+"""Historical vested/released time series of a wallet (`vw history`).
+
+Each point is read with eth_calls pinned to a past block, many points per
+JSON-RPC batch. Points are cached by block in the RPC cache (permanently,
+once the block is final). When the node lacks archive state for a block,
+`released` is rebuilt from the wallet's ERC20Released logs instead. Then
+`vested` is the schedule at that block's timestamp applied to today's
+allocation, which is exact unless the wallet was funded since.
+"""
+from typing import Iterator, List
+
+from util import abi, rpcbatch, rpccache
+
+VESTED_SIG = "vestedAmount(address,uint64)"
+RELEASED_SIG = "released(address)"
+RELEASED_EVENT = "ERC20Released(address,address,uint256)"
+BATCH_SIZE = 50  # points per batch; each point is 2 eth_calls
+# how nodes (geth, erigon, nethermind, besu, providers) say they've pruned
+# a block's state. Any other error is raised, not taken for missing state
+MISSING_STATE_ERRORS = [
+    "missing trie node", "header not found", "historical state",
+    "state not available", "state is not available", "state unavailable",
+    "pruned",
+]
+
+
+class HistoryError(Exception):
+    pass
+
+
+def isMissingState(error: dict) -> bool:
+    """Is a JSON-RPC error the node's way of saying it lacks a block's
+    state (a non-archive node), rather than eg a rate limit?"""
+    message = str(error.get("message", "")).lower()
+    return any(m in message for m in MISSING_STATE_ERRORS)
+
+
+def pointBlocks(from_block: int, to_block: int, step: int) -> List[int]:
+    blocks = list(range(from_block, to_block + 1, step))
+    if blocks and blocks[-1] != to_block:
+        blocks.append(to_block)
+    return blocks
+
+
+def walletHistory(web3, wallet: str, token: str, from_block: int,
+                  to_block: int, step: int,
+                  deploy_block: int = 0) -> Iterator[dict]:
+    """Yield one dict per point: block, timestamp, vested, released, source.
+    source is 'archive' (read at that block) or 'events' (see module doc).
+    Logs are scanned from `deploy_block`: give it, if known, to save reads"""
+    make_request = web3.provider.make_request
+    chain = rpccache.chainId(make_request)
+    head = int(make_request("eth_blockNumber", [])["result"], 16)
+    cache = rpccache.getCache()
+    released_logs = None  # [(block, amount)], fetched on first need
+
+    blocks = pointBlocks(from_block, to_block, step)
+    for i in range(0, len(blocks), BATCH_SIZE):
+        batch = blocks[i:i + BATCH_SIZE]
+        points = {}
+        for block in batch:
+            point = cache.get(_cacheKey(chain, wallet, token, block), "history")
+            if point is not None:
+                points[block] = point
+
+        todo = [b for b in batch if b not in points]
+        timestamps = _blockTimestamps(web3, todo)
+        calls = []
+        for block in todo:
+            calls.append(_ethCall(wallet, VESTED_SIG,
+                                  [token, timestamps[block]], block))
+            calls.append(_ethCall(wallet, RELEASED_SIG, [token], block))
+        responses = rpcbatch.batchRequest(web3, calls)
+
+        missing = []  # blocks the node has no state for
+        for j, block in enumerate(todo):
+            vested, released = responses[2 * j], responses[2 * j + 1]
+            errors = [r.get("error") or {"message": "no result"}
+                      for r in (vested, released)
+                      if "error" in r or r.get("result") is None]
+            if errors and all(isMissingState(e) for e in errors):
+                missing.append(block)
+                continue
+            if errors:
+                raise HistoryError(f"reading block {block}: "
+                                   f"{errors[0].get('message', errors[0])}")
+            points[block] = {"block": block, "timestamp": timestamps[block],
+                             "vested": _uint(vested["result"]),
+                             "released": _uint(released["result"]),
+                             "source": "archive"}
+            if block <= head - rpccache.FINALITY_DEPTH:
+                cache.put(_cacheKey(chain, wallet, token, block), chain, block,
+                          True, points[block])
+        if missing:
+            if released_logs is None:
+                released_logs = _releasedLogs(web3, wallet, token,
+                                              deploy_block, to_block)
+            for point in _pointsFromEvents(web3, wallet, token, missing,
+                                           timestamps, released_logs):
+                points[point["block"]] = point
+
+        for block in batch:
+            yield points[block]
+
+
+def _cacheKey(chain: str, wallet: str, token: str, block: int) -> str:
+    return f"{chain}|history|{wallet.lower()}|{token.lower()}|{block}"
+
+
+def _ethCall(to: str, signature: str, args: list, block) -> tuple:
+    data = abi.encodeCall(signature, args)
+    tag = hex(block) if isinstance(block, int) else block
+    return ("eth_call", [{"to": to, "data": data}, tag])
+
+
+def _uint(result) -> int:
+    if not isinstance(result, str):  # HexBytes, from web3
+        result = "0x" + bytes(result).hex()
+    if result == "0x":  # no code at that block: wallet not deployed yet
+        return 0
+    return abi.decodeOutput(["uint256"], result)[0]
+
+
+def _blockTimestamps(web3, blocks: List[int]) -> dict:
+    calls = [("eth_getBlockByNumber", [hex(b), False]) for b in blocks]
+    results = rpcbatch.results(rpcbatch.batchRequest(web3, calls))
+    missing = [b for b, r in zip(blocks, results) if r is None]
+    if missing:
+        raise HistoryError(f"can't read block {missing[0]}")
+    return {b: int(r["timestamp"], 16) for b, r in zip(blocks, results)}
+
+
+def _releasedLogs(web3, wallet: str, token: str, from_block: int,
+                  to_block: int) -> list:
+    """All ERC20Released(_, token, amount) logs of `wallet`, as
+    [(block, amount)]. Logs are served by non-archive nodes too."""
+    topics = [abi.eventTopic(RELEASED_EVENT), None, abi.topicAddress(token)]
+    logs = rpcbatch.getLogs(web3, {"address": wallet, "topics": topics},
+                            from_block, to_block)
+    return [(int(log["blockNumber"], 16), _uint(log["data"])) for log in logs]
+
+
+def _pointsFromEvents(web3, wallet: str, token: str, blocks: List[int],
+                      timestamps: dict, released_logs: list) -> List[dict]:
+    calls = [_ethCall(wallet, VESTED_SIG, [token, timestamps[b]], "latest")
+             for b in blocks]
+    vesteds = rpcbatch.results(rpcbatch.batchRequest(web3, calls))
+    points = []
+    for block, vested in zip(blocks, vesteds):
+        if vested is None:
+            raise HistoryError(f"can't read vestedAmount for block {block}")
+        released = sum(amt for log_block, amt in released_logs
+                       if log_block <= block)
+        points.append({"block": block, "timestamp": timestamps[block],
+                       "vested": _uint(vested), "released": released,
+                       "source": "events"})
+    return points
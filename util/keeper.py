@@ -0,0 +1,328 @@
+"""Release keeper: long-running process behind `vw keeper`.
+
+Watches new blocks and, per (wallet, token), computes the releasable amount
+locally from cached schedule params (see util/vesting.py). It sends
+`release(token)` only when the value released is worth at least
+`min_value_to_gas` times the gas it costs. It can then do the same for
+downstream Splitters.
+
+Config (JSON):
+  {
+    "wallets": [{"address": "0x..", "type": "exp", "tokens": ["0x.."]}],
+    "splitters": [{"address": "0x..", "tokens": ["0x.."]}],   #optional
+    "token_prices": {"0x..": 0.0004},  #ETH per whole token
+    "min_value_to_gas": 2.0,           #release if value >= this * gas cost
+    "priority_fee_gwei": 1.0,
+    "refresh_blocks": 100,             #re-read balances every N blocks
+    "poll_interval": 2.0               #seconds between new-block polls
+  }
+Tokens without a price are released whenever releasable > 0.
+
+State (schedule params, positions, gas estimates, last block) is saved to a
+JSON file after every block, so the keeper resumes where it left off.
+"""
+import asyncio
+import json
+import os
+import sys
+from typing import List, Optional
+
+from util import handles, metrics, signers, vesting
+
+DEFAULTS = {
+    "splitters": [],
+    "token_prices": {},
+    "min_value_to_gas": 2.0,
+    "priority_fee_gwei": 1.0,
+    "refresh_blocks": 100,
+    "poll_interval": 2.0,
+}
+
+
+def loadConfig(path: str) -> dict:
+    with open(path) as f:
+        config = dict(DEFAULTS, **json.load(f))
+    config["token_prices"] = {
+        addr.lower(): price for addr, price in config["token_prices"].items()}
+    return config
+
+
+def rollBackState(state_path: str, block: int) -> bool:
+    """Rewind a keeper state file to `block`, eg after the chain reverted.
+    Params & gas estimates are dropped too: redeploys may reuse addresses.
+    Returns False if there's no such file."""
+    if not os.path.exists(state_path):
+        return False
+    with open(state_path) as f:
+        state = json.load(f)
+    state["last_block"] = min(state["last_block"], block)
+    state["last_refresh"] = min(state.get("last_refresh", 0), block)
+    state["positions"] = {key: pos for key, pos in state["positions"].items()
+                          if pos["block"] <= block}
+    state["params"], state["gas"] = {}, {}
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp_path, state_path)
+    return True
+
+
+class Keeper:
+    """Releases vested funds from a set of wallets when it pays off.
+
+    `project` is the loaded brownie project, `web3` the connected web3
+    and `account` the account that signs releases."""
+
+    def __init__(self, project, web3, account, config: dict, state_path: str,
+                 pool: Optional[signers.SignerPool] = None):
+        self.project = project
+        self.web3 = web3
+        self.account = account
+        self.pool = pool or signers.single(account)
+        self.config = config
+        self.state_path = state_path
+        self.state = self._loadState()
+        self._contracts = {}
+
+    # ---------------------------------------------------------------------
+    # state
+    def _loadState(self) -> dict:
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                return json.load(f)
+        return {"last_block": 0, "last_refresh": 0, "params": {},
+                "positions": {}, "gas": {}}
+
+    def saveState(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(tmp_path, self.state_path)
+
+    # ---------------------------------------------------------------------
+    # reads
+    def _contract(self, name: str, address: str):
+        key = (name, address)
+        if key not in self._contracts:
+            self._contracts[key] = getattr(self.project, name).at(address)
+        return self._contracts[key]
+
+    def _wallet(self, wallet_cfg: dict):
+        contract_name = vesting.WALLET_CONTRACTS[wallet_cfg["type"]]
+        return self._contract(contract_name, wallet_cfg["address"])
+
+    def _handle(self, name: str, address: str) -> handles.Handle:
+        """For reads: no Contract object per wallet"""
+        return handles.Handle(address,
+                              handles.contractType(self.project, name))
+
+    def _walletHandle(self, wallet_cfg: dict) -> handles.Handle:
+        contract_name = vesting.WALLET_CONTRACTS[wallet_cfg["type"]]
+        return self._handle(contract_name, wallet_cfg["address"])
+
+    def params(self, wallet_cfg: dict) -> dict:
+        """Schedule params of a wallet. Immutable, so read once, ever"""
+        address = wallet_cfg["address"]
+        if address not in self.state["params"]:
+            wallet = self._walletHandle(wallet_cfg)
+            params = {"start": wallet.call(self.web3, "start"),
+                      "duration": wallet.call(self.web3, "duration"),
+                      "half_life": 0}
+            if wallet_cfg["type"] == "exp":
+                params["half_life"] = wallet.call(self.web3, "halfLife")
+            self.state["params"][address] = params
+        return self.state["params"][address]
+
+    def position(self, wallet_cfg: dict, token: str, block_number: int) -> dict:
+        """Allocation & released amount of `token` in a wallet. Re-read from
+        chain every `refresh_blocks`, since anyone may fund the wallet"""
+        key = f"{wallet_cfg['address']}|{token}"
+        pos = self.state["positions"].get(key)
+        if pos is None or \
+           block_number - pos["block"] >= self.config["refresh_blocks"]:
+            wallet = self._walletHandle(wallet_cfg)
+            released = wallet.call(self.web3, "released(address)", token)
+            balance = self._handle("Simpletoken", token).call(
+                self.web3, "balanceOf", wallet_cfg["address"])
+            pos = {"allocation": balance + released, "released": released,
+                   "block": block_number}
+            self.state["positions"][key] = pos
+        return pos
+
+    def releasable(self, wallet_cfg: dict, token: str, block: dict) -> int:
+        """Releasable amount at `block`, computed locally"""
+        params = self.params(wallet_cfg)
+        pos = self.position(wallet_cfg, token, block["number"])
+        vested = vesting.vestedAmount(
+            wallet_cfg["type"], pos["allocation"], block["timestamp"],
+            params["start"], params["duration"], params["half_life"])
+        return max(0, vested - pos["released"])
+
+    # ---------------------------------------------------------------------
+    # decisions
+    def gasPrice(self, block: dict) -> int:
+        base_fee = block.get("baseFeePerGas")
+        if base_fee is None:
+            return self.web3.eth.gas_price
+        return base_fee + int(self.config["priority_fee_gwei"] * 1e9)
+
+    def _gasEstimate(self, key: str, method_fn, token: str) -> int:
+        """Gas of `method_fn()(token)`, estimated once per refresh: gas
+        depends on balances. Only estimate where there's something to
+        release, else a release's early exit is what gets estimated.
+        `method_fn` is only called on a miss, so wallets get Contract
+        objects only if needed"""
+        if key not in self.state["gas"]:
+            self.state["gas"][key] = method_fn().estimate_gas(
+                token, {"from": self.account})
+        return self.state["gas"][key]
+
+    def worthIt(self, token: str, amount: int, gas: int, gas_price: int) -> bool:
+        """Is releasing `amount` of `token` worth `gas` at `gas_price`?"""
+        if amount <= 0:
+            return False
+        price = self.config["token_prices"].get(token.lower())
+        if price is None:
+            return True
+        value_wei = amount * price  # both tokens & ETH have 18 decimals
+        return value_wei >= self.config["min_value_to_gas"] * gas * gas_price
+
+    # ---------------------------------------------------------------------
+    # actions
+    def tick(self, block: dict) -> List[dict]:
+        """Process one new block: release everything that's worth it.
+        Returns one dict per release sent."""
+        gas_price = self.gasPrice(block)
+        due = []
+        for wallet_cfg in self.config["wallets"]:
+            for token in wallet_cfg["tokens"]:
+                amount = self.releasable(wallet_cfg, token, block)
+                if amount <= 0:
+                    continue
+                gas = self._gasEstimate(
+                    f"{wallet_cfg['address']}|{token}",
+                    lambda: self._wallet(wallet_cfg).release["address"], token)
+                if self.worthIt(token, amount, gas, gas_price):
+                    due.append((wallet_cfg, token,
+                                self._wallet(wallet_cfg).release["address"]))
+
+        # send all, then wait: txs from one block get mined together. With
+        # a signer pool, each wallet's releases go from one of its keys
+        sent = self.pool.send(
+            due, lambda d: self.pool.signerFor(d[0]["address"]),
+            lambda d, tx_params: d[2](d[1], tx_params))
+        releases = []
+        for (wallet_cfg, token, _), tx, error in sent:
+            if tx is None:
+                print(f"keeper: release not sent: {error}", file=sys.stderr)
+                continue
+            if not self.pool.wait(tx) or tx.status != 1:
+                print(f"keeper: release failed, tx {tx.txid}", file=sys.stderr)
+                continue
+            amount = tx.events["ERC20Released"]["amount"]
+            metrics.tokensReleased(wallet_cfg["address"], token, amount)
+            # re-read, not += amount: others (the beneficiary, `vw payout`)
+            # may have released too, and then releasable is overestimated
+            key = f"{wallet_cfg['address']}|{token}"
+            self.state["positions"][key]["released"] = \
+                self._walletHandle(wallet_cfg).call(
+                    self.web3, "released(address)", token,
+                    block=tx.block_number)
+            releases.append({"wallet": wallet_cfg["address"], "token": token,
+                             "amount": amount, "txid": tx.txid,
+                             "gas_used": tx.gas_used})
+
+        # not block % N: coalesced blocks would skip past refreshes
+        refresh = block["number"] - self.state.get("last_refresh", 0) >= \
+            self.config["refresh_blocks"]
+        if refresh:
+            self.state["gas"] = {}
+            self.state["last_refresh"] = block["number"]
+        if releases or refresh:
+            releases += self._releaseSplitters(gas_price)
+
+        self.state["last_block"] = block["number"]
+        self.saveState()
+        return releases
+
+    def _releaseSplitters(self, gas_price: int) -> List[dict]:
+        releases = []
+        for splitter_cfg in self.config["splitters"]:
+            splitter = self._contract("Splitter", splitter_cfg["address"])
+            for token in splitter_cfg["tokens"]:
+                balance = self._handle("Simpletoken", token).call(
+                    self.web3, "balanceOf", splitter_cfg["address"])
+                if balance <= 1:  # release keeps 1 wei: nothing to do
+                    continue
+                gas = self._gasEstimate(
+                    f"{splitter_cfg['address']}|{token}",
+                    lambda: splitter.release, token)
+                if not self.worthIt(token, balance - 1, gas, gas_price):
+                    continue
+                try:
+                    tx = splitter.release(
+                        token, self.pool.txParams(self.account))
+                except Exception:
+                    self.pool.resync(self.account)
+                    raise
+                if not self.pool.wait(tx) or tx.status != 1:
+                    print(f"keeper: splitter release failed, tx {tx.txid}",
+                          file=sys.stderr)
+                    continue
+                releases.append({"splitter": splitter_cfg["address"],
+                                 "token": token, "amount": balance - 1,
+                                 "txid": tx.txid, "gas_used": tx.gas_used})
+        return releases
+
+    # ---------------------------------------------------------------------
+    # main loop
+    async def run(self, max_blocks: Optional[int] = None):
+        """Process new blocks as they arrive. If several arrive while busy,
+        only the newest is processed. Errors, eg a flaky RPC endpoint, are
+        logged, and the keeper goes on with the next block."""
+        loop = asyncio.get_running_loop()
+        new_blocks = asyncio.Queue()
+        watcher = asyncio.ensure_future(self._watchBlocks(new_blocks))
+        n_done = 0
+        try:
+            while max_blocks is None or n_done < max_blocks:
+                block_number = await new_blocks.get()
+                while not new_blocks.empty():
+                    block_number = new_blocks.get_nowait()
+                try:
+                    block = await loop.run_in_executor(
+                        None, self.web3.eth.get_block, block_number)
+                    releases = await loop.run_in_executor(
+                        None, self.tick, block)
+                except Exception as e:  # pylint: disable=broad-except
+                    print(f"keeper: block {block_number} failed, will retry:"
+                          f" {type(e).__name__}: {e}", file=sys.stderr)
+                    await asyncio.sleep(self.config["poll_interval"])
+                    if new_blocks.empty():  # else: a newer block covers it
+                        new_blocks.put_nowait(block_number)
+                    continue
+                for r in releases:
+                    print(f"block {block_number}: released {r['amount']} of "
+                          f"{r['token']} from {r.get('wallet', r.get('splitter'))}"
+                          f" (gas {r['gas_used']})")
+                n_done += 1
+        finally:
+            watcher.cancel()
+
+    async def _watchBlocks(self, new_blocks: asyncio.Queue):
+        """Put numbers of unseen blocks on `new_blocks`"""
+        loop = asyncio.get_running_loop()
+        last = self.state["last_block"]
+        while True:
+            try:
+                head = await loop.run_in_executor(
+                    None, lambda: self.web3.eth.block_number)
+            except Exception as e:  # pylint: disable=broad-except
+                print(f"keeper: can't read head block, will retry: "
+                      f"{type(e).__name__}: {e}", file=sys.stderr)
+                await asyncio.sleep(self.config["poll_interval"])
+                continue
+            if head > last:
+                await new_blocks.put(head)
+                last = head
+            await asyncio.sleep(self.config["poll_interval"])
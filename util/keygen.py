@@ -0,0 +1,88 @@
+"""Offline key generation for `vw newacct`: no chain connection needed.
+
+Keys are generated in chunks across worker processes. Encrypting to a
+keystore (scrypt) is CPU-heavy, so it happens in the workers too.
+"""
+import csv
+import json
+import multiprocessing
+import os
+import secrets
+from typing import Iterator, Optional, Tuple
+
+from eth_account import Account
+
+CHUNK_SIZE = 256
+
+
+def newKey() -> Tuple[str, str]:
+    """Return (address, private key hex) of a fresh random key"""
+    while True:
+        try:
+            account = Account.from_key(secrets.token_bytes(32))
+        except ValueError:  # key >= secp256k1 order; ~never happens
+            continue
+        return account.address, "0x" + bytes(account.key).hex()
+
+
+def _makeKeys(args: Tuple[int, Optional[str]]) -> list:
+    """Worker: make `n` keys. If `password` isn't None, also encrypt each
+    to a keystore dict. Returns list of (address, private key, keystore)"""
+    n, password = args
+    keys = []
+    for _ in range(n):
+        address, private_key = newKey()
+        keystore = Account.encrypt(private_key, password) \
+            if password is not None else None
+        keys.append((address, private_key, keystore))
+    return keys
+
+
+def generateKeys(count: int, password: Optional[str] = None,
+                 processes: Optional[int] = None) -> Iterator[tuple]:
+    """Yield `count` (address, private key, keystore) tuples, made in parallel.
+    keystore is None unless `password` is given."""
+    chunks = [CHUNK_SIZE] * (count // CHUNK_SIZE)
+    if count % CHUNK_SIZE:
+        chunks.append(count % CHUNK_SIZE)
+    if len(chunks) <= 1 and password is None:  # not worth a pool
+        yield from _makeKeys((count, None))
+        return
+    with multiprocessing.Pool(processes) as pool:
+        for keys in pool.imap_unordered(
+                _makeKeys, [(n, password) for n in chunks]):
+            yield from keys
+
+
+def _openPrivate(path: str):
+    """Open `path` for writing, readable by the owner only"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)  # the mode above only applies to a new file
+    return os.fdopen(fd, "w", newline="")
+
+
+def writeCsv(path: str, keys: Iterator[tuple]) -> int:
+    """Write address,private_key rows to `path`. Returns # rows"""
+    n = 0
+    with _openPrivate(path) as f:
+        writer = csv.writer(f)
+        writer.writerow(["address", "private_key"])
+        for address, private_key, _ in keys:
+            writer.writerow([address, private_key])
+            n += 1
+    return n
+
+
+def writeKeystores(directory: str, keys: Iterator[tuple]) -> int:
+    """Write one encrypted keystore JSON per key into `directory`, named by
+    address. Brownie can load them: accounts.load(path). Returns # files.
+    Raises ValueError on a key without a keystore, rather than lose it."""
+    os.makedirs(directory, exist_ok=True)
+    n = 0
+    for address, _, keystore in keys:
+        if keystore is None:
+            raise ValueError(f"no keystore for {address}: no password given")
+        with _openPrivate(os.path.join(directory, f"{address}.json")) as f:
+            json.dump(keystore, f)
+        n += 1
+    return n
@@ -0,0 +1,302 @@
+"""Open-loop transaction load generator, behind `vw loadtest`.
+
+A scenario (YAML) gives the mix of operations and the rate to start them:
+
+  rate: 5                      #operations started per second, all kinds
+  duration: 60                 #seconds of load
+  interval: 10                 #seconds per row of the time series
+  seed: 1
+  splitter_payees: [2, 10, 50] #one Splitter per entry; new wallets vest to them
+  initial_wallets: 10          #deployed & funded before the load starts
+  tx_timeout: 60               #seconds; an op not mined by then has failed
+  mix:                         #relative weights
+    new_cliff: 1
+    new_lin: 1
+    new_exp: 1
+    transfer: 3                #fund a random wallet
+    release: 3                 #release a random wallet
+    splitter_release: 1        #release a random Splitter to its payees
+
+Open loop: start times are drawn up front, as Poisson arrivals at `rate`.
+Each op starts at its time whether or not earlier ones are confirmed, like
+independent users would. If no worker is free, the op starts late, and
+its lag is reported: overload shows up, rather than quietly lowering the
+rate.
+
+Txs carry fixed gas limits and explicit nonces (util/signers.py), so no
+estimate can fail before a tx is sent and leave a nonce gap. A revert is
+mined, and counted as failed. If a send fails anyway (say the node answers
+429), its key's nonce is re-read, so the gap gets filled; and an op not
+mined within tx_timeout fails, rather than hanging the run.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import random
+import threading
+import time
+from typing import Callable, Dict, List
+
+from eth_utils import to_checksum_address
+import yaml
+
+from util import handles, stats, vesting
+from util.base18 import toBase18
+
+OPS = ["new_cliff", "new_lin", "new_exp", "transfer", "release",
+       "splitter_release"]
+DEFAULTS = {
+    "rate": 5.0,
+    "duration": 60.0,
+    "interval": 10.0,
+    "seed": 0,
+    "splitter_payees": [2, 10, 50],
+    "initial_wallets": 10,
+    "workers": 64,
+    "tx_timeout": 60.0,
+    "mix": {op: 1 for op in OPS},
+}
+GAS_LIMITS = {"new_cliff": 1_500_000, "new_lin": 1_500_000,
+              "new_exp": 1_500_000, "transfer": 100_000, "release": 150_000}
+SPLITTER_GAS_BASE, SPLITTER_GAS_PER_PAYEE = 80_000, 45_000
+WALLET_DURATION = 600  # seconds: wallets vest within a run
+TRANSFER_AMOUNT = toBase18(1.0)
+
+
+class LoadTestError(Exception):
+    pass
+
+
+def loadScenario(path: str) -> dict:
+    with open(path) as f:
+        scenario = dict(DEFAULTS, **(yaml.safe_load(f) or {}))
+    unknown = set(scenario["mix"]) - set(OPS)
+    if unknown:
+        raise LoadTestError(f"unknown ops in mix: {sorted(unknown)}")
+    if not any(w > 0 for w in scenario["mix"].values()):
+        raise LoadTestError("mix has no ops")
+    if scenario["rate"] <= 0 or scenario["duration"] <= 0:
+        raise LoadTestError("rate and duration must be > 0")
+    if not scenario["splitter_payees"]:
+        raise LoadTestError("need at least one splitter")
+    return scenario
+
+
+def arrivals(rate: float, duration: float, mix: Dict[str, float],
+             seed: int) -> List[tuple]:
+    """[(seconds from start, op)]: Poisson arrivals, ops drawn from `mix`"""
+    rng = random.Random(seed)
+    kinds = [k for k, w in mix.items() if w > 0]
+    weights = [mix[k] for k in kinds]
+    t, out = 0.0, []
+    while True:
+        t += rng.expovariate(rate)
+        if t >= duration:
+            return out
+        out.append((t, rng.choices(kinds, weights)[0]))
+
+
+# ========================================================================
+# running
+class LoadTest:
+    """Targets of a load test (token, splitters, wallets) and its ops.
+
+    `pool` is a signers.SignerPool, with web3, whose keys hold tokens."""
+
+    def __init__(self, project, web3, pool, token: str, splitters: List[dict],
+                 wallets: List[str], seed: int = 0,
+                 tx_timeout: float = DEFAULTS["tx_timeout"]):
+        self.project = project
+        self.web3 = web3
+        self.pool = pool
+        self.token = token
+        self.splitters = splitters  # [{"address", "payees"}]
+        self.wallets = list(wallets)
+        self.tx_timeout = tx_timeout
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._time_offset = web3.eth.get_block("latest")["timestamp"] - \
+            time.time()
+        token_type = handles.contractType(project, "Simpletoken")
+        wallet_type = handles.contractType(project, "VestingWalletLinear")
+        splitter_type = handles.contractType(project, "Splitter")
+        self._calldata = {
+            "transfer": lambda to: token_type.function("transfer").encode(
+                [to, TRANSFER_AMOUNT]),
+            "release": lambda _: wallet_type.function(
+                "release(address)").encode([token]),
+            "splitter_release": lambda _: splitter_type.function(
+                "release").encode([token]),
+        }
+
+    @classmethod
+    def setUp(cls, project, web3, pool, funder, scenario: dict) -> "LoadTest":
+        """Deploy the token & splitters, give each signer tokens, and deploy
+        & fund the initial wallets. Done from `funder`, tx by tx."""
+        params = {"from": funder}
+        n_wallets = scenario["initial_wallets"]
+        supply = toBase18(1e9)
+        token = project.Simpletoken.deploy("LOAD", "Load Test Token", 18,
+                                           supply, params)
+        for address in pool.addresses:
+            token.transfer(address, supply // (2 * len(pool)), params)
+        splitters = []
+        for i, n_payees in enumerate(scenario["splitter_payees"]):
+            payees = [to_checksum_address(f"0x{(i + 1) << 32 | (j + 1):040x}")
+                      for j in range(n_payees)]
+            splitter = project.Splitter.deploy(payees, [1] * n_payees, params)
+            splitters.append({"address": splitter.address,
+                              "payees": n_payees})
+        wallets = []
+        start = web3.eth.get_block("latest")["timestamp"]
+        for i in range(n_wallets):
+            beneficiary = splitters[i % len(splitters)]["address"]
+            wallet = project.VestingWalletLinear.deploy(
+                beneficiary, start, WALLET_DURATION, params)
+            token.transfer(wallet, TRANSFER_AMOUNT * 10, params)
+            wallets.append(wallet.address)
+        return cls(project, web3, pool, token.address, splitters, wallets,
+                   scenario["seed"], scenario["tx_timeout"])
+
+    def _pick(self, items: list):
+        with self._lock:
+            return self._rng.choice(items) if items else None
+
+    def send(self, kind: str):
+        """Send one op of `kind`, without waiting. Returns (label, tx, on_ok),
+        where on_ok() is called once the tx succeeds. If the send fails, the
+        signer's nonce is re-synced, so its later txs don't wait on a gap"""
+        account = self._pick(self.pool.accounts)
+        try:
+            return self._send(kind, account, self.pool.txParams(account))
+        except Exception:
+            self.pool.resync(account)
+            raise
+
+    def _send(self, kind: str, account, params: dict):
+        if kind.startswith("new_"):
+            wallet_type = kind[len("new_"):]
+            container = getattr(
+                self.project, vesting.WALLET_CONTRACTS[wallet_type])
+            beneficiary = self._pick(self.splitters)["address"]
+            start = int(time.time() + self._time_offset)
+            args = [beneficiary, start, WALLET_DURATION] \
+                if wallet_type != "exp" else \
+                [beneficiary, start, WALLET_DURATION // 10, WALLET_DURATION]
+            tx = container.deploy(*args, dict(
+                params, gas_limit=GAS_LIMITS[kind], allow_revert=True))
+
+            def on_ok():
+                with self._lock:
+                    self.wallets.append(tx.contract_address)
+            return kind, tx, on_ok
+
+        if kind == "splitter_release":
+            splitter = self._pick(self.splitters)
+            to, label = splitter["address"], \
+                f"splitter_release[{splitter['payees']} payees]"
+            gas = SPLITTER_GAS_BASE + SPLITTER_GAS_PER_PAYEE * \
+                splitter["payees"]
+            data = self._calldata[kind](None)
+        else:  # transfer to a wallet, or release one
+            wallet = self._pick(self.wallets)
+            if wallet is None:
+                raise LoadTestError("no wallets yet")
+            to = self.token if kind == "transfer" else wallet
+            label, gas = kind, GAS_LIMITS[kind]
+            data = self._calldata[kind](wallet)
+        tx = account.transfer(to, 0, gas_limit=gas, data=data,
+                              nonce=params.get("nonce"), required_confs=0,
+                              allow_revert=True, silent=True)
+        return label, tx, None
+
+    def run(self, plan: List[tuple], workers: int,
+            on_record: Callable = None) -> List[dict]:
+        """Start each (t, kind) of `plan` at t seconds from now, and see it
+        through confirmation. Returns one record per op."""
+        records = []
+        records_lock = threading.Lock()
+
+        def runOp(t: float, kind: str, t0: float):
+            rec = {"kind": kind, "scheduled": t,
+                   "lag": time.perf_counter() - t0 - t, "status": None,
+                   "latency": None, "gas_used": None, "error": None}
+            sent = time.perf_counter()
+            try:
+                label, tx, on_ok = self.send(kind)
+                rec["kind"] = label
+                if not self.pool.wait(tx, self.tx_timeout):
+                    raise LoadTestError(
+                        f"not mined within {self.tx_timeout:g} s")
+                rec["latency"] = time.perf_counter() - sent
+                rec["status"], rec["gas_used"] = tx.status, tx.gas_used
+                if tx.status == 1 and on_ok is not None:
+                    on_ok()
+            except Exception as e:  # pylint: disable=broad-except
+                rec["error"] = f"{type(e).__name__}: {e}"[:200]
+            with records_lock:
+                records.append(rec)
+            if on_record is not None:
+                on_record(rec)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            t0 = time.perf_counter()
+            for t, kind in plan:
+                delay = t0 + t - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(runOp, t, kind, t0)
+        return sorted(records, key=lambda r: r["scheduled"])
+
+
+# ========================================================================
+# reporting
+def _latencySummary(values: List[float]) -> dict:
+    return dict(stats.summarize(values), p99=stats.percentile(values, 99))
+
+
+def report(records: List[dict], duration: float, interval: float) -> dict:
+    """Throughput, latency & gas per op kind, errors over time"""
+    def ok(r):
+        return r["status"] == 1
+
+    kinds = {}
+    for r in records:
+        kinds.setdefault(r["kind"], []).append(r)
+    by_kind = {}
+    for kind, rs in sorted(kinds.items()):
+        gas = [r["gas_used"] for r in rs if ok(r)]
+        by_kind[kind] = {
+            "started": len(rs),
+            "ok": sum(ok(r) for r in rs),
+            "reverted": sum(r["status"] == 0 for r in rs),
+            "errors": sum(r["error"] is not None for r in rs),
+            "ok_per_min": 60.0 * sum(ok(r) for r in rs) / duration,
+            "latency_s": _latencySummary(
+                [r["latency"] for r in rs if r["latency"] is not None]),
+            "gas": stats.summarize(gas),
+        }
+
+    n_buckets = max(1, int(-(-duration // interval)))
+    series = []
+    for i in range(n_buckets):
+        rs = [r for r in records
+              if i * interval <= r["scheduled"] < (i + 1) * interval]
+        latencies = [r["latency"] for r in rs if r["latency"] is not None]
+        series.append({
+            "t": i * interval, "started": len(rs),
+            "ok": sum(ok(r) for r in rs),
+            "failed": sum(not ok(r) for r in rs),
+            "p95_latency_s": stats.percentile(latencies, 95),
+        })
+
+    n_ok = sum(ok(r) for r in records)
+    return {
+        "started": len(records),
+        "ok": n_ok,
+        "failed": len(records) - n_ok,
+        "offered_per_min": 60.0 * len(records) / duration,
+        "ok_per_min": 60.0 * n_ok / duration,
+        "start_lag_s": _latencySummary([r["lag"] for r in records]),
+        "kinds": by_kind,
+        "series": series,
+        "errors": sorted({r["error"] for r in records if r["error"]})[:10],
+    }
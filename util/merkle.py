@@ -0,0 +1,179 @@
+"""Merkle trees of vesting grants, for contracts/VestingVault.sol.
+
+Built in a streaming fashion: the grants CSV is read one row at a time,
+and each tree level is a file of 32-byte hashes made from the level
+below. Memory use stays flat for any number of grants. Proofs are read
+back from the level files with one seek per level.
+
+A tree directory holds:
+  grants.csv   -- the grants, numbered, amounts in wei
+  level_N.bin  -- hashes of level N; level_0 are the leaves
+  tree.json    -- root, # grants, total allocation
+
+A grant's index is its row number in the grants CSV. The vault tracks
+amounts released per index, so when republishing, keep every grant on its
+row: edit rows in place and add new ones at the end. To end a grant, set
+its allocation to what was already released, rather than deleting the row.
+"""
+import csv
+import json
+import os
+from typing import Iterator, List, Optional
+
+from eth_utils import keccak
+
+from util import abi
+from util.base18 import toBase18Exact
+
+SCHEDULE_TYPES = {"cliff": 0, "lin": 1, "exp": 2}
+GRANT_TYPES = ["uint256", "address", "uint8", "uint64", "uint256", "uint256",
+               "uint256"]
+GRANT_FIELDS = ["index", "beneficiary", "type", "start", "duration",
+                "half_life", "allocation_wei"]
+CSV_FIELDS = ["beneficiary", "type", "start", "duration", "half_life",
+              "allocation"]
+READ_CHUNK = 2048  # hashes per read
+
+
+class MerkleError(Exception):
+    pass
+
+
+def readGrants(path: str) -> Iterator[dict]:
+    """Yield grants from a CSV with header: beneficiary,type,start,duration,
+    half_life,allocation. Allocation is in tokens, like `vw transfer`."""
+    with open(path, newline="") as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            missing = [k for k in CSV_FIELDS if not row.get(k)
+                       and not (k == "half_life" and row.get("type") != "exp")]
+            if missing:
+                raise MerkleError(f"row {i + 1} lacks {missing}")
+            if row["type"] not in SCHEDULE_TYPES:
+                raise MerkleError(f"row {i + 1}: unknown type {row['type']}")
+            yield {"index": i, "beneficiary": row["beneficiary"],
+                   "type": row["type"], "start": int(row["start"]),
+                   "duration": int(row["duration"]),
+                   "half_life": int(row.get("half_life") or 0),
+                   "allocation_wei": toBase18Exact(row["allocation"])}
+
+
+def grantTuple(grant: dict) -> tuple:
+    """The grant as VestingVault's Grant struct"""
+    return (grant["index"], grant["beneficiary"],
+            SCHEDULE_TYPES[grant["type"]], grant["start"], grant["duration"],
+            grant["half_life"], grant["allocation_wei"])
+
+
+def leafHash(grant: dict) -> bytes:
+    """keccak256(keccak256(abi.encode(grant))), as VestingVault.leafHash"""
+    return keccak(keccak(abi.encodeArgs(GRANT_TYPES, grantTuple(grant))))
+
+
+def hashPair(a: bytes, b: bytes) -> bytes:
+    """Parent of two nodes, sorted first, as OpenZeppelin's MerkleProof"""
+    return keccak(a + b) if a < b else keccak(b + a)
+
+
+# ========================================================================
+# building
+def buildTree(csv_path: str, directory: str) -> dict:
+    """Build the tree of the grants in `csv_path` into `directory`.
+    Returns tree info: root, n_grants, total_allocation_wei."""
+    os.makedirs(directory, exist_ok=True)
+    n, total = 0, 0
+    with open(_levelPath(directory, 0), "wb") as leaves, \
+            open(os.path.join(directory, "grants.csv"), "w", newline="") as g:
+        writer = csv.writer(g)
+        writer.writerow(GRANT_FIELDS)
+        for grant in readGrants(csv_path):
+            leaves.write(leafHash(grant))
+            writer.writerow([grant[k] for k in GRANT_FIELDS])
+            n += 1
+            total += grant["allocation_wei"]
+    if n == 0:
+        raise MerkleError("no grants")
+
+    level, width = 0, n
+    while width > 1:
+        with open(_levelPath(directory, level), "rb") as src, \
+                open(_levelPath(directory, level + 1), "wb") as dst:
+            for nodes in _readChunks(src):
+                for i in range(0, len(nodes) - 1, 2):
+                    dst.write(hashPair(nodes[i], nodes[i + 1]))
+                if len(nodes) % 2:  # only the last chunk can be odd
+                    dst.write(nodes[-1])  # promote the unpaired node
+        level, width = level + 1, (width + 1) // 2
+
+    with open(_levelPath(directory, level), "rb") as f:
+        root = "0x" + f.read(32).hex()
+    info = {"root": root, "n_grants": n, "total_allocation_wei": str(total),
+            "depth": level}
+    with open(os.path.join(directory, "tree.json"), "w") as f:
+        json.dump(info, f, indent=1)
+    return info
+
+
+def _levelPath(directory: str, level: int) -> str:
+    return os.path.join(directory, f"level_{level}.bin")
+
+
+def _readChunks(f) -> Iterator[List[bytes]]:
+    """Hashes of a level file, READ_CHUNK at a time (an even number)"""
+    while True:
+        data = f.read(32 * READ_CHUNK)
+        if not data:
+            return
+        yield [data[i:i + 32] for i in range(0, len(data), 32)]
+
+
+# ========================================================================
+# proofs
+def loadInfo(directory: str) -> dict:
+    with open(os.path.join(directory, "tree.json")) as f:
+        return json.load(f)
+
+
+def findGrants(directory: str, beneficiary: str) -> Iterator[dict]:
+    """Grants of `beneficiary` in a built tree"""
+    with open(os.path.join(directory, "grants.csv"), newline="") as f:
+        for row in csv.DictReader(f):
+            if row["beneficiary"].lower() == beneficiary.lower():
+                yield {k: row[k] if k in ["beneficiary", "type"]
+                       else int(row[k]) for k in GRANT_FIELDS}
+
+
+def proof(directory: str, index: int) -> List[str]:
+    """Proof for leaf `index`: one sibling per level, where it has one"""
+    info = loadInfo(directory)
+    depth, width = info["depth"], info["n_grants"]
+    hashes = []
+    for level in range(depth):
+        sibling = index ^ 1
+        if sibling < width:
+            hashes.append("0x" + _readNode(directory, level, sibling).hex())
+        index, width = index // 2, (width + 1) // 2
+    return hashes
+
+
+def _readNode(directory: str, level: int, i: int) -> bytes:
+    with open(_levelPath(directory, level), "rb") as f:
+        f.seek(32 * i)
+        return f.read(32)
+
+
+def verify(root: str, leaf: bytes, proof_hashes: List[str]) -> bool:
+    node = leaf
+    for h in proof_hashes:
+        node = hashPair(node, bytes.fromhex(h.replace("0x", "")))
+    return "0x" + node.hex() == root.lower()
+
+
+def grantWithProof(directory: str, grant: dict,
+                   root: Optional[str] = None) -> dict:
+    """JSON-friendly grant, its leaf & proof. Checks the proof vs `root`"""
+    hashes = proof(directory, grant["index"])
+    leaf = leafHash(grant)
+    if not verify(root or loadInfo(directory)["root"], leaf, hashes):
+        raise MerkleError(f"proof of grant {grant['index']} doesn't verify")
+    return dict(grant, allocation_wei=str(grant["allocation_wei"]),
+                leaf="0x" + leaf.hex(), proof=hashes)
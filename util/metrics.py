@@ -0,0 +1,297 @@
+"""Opt-in Prometheus metrics for long-running vw processes.
+
+`vw --metrics-port=PORT ...` serves the text exposition format at
+http://127.0.0.1:PORT/metrics. `vw --metrics-file=PATH ...` writes it to PATH
+periodically and at exit, for node_exporter's textfile collector.
+
+Metrics:
+  vw_rpc_requests_total{method,status}       counter
+  vw_rpc_latency_seconds{method}             histogram
+  vw_txs_total{function,status}              counter: sent, confirmed, failed
+  vw_tx_gas_used{function}                   histogram
+  vw_tokens_released_total{wallet,token}     counter, in tokens
+  vw_cache_requests_total{kind,result}       counter: hit, miss
+  vw_nonce_gap                               gauge: pending - mined nonce
+
+Until enabled, every update is one global check. Once enabled, it is a
+dict update under a lock. Cache counts and the nonce gap are collected at
+scrape time, so they cost nothing on the hot path.
+"""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+_enabled = False
+_lock = threading.Lock()
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0]
+GAS_BUCKETS = [25000, 50000, 100000, 200000, 500000, 1000000, 3000000,
+               10000000]
+FILE_INTERVAL = 15.0  # seconds between textfile writes
+
+SEND_METHODS = ["eth_sendTransaction", "eth_sendRawTransaction"]
+
+
+class _Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name, self.help = name, help_text
+        self.values = {}  # sorted label items : value
+
+    def inc(self, labels: tuple, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[Tuple[str, tuple, float]]:
+        return [(self.name, labels, v) for labels, v in self.values.items()]
+
+
+class _Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: List[float]):
+        self.name, self.help, self.buckets = name, help_text, buckets
+        self.values = {}  # labels : [bucket counts.., sum, count]
+
+    def observe(self, labels: tuple, value: float):
+        v = self.values.get(labels)
+        if v is None:
+            v = self.values[labels] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                v[i] += 1
+        v[-2] += value
+        v[-1] += 1
+
+    def samples(self) -> List[Tuple[str, tuple, float]]:
+        out = []
+        for labels, v in self.values.items():
+            for bound, n in zip(self.buckets, v):
+                out.append((self.name + "_bucket",
+                            labels + (("le", repr(float(bound))),), n))
+            out.append((self.name + "_bucket", labels + (("le", "+Inf"),),
+                        v[-1]))
+            out.append((self.name + "_sum", labels, v[-2]))
+            out.append((self.name + "_count", labels, v[-1]))
+        return out
+
+
+_METRICS = {m.name: m for m in [
+    _Counter("vw_rpc_requests_total", "JSON-RPC requests sent to the node"),
+    _Histogram("vw_rpc_latency_seconds", "JSON-RPC request latency",
+               LATENCY_BUCKETS),
+    _Counter("vw_txs_total", "Transactions by function and status"),
+    _Histogram("vw_tx_gas_used", "Gas used by confirmed transactions",
+               GAS_BUCKETS),
+    _Counter("vw_tokens_released_total", "Tokens released, per wallet"),
+]}
+
+# name : (kind, help, fn returning [(labels dict, value)]), run at scrape time
+_collectors = {}
+_tx_functions = {}  # tx hash : function label, for txs awaiting receipt
+_selector_names = {}  # '0x12345678' : function name
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def inc(name: str, amount: float = 1.0, **labels):
+    if not _enabled:
+        return
+    with _lock:
+        _METRICS[name].inc(tuple(sorted(labels.items())), amount)
+
+
+def observe(name: str, value: float, **labels):
+    if not _enabled:
+        return
+    with _lock:
+        _METRICS[name].observe(tuple(sorted(labels.items())), value)
+
+
+def addCollector(name: str, kind: str, help_text: str,
+                 fn: Callable[[], List[Tuple[dict, float]]]):
+    """Register a metric whose samples `fn` computes at scrape time"""
+    _collectors[name] = (kind, help_text, fn)
+
+
+def setSelectorNames(names: Dict[str, str]):
+    """'0x12345678' : function name, to label txs by the function called"""
+    _selector_names.update(names)
+
+
+# ========================================================================
+# hooks
+def rpcMiddleware(make_request, w3):
+    """web3 middleware counting requests, latency, and txs by function"""
+    def middleware(method, params):
+        t0 = time.perf_counter()
+        response = make_request(method, params)
+        observeRpc(method, params, time.perf_counter() - t0, response)
+        return response
+    return middleware
+
+
+def observeRpc(method: str, params, latency: float, response):
+    """Record one JSON-RPC call. Also used by calls that bypass web3"""
+    if not _enabled:
+        return
+    error = not isinstance(response, dict) or "error" in response
+    inc("vw_rpc_requests_total", method=method,
+        status="error" if error else "ok")
+    observe("vw_rpc_latency_seconds", latency, method=method)
+    if error:
+        return
+    if method in SEND_METHODS:
+        function = _txFunction(method, params)
+        with _lock:
+            _tx_functions[str(response["result"]).lower()] = function
+        inc("vw_txs_total", function=function, status="sent")
+    elif method == "eth_getTransactionReceipt" and response.get("result"):
+        receipt = response["result"]
+        with _lock:
+            function = _tx_functions.pop(str(params[0]).lower(), None)
+        if function is None:  # not ours, or already counted
+            return
+        status = "confirmed" if int(str(receipt["status"]), 16) == 1 \
+            else "failed"
+        inc("vw_txs_total", function=function, status=status)
+        observe("vw_tx_gas_used", int(str(receipt["gasUsed"]), 16),
+                function=function)
+
+
+def tokensReleased(wallet: str, token: str, amount_wei: int):
+    inc("vw_tokens_released_total", amount_wei / 1e18, wallet=wallet,
+        token=token)
+
+
+def _txFunction(method: str, params) -> str:
+    """Label of the function a tx calls: its name, 'deploy', or selector"""
+    if method == "eth_sendTransaction":
+        to, data = params[0].get("to"), params[0].get("data") or "0x"
+    else:
+        to, data = _rawTxToAndData(params[0])
+    if not to:
+        return "deploy"
+    selector = data[:10].lower()
+    if len(selector) < 10:
+        return "transfer_eth"
+    return _selector_names.get(selector, selector)
+
+
+def _rawTxToAndData(raw_hex: str) -> Tuple[Optional[str], str]:
+    """(to, data) of a signed raw tx: legacy, EIP-2930 or EIP-1559"""
+    import rlp  # a dependency of eth-account
+
+    raw = bytes.fromhex(str(raw_hex).replace("0x", ""))
+    if raw[0] >= 0xc0:  # legacy: nonce, gasPrice, gas, to, value, data, ..
+        fields, to_i = rlp.decode(raw), 3
+    else:  # typed: type byte, then chainId, nonce, [fee fields..], gas, to
+        fields, to_i = rlp.decode(raw[1:]), 4 if raw[0] == 1 else 5
+    to, data = fields[to_i], fields[to_i + 2]
+    return ("0x" + to.hex() if to else None), "0x" + data.hex()
+
+
+def cacheCollector(cache):
+    """Samples of `cache` hits & misses by kind, for scrape time"""
+    def fn():
+        samples = []
+        for kind, counts in cache.stats()["kinds"].items():
+            samples.append(({"kind": kind, "result": "hit"}, counts["hits"]))
+            samples.append(({"kind": kind, "result": "miss"},
+                            counts["misses"]))
+        return samples
+    return fn
+
+
+def nonceGapCollector(web3, address: str):
+    """Sample of pending - mined nonce of `address`, for scrape time"""
+    def fn():
+        pending = web3.eth.get_transaction_count(address, "pending")
+        mined = web3.eth.get_transaction_count(address, "latest")
+        return [({}, pending - mined)]
+    return fn
+
+
+# ========================================================================
+# exposition
+def _formatLabels(labels) -> str:
+    if not labels:
+        return ""
+    items = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels)
+    return "{" + items + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def exposition() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        metrics = [(m.name, m.kind, m.help, m.samples())
+                   for m in _METRICS.values()]
+    for name, (kind, help_text, fn) in _collectors.items():
+        try:
+            samples = [(name, tuple(sorted(labels.items())), value)
+                       for labels, value in fn()]
+        except Exception:  # eg node unreachable: skip, don't fail the scrape
+            continue
+        metrics.append((name, kind, help_text, samples))
+    for name, kind, help_text, samples in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for sample_name, labels, value in samples:
+            lines.append(f"{sample_name}{_formatLabels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ["/", "/metrics"]:
+            self.send_error(404)
+            return
+        body = exposition().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # keep stderr quiet
+        pass
+
+
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def writeFile(path: str):
+    """Write the exposition to `path` atomically, as textfile collectors
+    need"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(exposition())
+    os.replace(tmp_path, path)
+
+
+def writeFilePeriodically(path: str, interval: float = FILE_INTERVAL):
+    """Write to `path` every `interval` seconds, from a daemon thread"""
+    def loop():
+        while True:
+            time.sleep(interval)
+            writeFile(path)
+    threading.Thread(target=loop, daemon=True).start()
@@ -0,0 +1,30 @@
+"""Newline-delimited JSON output for `vw --json`.
+
+One compact JSON object per line, flushed as soon as it's written, so
+downstream tools see each record immediately. Inputs can be streamed from
+stdin one per line, and are read lazily so memory use stays flat.
+"""
+import json
+import sys
+from typing import Iterator, TextIO
+
+
+def emit(record: dict, stream: TextIO = None):
+    """Write `record` as one line of JSON, and flush"""
+    stream = stream or sys.stdout
+    stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+    stream.flush()
+
+
+def readLines(stream: TextIO = None) -> Iterator[str]:
+    """Yield stripped non-empty, non-'#' lines of `stream`, lazily"""
+    stream = stream or sys.stdin
+    for line in stream:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def amount(amt_wei: int) -> str:
+    """Token amounts go out as decimal strings: exact, for any JSON parser"""
+    return str(amt_wei)
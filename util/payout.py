@@ -0,0 +1,55 @@
+"""Amounts of a `vw payout`, read from its tx receipt's logs.
+
+ReleaseRouter.releaseAndSplit returns the amounts too, but return values
+of a mined tx are only available from nodes that trace. Logs are always
+available: each wallet emits ERC20Released, and the Splitter emits
+PayeePaid per payee.
+"""
+from typing import List
+
+from eth_utils import to_checksum_address
+
+from util import abi
+
+RELEASED_EVENT = "ERC20Released(address,address,uint256)"
+PAYEE_PAID_EVENT = "PayeePaid(address,address,uint256)"
+FAILED_EVENT = "WalletReleaseFailed(address,address)"
+
+
+def payoutAmounts(logs: List[dict], token: str, splitter: str = None) -> dict:
+    """{"wallets": {wallet: amount}, "payees": {payee: amount},
+    "failed": [wallet]} of `token`. Payees are only counted if `splitter`
+    emitted them. "failed" lists wallets whose release reverted."""
+    released_topic = abi.eventTopic(RELEASED_EVENT)
+    paid_topic = abi.eventTopic(PAYEE_PAID_EVENT)
+    failed_topic = abi.eventTopic(FAILED_EVENT)
+    token_topic = abi.topicAddress(token)
+    amounts = {"wallets": {}, "payees": {}, "failed": []}
+    for log in logs:
+        topics = [_hex(t) for t in log["topics"]]
+        if len(topics) == 3 and topics[0] == failed_topic:
+            amounts["failed"].append(_topicAddress(topics[1]))
+            continue
+        if len(topics) < 3 or topics[0] not in [released_topic, paid_topic]:
+            continue
+        amount = abi.decodeOutput(["uint256"], _hex(log["data"]))[0]
+        emitter = to_checksum_address(log["address"])
+        if topics[0] == released_topic and topics[2] == token_topic:
+            amounts["wallets"][emitter] = \
+                amounts["wallets"].get(emitter, 0) + amount
+        elif topics[0] == paid_topic and topics[1] == token_topic and \
+                splitter and emitter.lower() == splitter.lower():
+            payee = _topicAddress(topics[2])
+            amounts["payees"][payee] = amounts["payees"].get(payee, 0) + amount
+    return amounts
+
+
+def _hex(value) -> str:
+    """Lowercase 0x-hex of a str, bytes or HexBytes"""
+    if isinstance(value, str):
+        return value.lower()
+    return "0x" + bytes(value).hex()
+
+
+def _topicAddress(topic: str) -> str:
+    return to_checksum_address("0x" + topic[-40:])
@@ -0,0 +1,107 @@
+"""Wall-clock timing of the phases of a vw command.
+
+Phases accumulate in-process under these names:
+  import       -- importing brownie & friends
+  project load -- brownie.project.load()
+  connect      -- brownie.network.connect()
+  rpc          -- JSON-RPC round trips (reads, estimates, nonces, ..)
+  confirm      -- from sending a tx until its receipt is seen
+Commands add their own, possibly nested, phases (eg 'do_walletinfo').
+"""
+from contextlib import contextmanager
+import json
+import threading
+import time
+
+SEND_METHODS = {"eth_sendTransaction", "eth_sendRawTransaction"}
+RECEIPT_METHOD = "eth_getTransactionReceipt"
+
+_lock = threading.Lock()
+_totals = {}  # phase name : seconds
+_pending_txs = {}  # tx hash : time sent
+_local = threading.local()  # .stack: names of the phases we're inside
+_listeners = []  # called as f(name, start, seconds) when a phase ends
+
+
+def add(name: str, seconds: float):
+    with _lock:
+        _totals[name] = _totals.get(name, 0.0) + seconds
+
+
+def totals() -> dict:
+    with _lock:
+        return dict(_totals)
+
+
+def reset():
+    with _lock:
+        _totals.clear()
+        _pending_txs.clear()
+
+
+def current() -> str:
+    """Name of the innermost phase this thread is in, or '' """
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else ""
+
+
+def addListener(f):
+    """Call f(name, start, seconds) whenever a phase() ends"""
+    _listeners.append(f)
+
+
+@contextmanager
+def phase(name: str):
+    """Context manager that adds the time spent inside it to phase `name`"""
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    _local.stack.append(name)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - t0
+        _local.stack.pop()
+        add(name, seconds)
+        for f in _listeners:
+            f(name, t0, seconds)
+
+
+def timingMiddleware(make_request, w3):
+    """web3 middleware splitting RPC time into 'rpc' and 'confirm'.
+
+    Time from a send until its receipt is non-null counts as 'confirm',
+    including the sleeps between receipt polls. Everything else is 'rpc'.
+    """
+    def middleware(method, params):
+        t0 = time.perf_counter()
+        response = make_request(method, params)
+        t1 = time.perf_counter()
+        if method in SEND_METHODS and "result" in response:
+            with _lock:
+                _pending_txs[_txKey(response["result"])] = t0
+        elif method == RECEIPT_METHOD:
+            key = _txKey(params[0])
+            with _lock:
+                sent = _pending_txs.get(key)
+                if sent is not None and response.get("result"):
+                    del _pending_txs[key]
+            if sent is not None:
+                if response.get("result"):
+                    add("confirm", t1 - sent)
+                return response
+        add("rpc", t1 - t0)
+        return response
+    return middleware
+
+
+def _txKey(txhash) -> str:
+    if isinstance(txhash, (bytes, bytearray)):
+        return "0x" + bytes(txhash).hex()
+    return str(txhash).lower()
+
+
+def dump(path: str):
+    """Write phase totals to `path` as JSON"""
+    with open(path, "w") as f:
+        json.dump(totals(), f)
@@ -0,0 +1,292 @@
+"""Declarative vesting plans: diff against chain, then apply the delta.
+
+A plan (YAML) lists the wallets that should exist:
+
+  network: development
+  token: "0x.."
+  fork_network: mainnet-fork     #optional: where --dry-run rehearses
+  wallets:
+    - name: ratchet-1
+      type: exp                  #cliff | lin | exp
+      beneficiary: "0x.."
+      start: 1767225600          #timestamp
+      duration: 630720000        #seconds
+      half_life: 126144000       #seconds, exp only
+      allocation: 50336000       #tokens, base-18 like `vw transfer`
+      address: "0x.."            #optional: the wallet, if already deployed
+
+Wallets are matched to plan names by their `address`, else via the local
+registry (util/registry.py). Without either, a wallet is deployed; so a
+plan run from a machine without the registry should give addresses.
+The diff finds missing wallets (deploy + fund), underfunded wallets (fund
+the shortfall) and wrong beneficiaries (changeBeneficiary). Schedules are
+immutable, so a wallet whose schedule differs from the plan is an error.
+On-chain state is read in a single JSON-RPC batch, so a converged plan
+costs one round trip and no transactions.
+"""
+from typing import Callable, List, Optional, Union
+
+import yaml
+
+from util import abi, rpcbatch, signers, vesting
+from util.base18 import fromBase18, toBase18Exact
+
+REQUIRED_KEYS = ["name", "type", "beneficiary", "start", "duration",
+                 "allocation"]
+MAX_START_AHEAD = 3000 * 24 * 60 * 60  # VestingWalletHalving's limit
+
+
+class PlanError(Exception):
+    pass
+
+
+def loadPlan(path: str) -> dict:
+    with open(path) as f:
+        plan = yaml.safe_load(f)
+    for key in ["network", "token", "wallets"]:
+        if key not in plan:
+            raise PlanError(f"plan has no '{key}'")
+    names = set()
+    for w in plan["wallets"]:
+        missing = [k for k in REQUIRED_KEYS if k not in w]
+        if missing:
+            raise PlanError(f"wallet {w.get('name')} lacks {missing}")
+        if w["type"] not in vesting.WALLET_CONTRACTS:
+            raise PlanError(f"wallet {w['name']}: unknown type {w['type']}")
+        if w["type"] == "exp" and "half_life" not in w:
+            raise PlanError(f"wallet {w['name']}: exp needs half_life")
+        if w["name"] in names:
+            raise PlanError(f"wallet name {w['name']} is not unique")
+        names.add(w["name"])
+        w["allocation_wei"] = toBase18Exact(w["allocation"])
+    return plan
+
+
+# ========================================================================
+# reading state
+def _getters(wallet: dict) -> List[tuple]:
+    """(field, signature, args, output type) to read for a wallet"""
+    getters = [("beneficiary", "beneficiary()", [], "address"),
+               ("owner", "owner()", [], "address"),
+               ("start", "start()", [], "uint256"),
+               ("duration", "duration()", [], "uint256")]
+    if wallet["type"] == "exp":
+        getters.append(("half_life", "halfLife()", [], "uint256"))
+    return getters
+
+
+def readState(web3, plan: dict, entries: dict) -> dict:
+    """name : on-chain state, for plan wallets that have an address, or
+    are in the registry `entries`. All reads go in one batch."""
+    token = plan["token"]
+    calls, fields, addresses = [], [], {}
+    for w in plan["wallets"]:
+        entry = entries.get(w["name"])
+        addr = w.get("address") or (entry and entry["address"])
+        if not addr:
+            continue
+        addresses[w["name"]] = addr
+        calls.append(("eth_getCode", [addr, "latest"]))
+        fields.append((w["name"], "code", None))
+        for field, sig, args, out_type in _getters(w):
+            calls.append(("eth_call", [{"to": addr, "data": abi.encodeCall(
+                sig, args)}, "latest"]))
+            fields.append((w["name"], field, out_type))
+        calls.append(("eth_call", [{"to": addr, "data": abi.encodeCall(
+            "released(address)", [token])}, "latest"]))
+        fields.append((w["name"], "released", "uint256"))
+        calls.append(("eth_call", [{"to": token, "data": abi.encodeCall(
+            "balanceOf(address)", [addr])}, "latest"]))
+        fields.append((w["name"], "balance", "uint256"))
+
+    results = rpcbatch.results(rpcbatch.batchRequest(web3, calls))
+    state = {}
+    for (name, field, out_type), result in zip(fields, results):
+        st = state.setdefault(name, {"address": addresses[name]})
+        if field == "code":
+            st["code"] = result not in (None, "0x", "0x0")
+        elif result is None or result == "0x":
+            st[field] = None
+        else:
+            st[field] = abi.decodeOutput([out_type], result)[0]
+    for st in state.values():
+        if st["code"]:
+            st["allocation"] = (st["balance"] or 0) + (st["released"] or 0)
+    return state
+
+
+# ========================================================================
+# diffing
+def diffPlan(plan: dict, state: dict, our_address: Union[str, List[str]],
+             now: int) -> List[dict]:
+    """Actions that bring the chain to the plan. Kinds: deploy, fund,
+    set_beneficiary; plus error & note, which aren't executed.
+    `our_address` may be a list: the addresses of a signer pool."""
+    ours = [our_address] if isinstance(our_address, str) else our_address
+    ours = {a.lower() for a in ours}
+    actions = []
+    for w in plan["wallets"]:
+        name = w["name"]
+        st = state.get(name)
+        if st is not None and not st["code"] and w.get("address"):
+            actions.append({"kind": "error", "name": name, "message":
+                            f"no wallet deployed at {w['address']}"})
+            continue
+        if st is None or not st["code"]:
+            if w["type"] == "exp" and \
+               not now <= w["start"] <= now + MAX_START_AHEAD:
+                actions.append({"kind": "error", "name": name, "message":
+                                "start is out of range for an exp wallet"})
+                continue
+            actions.append({"kind": "deploy", "name": name, "wallet": w})
+            actions.append({"kind": "fund", "name": name,
+                            "amount": w["allocation_wei"]})
+            continue
+
+        if st["beneficiary"] is None or st["owner"] is None:
+            actions.append({"kind": "error", "name": name, "message":
+                            f"{st['address']} isn't a vesting wallet: "
+                            f"beneficiary() or owner() failed"})
+            continue
+
+        wrong = [field for field in ["start", "duration", "half_life"]
+                 if field in w and st.get(field, w[field]) != w[field]]
+        if wrong:
+            actions.append({"kind": "error", "name": name, "message":
+                            f"on-chain {wrong} differ from plan; immutable"})
+            continue
+
+        if st["beneficiary"].lower() != w["beneficiary"].lower():
+            if st["owner"].lower() not in ours:
+                actions.append({"kind": "error", "name": name, "message":
+                                "wrong beneficiary, and we aren't owner"})
+            else:
+                actions.append({"kind": "set_beneficiary", "name": name,
+                                "address": st["address"], "type": w["type"],
+                                "owner": st["owner"],
+                                "beneficiary": w["beneficiary"]})
+
+        if st["allocation"] < w["allocation_wei"]:
+            actions.append({"kind": "fund", "name": name,
+                            "address": st["address"],
+                            "amount": w["allocation_wei"] - st["allocation"]})
+        elif st["allocation"] > w["allocation_wei"]:
+            actions.append({"kind": "note", "name": name, "message":
+                            f"overfunded by "
+                            f"{fromBase18(st['allocation'] - w['allocation_wei'])}"})
+    return actions
+
+
+def describe(action: dict) -> str:
+    kind, name = action["kind"], action["name"]
+    if kind == "deploy":
+        w = action["wallet"]
+        return f"deploy {w['type']} wallet '{name}' for {w['beneficiary']}"
+    if kind == "fund":
+        return f"fund '{name}' with {fromBase18(action['amount'])} tokens"
+    if kind == "set_beneficiary":
+        return f"change beneficiary of '{name}' to {action['beneficiary']}"
+    return f"{kind.upper()} '{name}': {action['message']}"
+
+
+# ========================================================================
+# applying
+def _deployArgs(w: dict) -> list:
+    if w["type"] == "exp":
+        return [w["beneficiary"], w["start"], w["half_life"], w["duration"]]
+    return [w["beneficiary"], w["start"], w["duration"]]
+
+
+def applyActions(project, account, plan: dict, actions: List[dict],
+                 on_deploy: Optional[Callable] = None,
+                 pool: Optional[signers.SignerPool] = None) -> List[dict]:
+    """Execute deploy, fund & set_beneficiary actions. Txs within a wave are
+    sent without waiting, then awaited together: deploys first, then the
+    rest. Calls on_deploy(name, address, type, block) for each deploy.
+    Returns one result dict per tx, and per fund skipped because its
+    deploy failed.
+
+    With a signer `pool`, txs are sharded over its keys by wallet name, and
+    set_beneficiary goes from the wallet's owner. `account` still holds the
+    tokens: it approves each other signer for the amounts it will move."""
+    pool = pool or signers.single(account)
+    results = []
+    addresses = {}
+
+    def byName(action):
+        return pool.signerFor(action["name"])
+
+    # wave 1: deploys
+    def deploy(action, tx_params):
+        w = action["wallet"]
+        container = getattr(project, vesting.WALLET_CONTRACTS[w["type"]])
+        return container.deploy(*_deployArgs(w), tx_params)
+    deploys = [a for a in actions if a["kind"] == "deploy"]
+    for action, tx, error in pool.send(deploys, byName, deploy):
+        results.append(_settle(pool, action, tx, error))
+        if results[-1]["status"] == 1:
+            w = action["wallet"]
+            addresses[action["name"]] = tx.contract_address
+            if on_deploy is not None:
+                on_deploy(action["name"], tx.contract_address, w["type"],
+                          tx.block_number)
+
+    # wave 2: funding & beneficiaries
+    token = project.Simpletoken.at(plan["token"])
+    todo = []
+    for action in actions:
+        address = action.get("address") or addresses.get(action["name"])
+        if action["kind"] == "fund" and not address:
+            results.append(_settle(pool, action, None,
+                                   "skipped: its deploy failed"))
+        elif action["kind"] in ["fund", "set_beneficiary"]:
+            todo.append(dict(action, address=address))
+
+    allowances = {}  # signer address : amount it will transferFrom
+    for action in todo:
+        signer = byName(action)
+        if action["kind"] == "fund" and signer.address != account.address:
+            allowances[signer.address] = \
+                allowances.get(signer.address, 0) + action["amount"]
+    approvals = [{"kind": "approve", "name": spender, "amount": amount}
+                 for spender, amount in allowances.items()]
+    for action, tx, error in pool.send(
+            approvals, lambda _: account, lambda a, tx_params: token.approve(
+                a["name"], a["amount"], tx_params)):
+        results.append(_settle(pool, action, tx, error))
+
+    def send(action, tx_params):
+        if action["kind"] == "set_beneficiary":
+            container = getattr(
+                project, vesting.WALLET_CONTRACTS[action["type"]])
+            return container.at(action["address"]).changeBeneficiary(
+                action["beneficiary"], tx_params)
+        if tx_params["from"].address == account.address:
+            return token.transfer(action["address"], action["amount"],
+                                  tx_params)
+        return token.transferFrom(account, action["address"],
+                                  action["amount"], tx_params)
+
+    def signerOf(action):
+        if action["kind"] != "set_beneficiary":
+            return byName(action)
+        owner = action.get("owner", account.address)
+        if owner.lower() == account.address.lower():
+            return account
+        return pool.account(owner)
+
+    for action, tx, error in pool.send(todo, signerOf, send):
+        results.append(_settle(pool, action, tx, error))
+    return results
+
+
+def _settle(pool: signers.SignerPool, action: dict, tx, error) -> dict:
+    """Wait for an action's tx, if it was sent. Returns its result dict"""
+    if tx is not None and not pool.wait(tx):
+        error = f"not mined within {signers.TX_TIMEOUT} s"
+    if error is not None:
+        return {"kind": action["kind"], "name": action["name"],
+                "txid": tx.txid if tx is not None else None, "status": None,
+                "gas_used": None, "error": error}
+    return {"kind": action["kind"], "name": action["name"], "txid": tx.txid,
+            "status": tx.status, "gas_used": tx.gas_used, "error": None}
@@ -0,0 +1,46 @@
+"""Local registry of wallets that vw deployed, by name, per chain.
+
+Lives in ~/.vw/registry.json (or $VW_STATE_DIR). Entries are keyed by chain
+identity (see rpccache.chainId) and record the block each wallet was
+deployed at, so they can be rolled back along with the chain.
+"""
+import json
+import os
+from typing import List
+
+
+def stateDir() -> str:
+    return os.getenv("VW_STATE_DIR", os.path.expanduser("~/.vw"))
+
+
+class Registry:
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(stateDir(), "registry.json")
+        self._data = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self._data = json.load(f)
+
+    def entries(self, chain: str) -> dict:
+        """name : {"address", "type", "block"} for `chain`"""
+        return self._data.get(chain, {})
+
+    def put(self, chain: str, name: str, address: str, wallet_type: str,
+            block: int):
+        self._data.setdefault(chain, {})[name] = {
+            "address": address, "type": wallet_type, "block": block}
+
+    def dropAfter(self, chain: str, block: int) -> List[str]:
+        """Forget entries deployed after `block`. Returns their names"""
+        entries = self._data.get(chain, {})
+        dropped = [name for name, e in entries.items() if e["block"] > block]
+        for name in dropped:
+            del entries[name]
+        return dropped
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._data, f, indent=1)
+        os.replace(tmp_path, self.path)
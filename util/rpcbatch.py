@@ -0,0 +1,83 @@
+"""JSON-RPC batch requests: many calls in one HTTP round trip.
+
+web3.py has no batch API, so batches are POSTed straight to the provider's
+endpoint. Nodes (or providers) that don't take batches get the calls one by
+one instead. Reads go through util/rpchedge.py when it's set up for the
+endpoint. Calls are still counted in the 'rpc' phase, in --trace and in
+metrics.
+"""
+import time
+from typing import List, Tuple
+
+import requests
+
+from util import metrics, phases, rpchedge, rpctrace
+
+_session = requests.Session()
+TIMEOUT = 60
+
+
+class RpcError(Exception):
+    pass
+
+
+def batchRequest(web3, calls: List[Tuple[str, list]]) -> List[dict]:
+    """Send (method, params) calls as one batch. Returns one JSON-RPC
+    response dict per call, in order. Responses may hold an 'error'."""
+    if not calls:
+        return []
+    endpoint = getattr(web3.provider, "endpoint_uri", None)
+    reader = rpchedge.getReader(web3)
+    responses = None
+    t0 = time.perf_counter()
+    if reader is not None and \
+       all(method in rpchedge.READ_METHODS for method, _ in calls):
+        responses = reader.batch(calls)
+        # if that fell through, the primary reads at the same block
+        calls = [(method, reader.pinParams(method, params))
+                 for method, params in calls]
+    if responses is None and endpoint and str(endpoint).startswith("http"):
+        payload = [{"jsonrpc": "2.0", "id": i, "method": method,
+                    "params": params}
+                   for i, (method, params) in enumerate(calls)]
+        reply = _session.post(str(endpoint), json=payload, timeout=TIMEOUT)
+        if reply.status_code == 429 or reply.status_code >= 500:
+            reply.raise_for_status()
+        try:  # a 4xx (eg 405) or a non-list body: node refused the batch
+            body = reply.json() if reply.ok else None
+        except ValueError:
+            body = None
+        if isinstance(body, list):
+            by_id = {r.get("id"): r for r in body}
+            responses = [by_id.get(i, {"error": {"message": "no response"}})
+                         for i in range(len(calls))]
+    if responses is None:
+        responses = [web3.provider.make_request(method, params)
+                     for method, params in calls]
+    latency = time.perf_counter() - t0
+    phases.add("rpc", latency)
+    for (method, params), response in zip(calls, responses):
+        rpctrace.record(method, params, latency, response)
+        metrics.observeRpc(method, params, latency, response)
+    return responses
+
+
+def results(responses: List[dict]) -> list:
+    """'result' of each response, or None where it holds an 'error'"""
+    return [r.get("result") if "error" not in r else None for r in responses]
+
+
+def getLogs(web3, log_filter: dict, from_block: int, to_block: int) -> list:
+    """eth_getLogs of `log_filter` (address, topics) over a block range, as
+    raw JSON logs. A range the node refuses (eg over its block-range or
+    result-size cap) is split in halves and retried."""
+    response = web3.provider.make_request("eth_getLogs", [dict(
+        log_filter, fromBlock=hex(from_block), toBlock=hex(to_block))])
+    if "error" not in response:
+        return response.get("result") or []
+    if from_block >= to_block:
+        raise RpcError(f"eth_getLogs at block {from_block}: "
+                       f"{response['error'].get('message')}")
+    mid = (from_block + to_block) // 2
+    return getLogs(web3, log_filter, from_block, mid) + \
+        getLogs(web3, log_filter, mid + 1, to_block)
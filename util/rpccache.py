@@ -0,0 +1,279 @@
+"""Persistent, block-aware cache of eth_call results (`vw --cache ...`).
+
+Entries live in an sqlite file (default ~/.vw/rpccache.sqlite) and are keyed
+by chain identity (chain id + genesis hash, so a restarted ganache gets a
+fresh namespace), block and call data. There are two kinds of entries:
+  permanent    -- immutable getters like symbol() or halfLife() at 'latest',
+                  and calls pinned to a block at least FINALITY_DEPTH below
+                  the head
+  block-scoped -- calls at 'latest'; keyed by head block, and purged once
+                  the head moves past them
+Empty results ('0x': no contract there, yet) aren't stored. When the file
+exceeds its size budget, least-recently-used entries go first.
+
+The file is in WAL mode and each write commits at once, so several vw
+processes can share it, and a crash loses nothing already stored. Reads
+don't write: last-used times and hit counters are kept in memory, and
+written TOUCH_BATCH at a time (and at flush).
+"""
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from eth_utils import function_signature_to_4byte_selector
+
+# getters whose result never changes for a given contract address
+IMMUTABLE_SIGNATURES = [
+    "symbol()", "name()", "decimals()",
+    "start()", "duration()", "halfLife()",
+    "getAmount(uint256,uint256,uint256)",  # pure
+]
+IMMUTABLE_SELECTORS = {
+    "0x" + function_signature_to_4byte_selector(sig).hex()
+    for sig in IMMUTABLE_SIGNATURES
+}
+
+# calls that change chain state, so the head must be re-read afterwards
+STATE_CHANGING_METHODS = {
+    "eth_sendTransaction", "eth_sendRawTransaction",
+    "evm_mine", "evm_increaseTime", "evm_revert", "evm_setTime",
+}
+
+FINALITY_DEPTH = int(os.getenv("VW_CACHE_FINALITY", "12"))
+HEAD_TTL = 1.0  # seconds that a fetched head block number is trusted
+DEFAULT_MAX_BYTES = int(os.getenv("VW_CACHE_MAX_MB", "64")) * 1024 * 1024
+TOUCH_BATCH = 256  # last-used times held before they're written
+BUSY_TIMEOUT = 10.0  # seconds to wait on another process's write
+
+
+def defaultPath() -> str:
+    cache_dir = os.getenv("VW_CACHE_DIR", os.path.expanduser("~/.vw"))
+    return os.path.join(cache_dir, "rpccache.sqlite")
+
+
+class RpcCache:
+    """Size-bounded LRU cache of JSON-RPC results, stored in sqlite"""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False,
+                                   isolation_level=None, timeout=BUSY_TIMEOUT)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                chain TEXT NOT NULL,
+                block INTEGER NOT NULL,
+                permanent INTEGER NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used);
+            CREATE INDEX IF NOT EXISTS entries_block ON entries (chain, block);
+            CREATE TABLE IF NOT EXISTS stats (
+                kind TEXT PRIMARY KEY,
+                hits INTEGER NOT NULL,
+                misses INTEGER NOT NULL);
+        """)
+        self._size = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self._stats = {}  # kind : [hits, misses], not yet flushed to db
+        self._touched = {}  # key : last used, not yet written to db
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def get(self, key: str, kind: str) -> Optional[Any]:
+        """Return cached value for `key`, or None. Counts a hit/miss"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            counts = self._stats.setdefault(kind, [0, 0])
+            if row is None:
+                counts[1] += 1
+                return None
+            counts[0] += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= TOUCH_BATCH:
+                with self._transaction():
+                    self._writeTouched()
+            return json.loads(row[0])
+
+    def put(self, key: str, chain: str, block: int, permanent: bool,
+            value: Any):
+        """Store `value`. `block` is the block the value was read at"""
+        blob = json.dumps(value)
+        size = len(key) + len(blob)
+        with self._lock, self._transaction():
+            old = self._db.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._size -= old[0] if old else 0
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, chain, block, int(permanent), blob, size, time.time()))
+            self._size += size
+            if self._size > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+
+    def _evict(self, target_bytes: int):
+        """Drop least-recently-used entries until size <= target_bytes"""
+        self._writeTouched()
+        rows = self._db.execute(
+            "SELECT key, size FROM entries ORDER BY last_used").fetchall()
+        doomed = []
+        for key, size in rows:
+            if self._size <= target_bytes:
+                break
+            doomed.append((key,))
+            self._size -= size
+        self._db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def _writeTouched(self):
+        self._db.executemany(
+            "UPDATE entries SET last_used = ? WHERE key = ?",
+            [(t, key) for key, t in self._touched.items()])
+        self._touched.clear()
+
+    def purgeBlockScoped(self, chain: str, head: int):
+        """Drop non-permanent entries read before block `head`"""
+        with self._lock, self._transaction():
+            self._deleteWhere(
+                "chain = ? AND permanent = 0 AND block < ?", (chain, head))
+
+    def purgeAfter(self, chain: str, block: int):
+        """Drop all entries read after `block`, eg when the chain reverts"""
+        with self._lock, self._transaction():
+            self._deleteWhere("chain = ? AND block > ?", (chain, block))
+
+    def _deleteWhere(self, where: str, args: tuple):
+        freed = self._db.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM entries WHERE {where}",
+            args).fetchone()[0]
+        self._db.execute(f"DELETE FROM entries WHERE {where}", args)
+        self._size -= freed
+
+    def clear(self):
+        with self._lock, self._transaction():
+            self._db.execute("DELETE FROM entries")
+            self._db.execute("DELETE FROM stats")
+            self._stats.clear()
+            self._touched.clear()
+            self._size = 0
+        self._db.execute("VACUUM")
+
+    def stats(self) -> dict:
+        """Lifetime hits & misses per kind, plus size info"""
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT kind, hits, misses FROM stats").fetchall()
+            n_entries = self._db.execute(
+                "SELECT COUNT(*) FROM entries").fetchone()[0]
+        kinds = {}
+        for kind, hits, misses in rows:
+            total = hits + misses
+            kinds[kind] = {"hits": hits, "misses": misses,
+                           "hit_rate": hits / total if total else 0.0}
+        return {"path": self.path, "entries": n_entries, "bytes": self._size,
+                "max_bytes": self.max_bytes, "kinds": kinds}
+
+    def flush(self):
+        """Persist hit/miss counters and last-used times"""
+        with self._lock, self._transaction():
+            self._writeTouched()
+            for kind, (hits, misses) in self._stats.items():
+                self._db.execute(
+                    "INSERT INTO stats VALUES (?, ?, ?) ON CONFLICT(kind) DO "
+                    "UPDATE SET hits = hits + ?, misses = misses + ?",
+                    (kind, hits, misses, hits, misses))
+            self._stats.clear()
+
+
+_cache = None
+
+
+def getCache() -> RpcCache:
+    """The process-wide cache, opened on first use"""
+    global _cache
+    if _cache is None:
+        _cache = RpcCache(defaultPath())
+    return _cache
+
+
+def chainId(make_request) -> str:
+    """Identity of the connected chain: '<chain id>-<genesis hash prefix>'"""
+    chain_id = int(make_request("eth_chainId", [])["result"], 16)
+    genesis = make_request("eth_getBlockByNumber", ["0x0", False])["result"]
+    return f"{chain_id}-{genesis['hash'][:18]}"
+
+
+def cachingMiddleware(make_request, w3):
+    """web3 middleware serving eth_call from the cache where it's safe"""
+    state = {"chain": None, "head": None, "head_time": 0.0}
+
+    def head() -> int:
+        now = time.monotonic()
+        if state["head"] is None or now - state["head_time"] > HEAD_TTL:
+            new_head = int(make_request("eth_blockNumber", [])["result"], 16)
+            if new_head != state["head"]:
+                getCache().purgeBlockScoped(state["chain"], new_head)
+            state["head"], state["head_time"] = new_head, now
+        return state["head"]
+
+    def middleware(method, params):
+        if method in STATE_CHANGING_METHODS:
+            state["head"] = None
+            return make_request(method, params)
+        if method != "eth_call":
+            return make_request(method, params)
+
+        if state["chain"] is None:
+            state["chain"] = chainId(make_request)
+        chain = state["chain"]
+        tx = params[0]
+        tag = params[1] if len(params) > 1 else "latest"
+        call = json.dumps(tx, sort_keys=True)
+
+        head_block = head()
+        if str(tx.get("data", ""))[:10] in IMMUTABLE_SELECTORS and \
+           tag == "latest":  # at an older block, the contract may not exist
+            kind, key, block, permanent = "immutable", f"{chain}|{call}", \
+                head_block, True
+        elif isinstance(tag, str) and tag.startswith("0x"):
+            block = int(tag, 16)
+            permanent = block <= head_block - FINALITY_DEPTH
+            kind, key = "pinned", f"{chain}|{block}|{call}"
+        elif tag == "latest":
+            kind, key, block, permanent = "latest", \
+                f"{chain}|{head_block}|{call}", head_block, False
+        else:  # 'pending', 'earliest', ..
+            return make_request(method, params)
+
+        result = getCache().get(key, kind)
+        if result is not None:
+            return {"jsonrpc": "2.0", "id": 0, "result": result}
+        if kind == "latest":  # pin, so the value matches its key's block
+            params = [tx, hex(head_block)] + list(params[2:])
+        response = make_request(method, params)
+        # '0x': no code there (yet); eg a wallet whose deploy isn't mined
+        if "error" not in response and response.get("result") not in \
+           (None, "0x"):
+            getCache().put(key, chain, block, permanent, response["result"])
+        return response
+
+    return middleware
@@ -0,0 +1,344 @@
+"""Hedged reads over several RPC endpoints of one network.
+
+Set VW_RPC_URLS_<NETWORK> to read from more endpoints than brownie's own,
+eg VW_RPC_URLS_ETH_MAINNET=https://a..,https://b.. . Then each read goes to
+the healthiest endpoint. If that one hasn't answered within its own p95
+latency, the same request goes to the next endpoint too, and the first
+answer wins. One slow or stuck node then costs about a p95, not a timeout.
+
+Endpoints are ranked by health (a moving average of successes) and then by
+median latency. Each endpoint's head block is checked. An endpoint more
+than MAX_LAG blocks behind the newest head isn't read from.
+
+One block per command: reads at 'latest' are pinned to one block, the
+oldest head among the fresh endpoints. Every endpoint that serves a read
+has that block, so a command's reads never mix state from different
+blocks. Txs and all other calls go to brownie's endpoint only. After a tx
+is sent or mined, the next read re-pins, at or after that endpoint's head,
+so a command sees its own txs. Long-running commands (keeper, loadtest)
+don't pin: their reads follow the newest fresh head instead.
+
+Requests run on daemon threads, with a short timeout: the loser of a
+hedge, stuck on a slow node, doesn't hold up the process at exit.
+"""
+import collections
+from concurrent import futures
+import functools
+import os
+import threading
+import time
+from typing import List, Optional
+
+import requests
+
+from util.rpccache import STATE_CHANGING_METHODS
+from util.stats import percentile
+
+READ_METHODS = {
+    "eth_blockNumber", "eth_chainId", "eth_call", "eth_getBalance",
+    "eth_getCode", "eth_getStorageAt", "eth_getBlockByNumber", "eth_getLogs",
+}
+BLOCK_PARAM = {  # method : index of its block tag in params
+    "eth_call": 1, "eth_getBalance": 1, "eth_getCode": 1,
+    "eth_getStorageAt": 2, "eth_getBlockByNumber": 0,
+}
+MAX_LAG = int(os.getenv("VW_RPC_MAX_LAG", "2"))  # blocks
+DEFAULT_HEDGE_S = 0.5  # hedge delay until an endpoint has MIN_SAMPLES
+MIN_HEDGE_S = 0.01
+MIN_SAMPLES = 20
+WINDOW = 200  # latency samples kept per endpoint
+HEALTH_DECAY = 0.9
+MIN_HEALTH = 0.5
+HEAD_CHECK_S = 5.0  # unpinned: how often heads are re-read
+TIMEOUT = float(os.getenv("VW_RPC_TIMEOUT", "10"))  # seconds per request
+
+
+class HedgeError(Exception):
+    pass
+
+
+def urlsFromEnv(network: str) -> List[str]:
+    """Extra endpoints for `network`, from VW_RPC_URLS_<NETWORK>"""
+    name = "VW_RPC_URLS_" + network.upper().replace("-", "_")
+    return [u.strip() for u in os.getenv(name, "").split(",") if u.strip()]
+
+
+class Endpoint:
+    """One JSON-RPC endpoint, with its latencies, health and head block"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.head = None
+        self.health = 1.0
+        self.counts = {"requests": 0, "wins": 0, "hedged": 0, "errors": 0}
+        self._latencies = collections.deque(maxlen=WINDOW)
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+
+    def hedgeAfter(self, default: float) -> float:
+        """Seconds to wait for an answer before asking another endpoint"""
+        with self._lock:
+            if len(self._latencies) < MIN_SAMPLES:
+                return default
+            return max(MIN_HEDGE_S, percentile(list(self._latencies), 95))
+
+    def p50(self) -> float:
+        with self._lock:
+            return percentile(list(self._latencies), 50)
+
+    def count(self, key: str):
+        with self._lock:
+            self.counts[key] += 1
+
+    def post(self, payload):
+        """POST `payload`; returns the decoded body. Updates health"""
+        t0 = time.perf_counter()
+        try:
+            reply = self._session.post(self.url, json=payload, timeout=TIMEOUT)
+            reply.raise_for_status()
+            body = reply.json()
+        except Exception:
+            self._observe(False)
+            raise
+        self._observe(True, time.perf_counter() - t0)
+        return body
+
+    def _observe(self, ok: bool, latency: float = None):
+        with self._lock:
+            self.health = HEALTH_DECAY * self.health + (1 - HEALTH_DECAY) * ok
+            if ok:
+                self._latencies.append(latency)
+            else:
+                self.counts["errors"] += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            latencies = list(self._latencies)
+            return dict(self.counts, url=self.url, head=self.head,
+                        health=round(self.health, 3),
+                        p50_s=percentile(latencies, 50),
+                        p95_s=percentile(latencies, 95))
+
+
+class HedgedReader:
+    """Reads from `urls`, hedged. urls[0] is the endpoint txs go to"""
+
+    def __init__(self, urls: List[str], pin: bool = True,
+                 max_lag: int = MAX_LAG, hedge_after: float = DEFAULT_HEDGE_S):
+        self.endpoints = [Endpoint(url) for url in dict.fromkeys(urls)]
+        self.pin_reads = pin
+        self.max_lag = max_lag
+        self.hedge_after = hedge_after
+        self.pinned = None  # block that 'latest' reads go to
+        self._floor = 0  # no read may see an older block
+        self._wrote = False  # a tx went out since the last read
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def primary(self) -> str:
+        return self.endpoints[0].url
+
+    def checkHeads(self) -> dict:
+        """Read every endpoint's head block, in parallel. url : head.
+        Waits for the first answer, then hedge_after for the rest: a slow
+        endpoint's head is None until it answers"""
+        payload = {"jsonrpc": "2.0", "id": 0, "method": "eth_blockNumber",
+                   "params": []}
+        pending = []
+        for e in self.endpoints:
+            e.head = None
+            future = _submit(e.post, payload)
+            future.add_done_callback(functools.partial(_setHead, e))
+            pending.append(future)
+        futures.wait(pending, timeout=TIMEOUT,
+                     return_when=futures.FIRST_COMPLETED)
+        futures.wait(pending, timeout=self.hedge_after)
+        self._checked = time.monotonic()
+        return {e.url: e.head for e in self.endpoints}
+
+    def fresh(self) -> List[Endpoint]:
+        """Endpoints within max_lag blocks of the newest head"""
+        heads = [e.head for e in self.endpoints if e.head is not None]
+        if not heads:
+            return []
+        newest = max(heads)
+        return [e for e in self.endpoints
+                if e.head is not None and e.head >= newest - self.max_lag]
+
+    def pin(self) -> int:
+        """Pin 'latest' to the oldest fresh head (or the floor, if newer)"""
+        self.checkHeads()
+        fresh = self.fresh()
+        if not fresh:
+            raise HedgeError("no endpoint answered eth_blockNumber")
+        self.pinned = max(min(e.head for e in fresh), self._floor)
+        return self.pinned
+
+    def afterWrite(self):
+        """A tx was sent or mined: the next read re-pins, to see it"""
+        self._wrote = True
+
+    def _prepare(self):
+        with self._lock:
+            if self._wrote:
+                self._wrote = False
+                body = self.endpoints[0].post({
+                    "jsonrpc": "2.0", "id": 0, "method": "eth_blockNumber",
+                    "params": []})
+                self._floor = int(body["result"], 16)
+                self.pinned, self._checked = None, 0.0
+            if self.pin_reads and self.pinned is None:
+                self.pin()
+            elif not self.pin_reads and \
+                    time.monotonic() - self._checked > HEAD_CHECK_S:
+                self.checkHeads()
+
+    def ranked(self) -> List[Endpoint]:
+        """Endpoints that have the block reads need, best first"""
+        need = max(self.pinned or 0, self._floor)
+        usable = [e for e in self.fresh() if e.head >= need]
+        healthy = [e for e in usable if e.health >= MIN_HEALTH] or usable
+        return sorted(healthy, key=lambda e: (-round(e.health, 1), e.p50()))
+
+    def pinParams(self, method: str, params: list) -> list:
+        """`params` with 'latest' replaced by the pinned block, if any"""
+        if self.pinned is None:
+            return params
+        tag = hex(self.pinned)
+        params = list(params)
+        if method in BLOCK_PARAM:
+            i = BLOCK_PARAM[method]
+            if len(params) <= i:
+                params.append(tag)
+            elif params[i] == "latest":
+                params[i] = tag
+        elif method == "eth_getLogs" and params and \
+                "blockHash" not in params[0]:
+            params[0] = {k: tag if k in ("fromBlock", "toBlock") and
+                         v == "latest" else v for k, v in params[0].items()}
+            params[0].setdefault("toBlock", tag)
+        return params
+
+    def request(self, method: str, params: list) -> Optional[dict]:
+        """Hedged read. Returns the JSON-RPC response, or None if no
+        endpoint is fresh enough: then read from the primary instead, with
+        pinParams()."""
+        self._prepare()
+        if method == "eth_blockNumber" and self.pinned is not None:
+            return {"jsonrpc": "2.0", "id": 0, "result": hex(self.pinned)}
+        payload = {"jsonrpc": "2.0", "id": 0, "method": method,
+                   "params": self.pinParams(method, params)}
+        return self._hedged(payload)
+
+    def batch(self, calls: list) -> Optional[List[dict]]:
+        """Hedged batch of (method, params) reads. Returns one response per
+        call, in order; or None, as for request() or if batches are refused"""
+        self._prepare()
+        payload = [{"jsonrpc": "2.0", "id": i, "method": method,
+                    "params": self.pinParams(method, params)}
+                   for i, (method, params) in enumerate(calls)]
+        body = self._hedged(payload)
+        if not isinstance(body, list):
+            return None
+        by_id = {r.get("id"): r for r in body}
+        return [by_id.get(i, {"error": {"message": "no response"}})
+                for i in range(len(calls))]
+
+    def _hedged(self, payload):
+        endpoints = self.ranked()
+        if not endpoints:
+            return None
+        pending, errors = {}, []
+
+        def launch():
+            e = endpoints[len(pending) + len(errors)]
+            e.count("requests")
+            pending[_submit(e.post, payload)] = e
+
+        launch()
+        while pending:
+            n_tried = len(pending) + len(errors)
+            last = endpoints[n_tried - 1]
+            wait_s = last.hedgeAfter(self.hedge_after) \
+                if n_tried < len(endpoints) else None
+            done, _ = futures.wait(pending, timeout=wait_s,
+                                   return_when=futures.FIRST_COMPLETED)
+            if not done:  # too slow: ask the next one too
+                last.count("hedged")
+                launch()
+                continue
+            for future in done:
+                e = pending.pop(future)
+                try:
+                    body = future.result()
+                except Exception as ex:  # pylint: disable=broad-except
+                    errors.append(f"{e.url}: {type(ex).__name__}")
+                    if len(pending) + len(errors) < len(endpoints):
+                        launch()
+                    continue
+                e.count("wins")
+                return body
+        raise HedgeError("all endpoints failed: " + "; ".join(errors))
+
+    def stats(self) -> List[dict]:
+        return [e.summary() for e in self.endpoints]
+
+
+def _setHead(endpoint: Endpoint, future: futures.Future):
+    try:
+        endpoint.head = int(future.result()["result"], 16)
+    except Exception:  # pylint: disable=broad-except
+        endpoint.head = None
+
+
+def _submit(fn, *args) -> futures.Future:
+    """Run fn(*args) on a daemon thread. Unlike a ThreadPoolExecutor's
+    threads, it isn't joined at exit"""
+    future = futures.Future()
+
+    def run():
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:  # pylint: disable=broad-except
+            future.set_exception(e)
+    threading.Thread(target=run, name="vw-hedge", daemon=True).start()
+    return future
+
+
+_reader = None
+
+
+def install(reader: Optional[HedgedReader]):
+    """Make `reader` the one rpcbatch and the middleware use. None: none"""
+    global _reader
+    _reader = reader
+
+
+def getReader(web3) -> Optional[HedgedReader]:
+    """The installed reader, if it reads for `web3`'s endpoint"""
+    endpoint = str(getattr(web3.provider, "endpoint_uri", ""))
+    if _reader is not None and _reader.primary == endpoint:
+        return _reader
+    return None
+
+
+def hedgingMiddleware(make_request, w3):
+    """web3 middleware sending reads through the installed reader"""
+    def middleware(method, params):
+        reader = getReader(w3)
+        if reader is None:
+            return make_request(method, params)
+        if method in READ_METHODS:
+            response = reader.request(method, params)
+            if response is not None:
+                return response
+            # no endpoint is fresh enough: the primary, at the same block
+            return make_request(method, reader.pinParams(method, params))
+        response = make_request(method, params)
+        if method in STATE_CHANGING_METHODS or (
+                method == "eth_getTransactionReceipt" and
+                response.get("result")):
+            reader.afterWrite()
+        return response
+    return middleware
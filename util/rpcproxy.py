@@ -0,0 +1,187 @@
+"""JSON-RPC proxy that makes a local chain behave like a remote one.
+
+Ganache on localhost answers in well under a millisecond, which hides what
+batching, pooling and concurrency buy against a real endpoint. This proxy
+sits in front of any JSON-RPC endpoint and, per HTTP request, injects:
+
+  latency_ms       -- fixed delay per request (round trip)
+  jitter_ms        -- plus a uniformly random extra delay, 0..jitter_ms
+  send_latency_ms  -- extra delay for eth_sendRawTransaction/eth_sendTransaction
+  rate_limit       -- max requests per second (token bucket); over it: 429
+  error_rate       -- fraction of requests answered 429 anyway
+  drop_rate        -- fraction of connections closed with no response
+
+A batch is one HTTP request, so it pays the latency once, as it would
+remotely. Randomness is seeded, so runs are repeatable.
+
+  with RpcProxy("http://127.0.0.1:8545", latency_ms=80) as proxy:
+      ... point a client at proxy.url ...
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import socket
+import threading
+import time
+from typing import Optional
+
+import requests
+
+DEFAULTS = {
+    "latency_ms": 0.0,
+    "jitter_ms": 0.0,
+    "send_latency_ms": 0.0,
+    "rate_limit": 0.0,  # 0: unlimited
+    "error_rate": 0.0,
+    "drop_rate": 0.0,
+}
+SEND_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction"}
+TIMEOUT = 60
+
+
+class RpcProxy:
+    """Forwards POSTed JSON-RPC to `upstream`, with faults. Serves from
+    daemon threads; use as a context manager, or start() & stop()."""
+
+    def __init__(self, upstream: str, port: int = 0, host: str = "127.0.0.1",
+                 seed: Optional[int] = None, **faults):
+        unknown = set(faults) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown faults: {sorted(unknown)}")
+        self.upstream = upstream
+        self.faults = dict(DEFAULTS, **faults)
+        self.stats = {"requests": 0, "calls": 0, "forwarded": 0,
+                      "rate_limited": 0, "dropped": 0, "upstream_errors": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = max(self.faults["rate_limit"], 1)
+        self._refilled = time.monotonic()
+        self._local = threading.local()  # one HTTP session per thread
+        self._server = ThreadingHTTPServer((host, port), _handlerFor(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "RpcProxy":
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "RpcProxy":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------------------------------------------------------------------
+    # faults
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+
+    def _roll(self, rate: float) -> bool:
+        with self._lock:
+            return rate > 0 and self._random.random() < rate
+
+    def _delay(self, methods: list) -> float:
+        """Seconds to hold a request with `methods`"""
+        f = self.faults
+        with self._lock:
+            jitter = self._random.uniform(0, f["jitter_ms"])
+        ms = f["latency_ms"] + jitter
+        if SEND_METHODS.intersection(methods):
+            ms += f["send_latency_ms"]
+        return ms / 1000.0
+
+    def _admit(self) -> bool:
+        """Take a rate-limit token. False if there's none: answer 429"""
+        rate = self.faults["rate_limit"]
+        if rate <= 0:
+            return True
+        burst = max(rate, 1)  # a rate under 1/s still holds a whole token
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(burst,
+                               self._tokens + (now - self._refilled) * rate)
+            self._refilled = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def _forward(self, body: bytes) -> bytes:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        reply = session.post(self.upstream, data=body, timeout=TIMEOUT,
+                             headers={"Content-Type": "application/json"})
+        reply.raise_for_status()
+        return reply.content
+
+
+def _methods(body: bytes) -> list:
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return []
+    calls = payload if isinstance(payload, list) else [payload]
+    return [c.get("method") for c in calls if isinstance(c, dict)]
+
+
+def _handlerFor(proxy: RpcProxy):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like a real endpoint
+        disable_nagle_algorithm = True  # else +40ms: headers & body split
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            methods = _methods(body)
+            proxy._count("requests")
+            proxy._count("calls", len(methods))
+            time.sleep(proxy._delay(methods))
+
+            if proxy._roll(proxy.faults["drop_rate"]):
+                proxy._count("dropped")
+                self.close_connection = True
+                self.connection.shutdown(socket.SHUT_RDWR)
+                return
+            if not proxy._admit() or proxy._roll(proxy.faults["error_rate"]):
+                proxy._count("rate_limited")
+                self._reply(429, {"jsonrpc": "2.0", "id": None, "error": {
+                    "code": -32005, "message": "rate limited"}},
+                    {"Retry-After": "1"})
+                return
+            try:
+                data = proxy._forward(body)
+            except requests.RequestException as e:
+                proxy._count("upstream_errors")
+                self._reply(502, {"jsonrpc": "2.0", "id": None, "error": {
+                    "code": -32603, "message": f"upstream: {e}"}})
+                return
+            proxy._count("forwarded")
+            self._reply(200, data)
+
+        def _reply(self, status: int, body, headers: Optional[dict] = None):
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):  # keep stderr quiet
+            pass
+
+    return Handler
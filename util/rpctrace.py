@@ -0,0 +1,121 @@
+"""Opt-in JSON-RPC tracing for vw: `vw --trace[=FILE] COMMAND ...`
+
+Records every JSON-RPC call (method, params fingerprint, latency, request and
+response size, the phase that issued it) and the timing of each phase. At
+exit, prints a summary to stderr and optionally writes the full trace as JSON.
+"""
+import hashlib
+import json
+import sys
+import threading
+import time
+
+from util import phases
+from util.stats import percentile
+
+_enabled = False
+_lock = threading.Lock()
+_t0 = time.perf_counter()
+_calls = []  # one dict per JSON-RPC call
+_spans = []  # one dict per ended phase
+
+
+def enable():
+    """Start recording calls & phase spans"""
+    global _enabled
+    if not _enabled:
+        _enabled = True
+        phases.addListener(_onPhaseEnd)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def fingerprint(method: str, params) -> str:
+    """Short stable hash of (method, params), to spot duplicate calls"""
+    blob = json.dumps([method, params], sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()[:12]
+
+
+def tracingMiddleware(make_request, w3):
+    """web3 middleware recording each call into the trace"""
+    def middleware(method, params):
+        t0 = time.perf_counter()
+        response = make_request(method, params)
+        latency = time.perf_counter() - t0
+        record(method, params, latency, response)
+        return response
+    return middleware
+
+
+def record(method: str, params, latency: float, response):
+    """Add one call to the trace. Also used by calls that bypass web3"""
+    if not _enabled:
+        return
+    call = {
+        "t": time.perf_counter() - _t0,
+        "method": method,
+        "fingerprint": fingerprint(method, params),
+        "latency": latency,
+        "request_bytes": len(json.dumps(params, default=str)),
+        "response_bytes": len(json.dumps(response, default=str)),
+        "error": isinstance(response, dict) and "error" in response,
+        "phase": phases.current(),
+    }
+    with _lock:
+        _calls.append(call)
+
+
+def _onPhaseEnd(name: str, start: float, seconds: float):
+    with _lock:
+        _spans.append({"phase": name, "t": start - _t0, "seconds": seconds})
+
+
+def summary() -> str:
+    """Human-readable summary: per-method stats, duplicates, phases"""
+    with _lock:
+        calls, spans = list(_calls), list(_spans)
+
+    by_method = {}
+    for call in calls:
+        by_method.setdefault(call["method"], []).append(call)
+    s = ["RPC trace summary:"]
+    s.append(f"  {'method':<28} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8} "
+             f"{'resp bytes':>10}")
+    for method, mcalls in sorted(by_method.items(), key=lambda kv: -len(kv[1])):
+        lats = [c["latency"] * 1000 for c in mcalls]
+        resp_bytes = sum(c["response_bytes"] for c in mcalls)
+        s.append(f"  {method:<28} {len(mcalls):>6} {percentile(lats, 50):8.2f} "
+                 f"{percentile(lats, 95):8.2f} {resp_bytes:>10}")
+    s.append(f"  total: {len(calls)} calls, "
+             f"{sum(c['latency'] for c in calls):.3f} s")
+
+    counts = {}
+    for call in calls:
+        key = (call["method"], call["fingerprint"])
+        counts[key] = counts.get(key, 0) + 1
+    dups = {key: n for key, n in counts.items() if n > 1}
+    if dups:
+        s.append(f"  duplicate calls ({sum(dups.values()) - len(dups)} "
+                 f"avoidable):")
+        for (method, fp), n in sorted(dups.items(), key=lambda kv: -kv[1]):
+            s.append(f"    {method} [{fp}] x{n}")
+
+    if spans:
+        s.append("Phases:")
+        for span in spans:
+            s.append(f"  {span['phase']:<28} {span['seconds']:8.3f} s")
+    return "\n".join(s)
+
+
+def printSummary():
+    print(summary(), file=sys.stderr)
+
+
+def writeTrace(path: str):
+    """Write all calls & phase spans to `path` as JSON"""
+    with _lock:
+        trace = {"calls": list(_calls), "phases": list(_spans)}
+    with open(path, "w") as f:
+        json.dump(trace, f, indent=1)
@@ -0,0 +1,173 @@
+"""Signer pool: spread txs over several operator keys.
+
+With one key, every tx waits its turn on one nonce sequence, and one stuck
+tx blocks all behind it. A pool shards work over its keys by a stable key
+(a wallet's name or address), so txs about one wallet always come from the
+same signer, in order. Each signer gets its own thread and its own nonce
+counter, so sends overlap.
+
+Keys come from envvar VW_PRIVATE_KEYS (comma-separated). Without it, vw
+signs with VW_PRIVATE_KEY alone, as before. If VW_TREASURY_KEY is set,
+signers whose ETH balance is under MIN_GAS_BALANCE are topped up from it
+to TOP_UP_BALANCE.
+
+A tx that isn't mined within TX_TIMEOUT (dropped, or replaced) would leave
+a gap that stalls every later tx of its key. So when a wait times out, the
+key's nonce is re-read from the node's pending count.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+from typing import Callable, List
+
+from eth_utils import keccak
+from web3.exceptions import TimeExhausted
+
+from util.base18 import toBase18
+
+MIN_GAS_BALANCE = toBase18(0.05)  # wei
+TOP_UP_BALANCE = toBase18(0.2)  # wei
+TX_TIMEOUT = 300  # seconds to wait for a tx to be mined
+
+
+class SignerError(Exception):
+    pass
+
+
+def keysFromEnv() -> List[str]:
+    """Private keys of the pool, from VW_PRIVATE_KEYS. [] if unset"""
+    keys = os.getenv("VW_PRIVATE_KEYS", "")
+    return [k.strip() for k in keys.split(",") if k.strip()]
+
+
+class SignerPool:
+    """Accounts (brownie LocalAccounts) that share out work. `treasury`, if
+    given, pays their gas."""
+
+    def __init__(self, web3, accounts: list, treasury=None):
+        if not accounts:
+            raise SignerError("a signer pool needs at least one account")
+        self.web3 = web3
+        self.accounts = list(accounts)
+        self.treasury = treasury
+        self._by_address = {a.address.lower(): a for a in self.accounts}
+        self._nonces = {}  # address : next nonce to use
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    @property
+    def addresses(self) -> List[str]:
+        return [a.address for a in self.accounts]
+
+    def signerFor(self, key: str):
+        """The account for work keyed by `key`. Stable for a given pool"""
+        i = int.from_bytes(keccak(text=key.lower())[:8], "big")
+        return self.accounts[i % len(self.accounts)]
+
+    def account(self, address: str):
+        """The pool's account at `address`, eg the owner of a wallet"""
+        try:
+            return self._by_address[address.lower()]
+        except KeyError:
+            raise SignerError(f"{address} isn't in the signer pool") from None
+
+    # ---------------------------------------------------------------------
+    # nonces
+    def txParams(self, account) -> dict:
+        """Brownie tx params for `account`'s next tx, with an explicit
+        nonce. The tx is sent without waiting for it to be mined. Without
+        web3, brownie picks the nonce: fine for one signer, one thread."""
+        if self.web3 is None:
+            return {"from": account, "required_confs": 0}
+        with self._lock:
+            address = account.address
+            if address not in self._nonces:
+                self._nonces[address] = self.web3.eth.get_transaction_count(
+                    address, "pending")
+            nonce = self._nonces[address]
+            self._nonces[address] += 1
+        return {"from": account, "nonce": nonce, "required_confs": 0}
+
+    def resync(self, account):
+        """Forget `account`'s nonce, eg after a send that failed: the next
+        tx re-reads it from the chain"""
+        with self._lock:
+            self._nonces.pop(account.address, None)
+
+    def wait(self, tx, timeout: float = TX_TIMEOUT) -> bool:
+        """Wait for `tx` to be mined; True if it was. If it isn't within
+        `timeout`, its sender's nonce is re-synced, and returns False"""
+        if self.web3 is not None:
+            try:
+                self.web3.eth.wait_for_transaction_receipt(
+                    tx.txid, timeout=timeout)
+            except TimeExhausted:
+                self.resync(tx.sender)
+                return False
+        tx.wait(1)
+        return True
+
+    # ---------------------------------------------------------------------
+    # sending
+    def send(self, items: list, signer_fn: Callable, send_fn: Callable
+             ) -> List[tuple]:
+        """For each item, `send_fn(item, tx_params)` from the account
+        `signer_fn(item)`. `send_fn` must not wait for the tx. Signers send
+        in parallel, each in item order. Returns [(item, tx, error)] in item
+        order: tx is None and error says why where a send raised. One
+        failed send doesn't stop the others. The caller waits for the txs."""
+        shards = {}  # address : [(i, item)]
+        signers = {}
+        for i, item in enumerate(items):
+            account = signer_fn(item)
+            shards.setdefault(account.address, []).append((i, item))
+            signers[account.address] = account
+
+        def sendShard(address):
+            account, sent = signers[address], []
+            for i, item in shards[address]:
+                try:
+                    tx = send_fn(item, self.txParams(account))
+                except Exception as e:  # pylint: disable=broad-except
+                    self.resync(account)
+                    sent.append((i, item, None, f"{type(e).__name__}: {e}"))
+                    continue
+                sent.append((i, item, tx, None))
+            return sent
+
+        if len(shards) <= 1:
+            sent = [tx for address in shards for tx in sendShard(address)]
+        else:
+            with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+                sent = [tx for txs in executor.map(sendShard, list(shards))
+                        for tx in txs]
+        return [s[1:] for s in sorted(sent, key=lambda s: s[0])]
+
+    def topUp(self, min_balance: int = MIN_GAS_BALANCE,
+              target_balance: int = TOP_UP_BALANCE) -> List[tuple]:
+        """Send ETH from the treasury to each signer below `min_balance`,
+        up to `target_balance`. Returns [(address, amount)] topped up."""
+        if self.treasury is None:
+            return []
+        low = []
+        for a in self.accounts:
+            balance = self.web3.eth.get_balance(a.address)
+            if a.address != self.treasury.address and balance < min_balance:
+                low.append((a, target_balance - balance))
+        txs = []
+        for a, amount in low:  # treasury may be in the pool: track its nonce
+            nonce = self.txParams(self.treasury).get("nonce")
+            txs.append(self.treasury.transfer(a, amount, nonce=nonce,
+                                              required_confs=0))
+        failed = [a.address for (a, _), tx in zip(low, txs)
+                  if not self.wait(tx) or tx.status != 1]
+        if failed:
+            raise SignerError(f"top-up failed for {failed}")
+        return [(a.address, amount) for a, amount in low]
+
+
+def single(account) -> SignerPool:
+    """A pool of just `account`, where brownie picks nonces as usual"""
+    return SignerPool(None, [account])
@@ -0,0 +1,79 @@
+"""Named EVM snapshots of a dev chain, for `vw snapshot` & `vw revert`.
+
+Ganache's evm_snapshot returns an id. evm_revert to that id rolls the chain
+back, and uses up that snapshot and every later one. Here, snapshots get
+names. They're kept per chain in ~/.vw/snapshots.json (or $VW_STATE_DIR),
+with the block they were taken at. Reverting re-takes the snapshot, so a
+name can be reverted to again and again; snapshots that ganache dropped
+are forgotten.
+"""
+import json
+import os
+from typing import List
+
+from util import devchain
+from util.registry import stateDir
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class Snapshots:
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(stateDir(), "snapshots.json")
+        self._data = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self._data = json.load(f)
+
+    def entries(self, chain: str) -> dict:
+        """name : {"id", "block", "timestamp"} for `chain`"""
+        return self._data.get(chain, {})
+
+    def put(self, chain: str, name: str, snapshot_id: str, block: int,
+            timestamp: int):
+        self._data.setdefault(chain, {})[name] = {
+            "id": snapshot_id, "block": block, "timestamp": timestamp}
+
+    def dropFrom(self, chain: str, snapshot_id: str) -> List[str]:
+        """Forget `snapshot_id` and later ones: a revert used them up.
+        Returns their names"""
+        entries = self._data.get(chain, {})
+        first = int(snapshot_id, 16)
+        dropped = [name for name, e in entries.items()
+                   if int(e["id"], 16) >= first]
+        for name in dropped:
+            del entries[name]
+        return dropped
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._data, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+def take(web3, snapshots: Snapshots, chain: str, name: str) -> dict:
+    """Snapshot the chain now, as `name`. Returns the entry"""
+    snapshot_id = devchain.rpc(web3, "evm_snapshot", [])
+    if isinstance(snapshot_id, int):  # some ganache versions
+        snapshot_id = hex(snapshot_id)
+    block = devchain.head(web3)
+    snapshots.put(chain, name, snapshot_id, block["number"],
+                  block["timestamp"])
+    return snapshots.entries(chain)[name]
+
+
+def revert(web3, snapshots: Snapshots, chain: str, name: str) -> dict:
+    """Roll the chain back to snapshot `name`, then re-take it. Returns the
+    entry, with 'dropped': names of snapshots that the revert used up."""
+    entry = snapshots.entries(chain).get(name)
+    if entry is None:
+        raise SnapshotError(f"no snapshot '{name}' on this chain")
+    if not devchain.rpc(web3, "evm_revert", [entry["id"]]):
+        snapshots.dropFrom(chain, entry["id"])
+        raise SnapshotError(f"the chain no longer has snapshot '{name}'")
+    dropped = [n for n in snapshots.dropFrom(chain, entry["id"]) if n != name]
+    return dict(take(web3, snapshots, chain, name), dropped=dropped)
@@ -0,0 +1,28 @@
+"""Small summary statistics for latency samples (no numpy needed)."""
+from typing import List
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linearly-interpolated percentile, q in [0, 100]. Returns 0.0 if empty."""
+    if not values:
+        return 0.0
+    xs = sorted(values)
+    k = (len(xs) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(xs) - 1)
+    return xs[lo] + (xs[hi] - xs[lo]) * (k - lo)
+
+
+def summarize(values: List[float]) -> dict:
+    """Return dict of n, mean, min, p50, p95, max for `values`."""
+    if not values:
+        return {"n": 0, "mean": 0.0, "min": 0.0, "p50": 0.0, "p95": 0.0,
+                "max": 0.0}
+    return {
+        "n": len(values),
+        "mean": sum(values) / len(values),
+        "min": min(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "max": max(values),
+    }
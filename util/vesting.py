@@ -0,0 +1,56 @@
+"""Integer Python model of the wallets' vesting schedules.
+
+Mirrors `_vestingSchedule` of VestingWalletCliff, VestingWalletLinear and
+VestingWalletHalving exactly, so amounts can be computed locally, without
+calling the chain.
+"""
+
+UINT256_MAX = 2**256 - 1
+
+# wallet TYPE as used on the command line : contract name
+WALLET_CONTRACTS = {
+    "cliff": "VestingWalletCliff",
+    "lin": "VestingWalletLinear",
+    "exp": "VestingWalletHalving",
+}
+
+
+def getAmount(value: int, t: int, h: int) -> int:
+    """VestingWalletHalving.getAmount: approx of (1-(0.5^(t/h)))*value.
+    Raises OverflowError where the contract would revert on overflow."""
+    if h == 0:
+        raise ZeroDivisionError("h is zero")
+    p = value >> (t // h)  # shifts of >= 256 give 0, as in solidity
+    t %= h
+    if p * t > UINT256_MAX:
+        raise OverflowError("p * t overflows uint256")
+    return value - p + (p * t) // h // 2
+
+
+def vestedAmount(wallet_type: str, total_allocation: int, timestamp: int,
+                 start: int, duration: int, half_life: int = 0) -> int:
+    """Amount vested at `timestamp`, given total historical allocation
+    (= balance + released) and the wallet's schedule params"""
+    if wallet_type == "cliff":
+        if timestamp > _end(start, duration):
+            return total_allocation
+        return 0
+
+    if timestamp < start:
+        return 0
+    if timestamp > _end(start, duration):
+        return total_allocation
+    if wallet_type == "lin":
+        if total_allocation * (timestamp - start) > UINT256_MAX:
+            raise OverflowError("totalAllocation * timePassed overflows")
+        return (total_allocation * (timestamp - start)) // duration
+    if wallet_type == "exp":
+        return getAmount(total_allocation, timestamp - start, half_life)
+    raise ValueError(wallet_type)
+
+
+def _end(start: int, duration: int) -> int:
+    """start + duration. Raises OverflowError where solidity would revert"""
+    if start + duration > UINT256_MAX:
+        raise OverflowError("start + duration overflows uint256")
+    return start + duration